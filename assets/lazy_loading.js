@@ -0,0 +1,44 @@
+// Defers below-the-fold images until they are about to scroll into view: elements with the
+// lazy-background class get their CSS background once marked lazy-visible, and images rendered
+// with a data-src attribute get their src.
+(function () {
+    var selector = ".lazy-background:not(.lazy-visible), img[data-src]:not(.lazy-visible)";
+
+    function reveal(element) {
+        if (element.dataset.src) {
+            element.src = element.dataset.src;
+        }
+        element.classList.add("lazy-visible");
+    }
+
+    if (!("IntersectionObserver" in window)) {
+        new MutationObserver(function () {
+            document.querySelectorAll(selector).forEach(reveal);
+        }).observe(document.body, {childList: true, subtree: true});
+        return;
+    }
+
+    var observer = new IntersectionObserver(function (entries) {
+        entries.forEach(function (entry) {
+            if (entry.isIntersecting) {
+                reveal(entry.target);
+                observer.unobserve(entry.target);
+            }
+        });
+    }, {rootMargin: "400px 0px"});
+
+    // The layout is rendered by Dash after this script runs, so new elements are picked up as they appear
+    var scheduled = false;
+    new MutationObserver(function () {
+        if (scheduled) {
+            return;
+        }
+        scheduled = true;
+        window.requestAnimationFrame(function () {
+            scheduled = false;
+            document.querySelectorAll(selector).forEach(function (element) {
+                observer.observe(element);
+            });
+        });
+    }).observe(document.body, {childList: true, subtree: true});
+})();
@@ -0,0 +1,52 @@
+// Reports which .lazy-section elements are within 600px of the viewport to the section-visibility
+// store, as {"element-id": true | false}, so that their callbacks only run once they are about to
+// be seen (see server/lazy_sections.py). Without IntersectionObserver every section counts as visible.
+(function () {
+    var selector = ".lazy-section[id]";
+    var visibility = {};
+
+    function report() {
+        if (window.dash_clientside && window.dash_clientside.set_props) {
+            window.dash_clientside.set_props("section-visibility", {data: Object.assign({}, visibility)});
+        }
+    }
+
+    var observer = "IntersectionObserver" in window ? new IntersectionObserver(function (entries) {
+        var changed = false;
+        entries.forEach(function (entry) {
+            if (visibility[entry.target.id] !== entry.isIntersecting) {
+                visibility[entry.target.id] = entry.isIntersecting;
+                changed = true;
+            }
+        });
+        if (changed) {
+            report();
+        }
+    }, {rootMargin: "600px 0px"}) : null;
+
+    // The layout is rendered by Dash after this script runs, so sections are picked up as they appear
+    var scheduled = false;
+    new MutationObserver(function () {
+        if (scheduled) {
+            return;
+        }
+        scheduled = true;
+        window.requestAnimationFrame(function () {
+            scheduled = false;
+            var added = false;
+            document.querySelectorAll(selector).forEach(function (element) {
+                if (element.id in visibility) {
+                    return;
+                }
+                visibility[element.id] = !observer;
+                added = true;
+                if (observer) {
+                    observer.observe(element);
+                }
+            });
+            if (added && !observer) {
+                report();
+            }
+        });
+    }).observe(document.body, {childList: true, subtree: true});
+})();
@@ -0,0 +1,206 @@
+"""Latency, peak memory and payload benchmarks for the dashboard callbacks and data pipeline.
+
+Builds the app on the local fixture dataset at each requested scale and calls every registered
+callback directly over a grid of representative inputs:
+
+    python -m benchmarks.callbacks --scale 1 10 100 --output bench_results.json
+    python -m benchmarks.callbacks --scale --snapshot snapshots/synthetic-100k
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import date, datetime
+from server.app import create_app
+from server.query_data import QueryData
+from server.utils import filter_data, states_codes
+from server.initiators_section import button_to_sector
+from server.types_section import chosen_types
+from benchmarks.fixtures import load_subtype_data, generate_raw_data, clean_data
+from benchmarks.harness import CallbackInvoker, measure, select_country, types_country, initiators_country
+from benchmarks.synthetic_data import read_snapshot
+
+
+regions = [region for region in states_codes if region != "Global (states)"]
+years = [2025, 2024, 2020]
+default_dates = [str(date(2000, 1, 1)), str(datetime.now().date())]
+
+
+def build_scenarios(df, top=3):
+    """``(name, output_id, input values, triggered prop id)`` for every callback over the input grid."""
+    top_countries = df.groupby("receiver_country")["id"].nunique().nlargest(top).index.tolist()
+    countries = ["Global (states)"] + regions + top_countries
+    sectors = df.groupby("receiver_subcategory")["id"].nunique().drop(["Other", "Not available"], errors="ignore")
+    sectors = sectors.nlargest(top).index.tolist()
+    conflict = df.loc[df["conflict_name"] != "Not available", "conflict_name"].value_counts().index[0]
+    buttons = ["all-button"] + [button for button, sector in button_to_sector.items() if sector in sectors]
+    scenarios = []
+
+    def add(name, output_id, values, triggered="selected-country.value"):
+        scenarios.append((name, output_id, values, triggered))
+
+    for country in countries:
+        selection = select_country(country)
+        tag = f"country={country}"
+        add(f"titles[{tag}]", "overview-section-main-title", selection)
+        add(f"overview.aggregate[{tag}]", "overview-section-aggregate-graph", selection)
+        add(f"overview.evolution[{tag}]", "overview-section-evolution-graph", selection)
+        add(f"overview.sunburst[{tag}]", "overview-section-sunburst-chart", selection)
+        add(f"types.aggregate[{tag}]", "types-section-aggregate-graph", selection, types_country)
+        add(f"types.impact_types[{tag}]", "types-section-intelligence-impact-graph", selection, types_country)
+        add(f"types.techniques[{tag}]", "types-section-techniques-bar-chart", selection, types_country)
+        add(f"initiators.aggregate[{tag}]", "initiators-section-aggregate-graph", selection, initiators_country)
+        add(f"initiators.main_conflict[{tag}]", "initiators-section-conflicts-main-graph", selection,
+            initiators_country)
+        add(f"initiators.sectors_conflict[{tag}]", "initiators-section-conflicts-sectors-graph", selection,
+            initiators_country)
+        add(f"initiators.initiators_conflict[{tag}]", "initiators-section-conflicts-initiators-graph", selection,
+            initiators_country)
+
+    for country in ["Global (states)"] + top_countries:
+        selection = select_country(country)
+        tag = f"country={country}"
+        for toggle in [False, True]:
+            for n_sectors in [1, top]:
+                add(f"overview.evolution[{tag},toggle={toggle},sectors={n_sectors}]", "overview-section-evolution-graph",
+                    dict(selection, **{"overview-section-bar-label-store.data": sectors[:n_sectors],
+                                       "toggle-switch.checked": toggle}),
+                    "overview-section-bar-label-store.data")
+        for year in years[1:]:
+            add(f"types.aggregate[{tag},year={year}]", "types-section-aggregate-graph",
+                dict(selection, **{"types-section-year-slider.value": year}), "types-section-year-slider.value")
+        for year in years:
+            for button in buttons:
+                add(f"initiators.aggregate[{tag},year={year},button={button}]", "initiators-section-aggregate-graph",
+                    dict(selection, **{"initiators-section-year-slider.value": year, "active-button-store.data": button}),
+                    "active-button-store.data")
+
+    for sector in sectors:
+        add(f"overview.bar_selection[sector={sector}]", "overview-section-bar-index-store",
+            {"overview-section-aggregate-graph.clickData": {"points": [{"pointIndex": 0, "y": sector}]},
+             "overview-section-bar-index-store.data": [], "overview-section-bar-label-store.data": []},
+            "overview-section-aggregate-graph.clickData")
+        for incident_type in chosen_types[:3]:
+            click = {"points": [{"y": sector, "curveNumber": 0, "customdata": [1, chosen_types.index(incident_type)]}]}
+            add(f"types.aggregate_click[sector={sector},type={incident_type}]", "types-section-aggregate-graph",
+                {"types-section-aggregate-graph.clickData": click}, "types-section-aggregate-graph.clickData")
+            add(f"types.impact_types_click[sector={sector},type={incident_type}]",
+                "types-section-intelligence-impact-graph",
+                {"types-section-aggregate-graph.clickData": click}, "types-section-aggregate-graph.clickData")
+        add(f"types.techniques[sector={sector}]", "types-section-techniques-bar-chart",
+            {"types-section-techniques-sectors-dropdown.value": sector}, "types-section-techniques-sectors-dropdown.value")
+
+    conflict_click = {"points": [{"label": conflict, "pointNumber": 0}]}
+    add(f"initiators.sectors_conflict_click[conflict={conflict}]", "initiators-section-conflicts-sectors-graph",
+        {"initiators-section-conflicts-main-graph.clickData": conflict_click},
+        "initiators-section-conflicts-main-graph.clickData")
+    add(f"initiators.initiators_conflict_click[conflict={conflict}]", "initiators-section-conflicts-initiators-graph",
+        {"initiators-section-conflicts-sectors-graph.clickData": {"points": [{"curveNumber": 0}]},
+         "initiators-section-conflicts-initiators-store.data": {"conflict_name": conflict, "sectors": sectors}},
+        "initiators-section-conflicts-sectors-graph.clickData")
+    add("initiators.date_range[2023]", "initiators-section-conflicts-main-graph",
+        {"initiators-section-date-range-picker.value": ["2023-01-01", "2023-12-31"]},
+        "initiators-section-date-range-picker.value")
+
+    add("total_incidents", "total-incidents", {})
+    add("types.reset_year_slider", "types-section-year-slider", {})
+    add("types.reset_drop_downs", "types-section-techniques-sectors-dropdown", {})
+    add("initiators.active_button", "active-button-store", {"health-button.n_clicks": 1}, "health-button.n_clicks")
+    add("initiators.reset_year_slider", "initiators-section-year-slider",
+        {"initiators-section-date-range-picker.value": default_dates}, "initiators-section-reset-graphs.n_clicks")
+    return scenarios
+
+
+def run_pipeline_benchmarks(raw_df, subtype_df, df, repeat):
+    benchmarks = {}
+    if raw_df is not None:
+        db_query = QueryData.__new__(QueryData)
+        precleaned = db_query.preclean_data(raw_df.copy())
+        initiators_cleaned = db_query.clean_initiators(precleaned.copy())
+        benchmarks.update({
+            "pipeline.preclean_data": measure(lambda: db_query.preclean_data(raw_df.copy()), repeat, payload=False),
+            "pipeline.clean_initiators": measure(lambda: db_query.clean_initiators(precleaned.copy()), repeat,
+                                                 payload=False),
+            "pipeline.clean_initiator_names": measure(
+                lambda: db_query.clean_initiator_names(initiators_cleaned.copy()), repeat, payload=False),
+        })
+    benchmarks.update({
+        "pipeline.create_app": measure(lambda: create_app(df, subtype_df, df["id"].nunique()), repeat, payload=False),
+        "filter_data[country=Global (states)]": measure(lambda: filter_data(df.copy(deep=True), "Global (states)"),
+                                                        repeat, payload=False),
+        "filter_data[country=EU (member states),year=2024]": measure(
+            lambda: filter_data(df.copy(deep=True), "EU (member states)", selected_year=2024), repeat, payload=False),
+    })
+    return benchmarks
+
+
+def run_dataset_benchmarks(df, subtype_df, nb_incidents, raw_df=None, repeat=5, pattern=None, pipeline=True,
+                           log=print):
+    log(f"  {nb_incidents} incidents, {len(df)} rows")
+    benchmarks = {}
+    if pipeline:
+        benchmarks.update(run_pipeline_benchmarks(raw_df, subtype_df, df, max(1, repeat // 2)))
+
+    invoker = CallbackInvoker(create_app(df, subtype_df, nb_incidents))
+    for name, output_id, values, triggered in build_scenarios(df):
+        if pattern and not (pattern(name) if callable(pattern) else pattern in name):
+            continue
+        benchmarks[name] = measure(lambda: invoker.invoke(output_id, values, triggered), repeat)
+
+    for name, metrics in benchmarks.items():
+        log(f"  {name:<90} p50 {metrics['latency_ms']['p50']:9.2f} ms  "
+            f"p95 {metrics['latency_ms']['p95']:9.2f} ms  peak {metrics['peak_memory_kb']:9.0f} kB  "
+            f"{metrics['payload_bytes']:8d} B")
+    return benchmarks
+
+
+def run_benchmarks(scales=(1,), repeat=5, pattern=None, pipeline=True, snapshots=(), log=print):
+    results = {}
+    for scale in scales:
+        log(f"Building fixture at {scale}x scale")
+        subtype_df = load_subtype_data(scale)
+        raw_df = generate_raw_data(subtype_df)
+        df, subtype_df, nb_incidents = clean_data(raw_df.copy(), subtype_df)
+        benchmarks = run_dataset_benchmarks(df, subtype_df, nb_incidents, raw_df, repeat, pattern, pipeline, log)
+        results.update({f"{scale}x/{name}": metrics for name, metrics in benchmarks.items()})
+
+    for snapshot in snapshots:
+        log(f"Loading snapshot {snapshot}")
+        df, subtype_df, nb_incidents = read_snapshot(snapshot)
+        benchmarks = run_dataset_benchmarks(df, subtype_df, nb_incidents, None, repeat, pattern, pipeline, log)
+        label = os.path.basename(os.path.normpath(snapshot))
+        results.update({f"{label}/{name}": metrics for name, metrics in benchmarks.items()})
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, nargs="*", default=[1], help="data scale factors, e.g. 1 10 100")
+    parser.add_argument("--snapshot", nargs="+", default=[],
+                        help="also benchmark these synthetic snapshot directories (see benchmarks.synthetic_data)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed calls per scenario")
+    parser.add_argument("-k", "--pattern", help="only run scenarios whose name contains this string")
+    parser.add_argument("--no-pipeline", action="store_true", help="skip the QueryData pipeline benchmarks")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.scale, args.repeat, args.pattern, not args.no_pipeline, args.snapshot)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({
+                "meta": {
+                    "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "python": sys.version.split()[0],
+                    "platform": platform.platform(),
+                    "scales": args.scale,
+                    "snapshots": args.snapshot,
+                    "repeat": args.repeat,
+                },
+                "results": results,
+            }, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+from server.query_data import QueryData
+
+
+subtype_data_path = "./data/cit_subtype_data_for_offline_use_31052024.csv"
+
+raw_types = ["Data theft", "DDoS/Defacement", "Ransomware", "Wiper", "Hack and leak", "Other",
+             "Data theft & Doxing", "Disruption"]
+
+initiators = [
+    ("APT28", "Russia", "State affiliated actor"),
+    ("Cozy Bear/APT29", "Russia", "State affiliated actor"),
+    ("Lazarus Group", "Korea, Democratic People's Republic of", "State affiliated actor"),
+    ("APT1/Comment Crew", "China", "State"),
+    ("NoName057(16)", "Russia", "Non-state-group"),
+    ("Killnet", "Russia", "Non-state actor, state-affiliation suggested"),
+    ("LockBit", "Unknown", "Non-state-group"),
+    ("Anonymous Sudan", "Sudan", "Non-state-group"),
+    ("CyberAv3ngers", "Iran, Islamic Republic of", "State affiliated actor"),
+    ("Individual hacker", "United States", "Individual hacker(s)"),
+    ("Not available", "Not available", "Unknown - not attributed"),
+    ("Unknown", "Unknown", "Not available"),
+]
+
+initial_access = ["Phishing", "Valid Accounts", "Exploit Public-Facing Application", "External Remote Services",
+                  "Supply Chain Compromise", "Trusted Relationship", "Not available"]
+
+impacts = ["Network Denial of Service", "Data Encrypted for Impact", "Data Manipulation", "Data Destruction",
+           "Defacement", "Account Access Removal", "Disk Wipe", "Service Stop", "Not available"]
+
+conflicts = [("Not available", "Not available"), ("Russia - Ukraine", "System/ideology"),
+             ("Israel - Palestine", "Territory"), ("China - Taiwan", "International power")]
+
+functional_impacts = ["No system interference/disruption", "Day (< 24h)", "Days (< 7 days)", "Weeks (< 4 weeks)",
+                      "Months", "Not available"]
+
+intelligence_impacts = [
+    'No data breach/exfiltration or data corruption (deletion/altering) and/or leaking of data',
+    'Minor data breach/exfiltration (no critical/sensitive information), but no data corruption (deletion/altering) or leaking of data  ',
+    'Minor data breach/exfiltration (no critical/sensitive information), data corruption (deletion/altering) and/or leaking of data  ',
+    'Data corruption (deletion/altering) but no leaking of data, no data breach/exfiltration OR major data breach / exfiltration, but no data corruption and/or leaking of data',
+    'Major data breach/exfiltration (critical/sensitive information) & data corruption (deletion/altering) and/or leaking of data ',
+    "Not available"
+]
+
+
+def load_subtype_data(scale=1):
+    """The offline subtype extract, replicated ``scale`` times with shifted incident ids."""
+    subtype_df = pd.read_csv(subtype_data_path)
+    offset = subtype_df["id"].max() + 1
+    subtype_df = pd.concat(
+        [subtype_df.assign(id=subtype_df["id"] + i * offset) for i in range(scale)],
+        ignore_index=True
+    )
+    return subtype_df.drop_duplicates()
+
+
+def generate_raw_data(subtype_df, seed=0):
+    """A frame shaped like ``QueryData.query_database`` output, with one row per joined
+    (receiver, initiator, impact) combination, built on the receivers of ``subtype_df``."""
+    rng = np.random.default_rng(seed)
+    receivers = subtype_df[["id", "receiver_subcategory", "receiver_country", "region_name"]].drop_duplicates()
+    receivers = receivers.assign(
+        receiver_name="Receiver",
+        receiver_category="Critical infrastructure",
+        region_name=receivers["region_name"].replace("No region", None),
+    )
+
+    ids = receivers["id"].unique()
+    n = len(ids)
+    start_dates = pd.Timestamp("2010-01-01") + pd.to_timedelta(rng.integers(0, 5500, n), unit="D")
+    added_dates = pd.Timestamp("2022-10-01") + pd.to_timedelta(rng.integers(0, 700, n), unit="D")
+    conflict_choices = rng.choice(len(conflicts), n, p=[0.6, 0.3, 0.05, 0.05])
+    incidents = pd.DataFrame({
+        "id": ids,
+        "start_date": start_dates,
+        "added_to_db": np.maximum(start_dates, added_dates),
+        "type_clean": rng.choice(raw_types, n),
+        "initial_access": rng.choice(initial_access, n),
+        "weighted_intensity": rng.gamma(2, 3, n).round(1),
+        "zero_days": rng.choice(["Yes", "No", "Not available"], n),
+        "issue": [conflicts[i][1] for i in conflict_choices],
+        "conflict_name": [conflicts[i][0] for i in conflict_choices],
+        "functional_impact": rng.choice(functional_impacts, n),
+        "intelligence_impact": rng.choice(intelligence_impacts, n),
+        "economic_impact": "Not available",
+        "economic_impact_value": None,
+        "economic_impact_currency": None,
+    })
+
+    initiator_choices = rng.integers(0, len(initiators), (n, 2))
+    initiator_rows = pd.DataFrame({
+        "id": np.repeat(ids, 2),
+        "initiator": initiator_choices.ravel(),
+        "settled_initiator": rng.random(2 * n) < 0.8,
+    })
+    initiator_rows = initiator_rows[(initiator_rows.index % 2 == 0) | (rng.random(2 * n) < 0.3)]
+    initiator_rows = initiator_rows.assign(
+        initiator_name=[initiators[i][0] for i in initiator_rows["initiator"]],
+        initiator_country=[initiators[i][1] for i in initiator_rows["initiator"]],
+        initiator_category=[initiators[i][2] for i in initiator_rows["initiator"]],
+    ).drop(columns=["initiator"])
+
+    impact_rows = pd.DataFrame({"id": np.repeat(ids, 2), "impact": rng.choice(impacts, 2 * n)})
+    impact_rows = impact_rows[(impact_rows.index % 2 == 0) | (rng.random(2 * n) < 0.3)]
+
+    return (incidents
+            .merge(receivers, on="id")
+            .merge(initiator_rows, on="id")
+            .merge(impact_rows, on="id"))
+
+
+def clean_data(raw_df, subtype_df):
+    """Runs the ``main.py`` cleaning pipeline on an in-memory frame, without a database."""
+    db_query = QueryData.__new__(QueryData)
+    df = db_query.preclean_data(raw_df)
+    df = db_query.clean_initiators(df)
+    nb_incidents = df["id"].nunique()
+    df = db_query.clean_initiator_names(df)
+    df["alpha_2_code"] = df["alpha_2_code"].fillna("unknown")
+    return df, subtype_df, nb_incidents
+
+
+def load_fixture(scale=1, seed=0):
+    subtype_df = load_subtype_data(scale)
+    return clean_data(generate_raw_data(subtype_df, seed=seed), subtype_df)
@@ -0,0 +1,119 @@
+import time
+import tracemalloc
+from contextvars import copy_context
+from datetime import date
+import numpy as np
+from dash._callback_context import context_value
+from dash._utils import AttributeDict
+from plotly.io.json import to_json_plotly
+from server.metrics import get_server_callbacks
+from server.warmup import call_request
+
+
+# The Types and Initiators callbacks take the country from the store of their section (see server.lazy_sections)
+types_country = "types-section-country.data"
+initiators_country = "initiators-section-country.data"
+
+
+def select_country(country):
+    """The selected country, copied into the stores of the Types and Initiators sections as the
+    browser does once they are visible."""
+    return {"selected-country.value": country, types_country: country, initiators_country: country}
+
+
+def get_layout_defaults(layout):
+    """Initial ``{"component-id.property": value}`` of every identified component in the layout,
+    as the browser would send them (dates as ISO strings)."""
+    defaults = {}
+    for component in [layout] + list(layout._traverse()):
+        component_id = getattr(component, "id", None)
+        if not isinstance(component_id, str):
+            continue
+        for prop in component._prop_names:
+            value = getattr(component, prop, None)
+            if isinstance(value, list):
+                value = [str(item) if isinstance(item, date) else item for item in value]
+            defaults[f"{component_id}.{prop}"] = value
+    return defaults
+
+
+def get_callbacks(app):
+    """Registered callbacks keyed by each of their output ids."""
+    callbacks = {}
+    for key, entry in get_server_callbacks(app):
+        for output in key.strip(".").split("..."):
+            callbacks[output.rsplit(".", 1)[0]] = entry
+    return callbacks
+
+
+class CallbackInvoker:
+    """Calls the functions registered on a Dash app directly, with a callback context set as
+    Dash would set it, so that benchmarks exercise the callbacks without the HTTP layer."""
+
+    def __init__(self, app):
+        self.callback_map = app.callback_map
+        self.callbacks = get_callbacks(app)
+        self.defaults = get_layout_defaults(app.layout)
+
+    def get_arguments(self, output_id, values=None):
+        entry = self.callbacks[output_id]
+        values = dict(self.defaults, **(values or {}))
+        return [values.get(f"{dependency['id']}.{dependency['property']}")
+                for dependency in entry["inputs"] + entry["state"]]
+
+    def invoke(self, output_id, values=None, triggered=None):
+        function = self.callbacks[output_id]["callback"].__wrapped__
+        arguments = self.get_arguments(output_id, values)
+        triggered_inputs = [{"prop_id": triggered, "value": (values or {}).get(triggered)}] if triggered else []
+
+        def run():
+            context_value.set(AttributeDict(triggered_inputs=triggered_inputs))
+            return function(*arguments)
+
+        return copy_context().run(run)
+
+    def invoke_request(self, body):
+        """Calls the function a recorded ``/_dash-update-component`` request body was sent to, with
+        the request's input and state values."""
+        return call_request(self.callback_map[body["output"]], body)
+
+
+def summarize(samples):
+    samples = np.asarray(samples) * 1000
+    return {
+        "mean": float(samples.mean()),
+        "stdev": float(samples.std()),
+        "min": float(samples.min()),
+        "p50": float(np.percentile(samples, 50)),
+        "p95": float(np.percentile(samples, 95)),
+        "max": float(samples.max()),
+        "samples": len(samples),
+    }
+
+
+def measure(function, repeat=5, payload=True):
+    """Latency distribution (ms), peak traced memory (kB) and JSON payload size (bytes) of ``function()``.
+
+    The first call is reported separately as ``first_call_ms`` since it fills any per-input caches.
+    Memory is traced on an extra call so that tracemalloc overhead does not skew the timings.
+    """
+    start = time.perf_counter()
+    result = function()
+    first_call = time.perf_counter() - start
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        samples.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "first_call_ms": first_call * 1000,
+        "latency_ms": summarize(samples),
+        "peak_memory_kb": peak / 1024,
+        "payload_bytes": len(to_json_plotly(result)) if payload and result is not None else 0,
+    }
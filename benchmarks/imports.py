@@ -0,0 +1,73 @@
+"""Import time of ``main``, the module gunicorn loads, measured with ``python -X importtime`` in fresh
+interpreters, as a gate on the boot budget:
+
+    python -m benchmarks.imports
+    python -m benchmarks.imports --budget-ms 1000 --top 20
+
+Exits with status 1 when importing the app takes longer than ``--budget-ms`` (fastest of
+``--repeat`` runs), or when it imports one of ``deferred_modules``, which are only needed once the
+database is queried or a figure is drawn and must stay out of the import path.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+
+app_modules = ["main"]
+deferred_modules = ["openpyxl", "plotly.express", "sqlalchemy"]
+# Importing the app took about 1050 ms when the budget was set, and importing main about 910 ms
+default_budget_ms = 1250
+
+repo_folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+line_pattern = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure_imports(modules=app_modules):
+    """``(total ms, {module: (self ms, cumulative ms)})`` of importing ``modules`` in a fresh interpreter."""
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", "; ".join(f"import {module}" for module in modules)],
+                             capture_output=True, text=True, check=True, cwd=repo_folder)
+    imported, total = {}, 0
+    for line in process.stderr.splitlines():
+        match = line_pattern.match(line)
+        if not match:
+            continue
+        own, cumulative, indent, module = match.groups()
+        imported[module] = (int(own) / 1000, int(cumulative) / 1000)
+        if len(indent) == 1:
+            total += int(cumulative) / 1000
+    return total, imported
+
+
+def check_imports(repeat=3):
+    """``(fastest total ms, imported modules of that run, deferred modules that were imported)``."""
+    runs = [measure_imports() for _ in range(repeat)]
+    total, imported = min(runs, key=lambda run: run[0])
+    loaded = [module for module in deferred_modules if module in imported]
+    return total, imported, loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=default_budget_ms)
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters, the fastest one counts")
+    parser.add_argument("--top", type=int, default=10, help="list the modules with the longest own import time")
+    args = parser.parse_args(argv)
+
+    total, imported, loaded = check_imports(args.repeat)
+    print(f"Importing {', '.join(app_modules)}: {total:.0f} ms for {len(imported)} modules (budget {args.budget_ms:.0f} ms)")
+    for module, (own, cumulative) in sorted(imported.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"  {module:<60} {own:8.1f} ms  {cumulative:8.1f} ms cumulative")
+    failed = False
+    if loaded:
+        print(f"Deferred modules imported at start-up: {', '.join(loaded)}")
+        failed = True
+    if total > args.budget_ms:
+        print(f"Over the import budget by {total - args.budget_ms:.0f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,341 @@
+"""HTTP load test of the ``/_dash-update-component`` endpoint.
+
+Records the callback requests a browser session emits, then replays them with concurrent virtual
+users against a running server, or against local gunicorn servers started per configuration:
+
+    python -m benchmarks.loadtest record --url http://127.0.0.1:8050 --output session.jsonl
+    python -m benchmarks.loadtest record --har browser_session.har --output session.jsonl
+    python -m benchmarks.loadtest replay session.jsonl --url http://127.0.0.1:8050 --users 8 --duration 30
+    python -m benchmarks.loadtest replay session.jsonl --config 1x1 1x8 4x2 --users 16 --output load.json
+
+The scripted session loads the page, changes the country, moves both year sliders, clicks bars in
+the overview, types and conflicts graphs, zooms the evolution graph and changes the date range.
+Callbacks triggered by the outputs of other callbacks are followed as the Dash renderer would,
+and the visitor sees every section, so country changes reach the lazily computed sections too.
+Servers started with ``--config WORKERSxTHREADS`` serve the local fixture, or the snapshot given
+by ``--snapshot`` (see ``benchmarks.synthetic_data``), with the other settings of the production
+``gunicorn.conf.py`` unless ``--gunicorn-config`` names another file.
+
+Users replaying a session once, together, model a shared link: they send identical requests at
+the same time, which ``server.single_flight`` computes once. ``SINGLE_FLIGHT_TIMEOUT=0`` starts the
+local servers without it, for comparison:
+
+    SINGLE_FLIGHT_TIMEOUT=0 python -m benchmarks.loadtest replay session.jsonl --config 1x8 --users 8 --iterations 1
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+import numpy as np
+import requests
+from benchmarks.harness import select_country
+from server.warmup import get_layout_values
+
+
+update_path = "/_dash-update-component"
+
+
+default_actions = [
+    ("country", lambda state: select_country("EU (member states)")),
+    ("country", lambda state: select_country("Germany")),
+    ("types_year", lambda state: {"types-section-year-slider.value": 2024}),
+    ("initiators_year", lambda state: {"initiators-section-year-slider.value": 2023}),
+    ("overview_bar_click", lambda state: {"overview-section-aggregate-graph.clickData": click_bar(
+        state, "overview-section-aggregate-graph")}),
+    ("evolution_zoom", lambda state: {"overview-section-evolution-range.data": {
+        "uirevision": state["selected-country.value"], "range": ["2023-01-01", "2023-06-30"]}}),
+    ("types_bar_click", lambda state: {"types-section-aggregate-graph.clickData": click_bar(
+        state, "types-section-aggregate-graph")}),
+    ("initiators_sector_button", lambda state: {"health-button.n_clicks": 1}),
+    ("conflict_click", lambda state: {"initiators-section-conflicts-main-graph.clickData": click_slice(
+        state, "initiators-section-conflicts-main-graph")}),
+    ("conflict_sector_click", lambda state: {"initiators-section-conflicts-sectors-graph.clickData": click_bar(
+        state, "initiators-section-conflicts-sectors-graph")}),
+    ("date_range", lambda state: {"initiators-section-date-range-picker.value": ["2023-01-01", "2023-12-31"]}),
+]
+
+
+def click_bar(state, graph_id):
+    """``clickData`` of the last (largest) bar of the first trace of a horizontal bar chart."""
+    trace = state[f"{graph_id}.figure"]["data"][0]
+    point = {"curveNumber": 0, "pointIndex": len(trace["y"]) - 1, "pointNumber": len(trace["y"]) - 1,
+             "y": trace["y"][-1]}
+    if isinstance(trace.get("customdata"), list):
+        point["customdata"] = trace["customdata"][-1]
+    return {"points": [point]}
+
+
+def click_slice(state, graph_id):
+    trace = state[f"{graph_id}.figure"]["data"][0]
+    return {"points": [{"curveNumber": 0, "pointNumber": 0, "label": trace["labels"][0]}]}
+
+
+def get_prop_ids(dependencies):
+    return [f"{dependency['id']}.{dependency['property']}" for dependency in dependencies]
+
+
+def get_outputs(callback):
+    return [output.rsplit(".", 1) for output in callback["output"].strip(".").split("...")]
+
+
+class SessionRecorder:
+    """Drives a running server through a scripted session and records every callback request,
+    following chained callbacks in the order the Dash renderer fires them."""
+
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+        self.http = requests.Session()
+        # Clientside callbacks run in the browser
+        self.callbacks = [callback for callback in self.http.get(f"{self.url}/_dash-dependencies").json()
+                          if not callback.get("clientside_function")]
+        self.state = get_layout_values(self.http.get(f"{self.url}/_dash-layout").json())
+        self.requests = []
+
+    def build_request(self, callback, changed):
+        outputs = [{"id": component_id, "property": prop} for component_id, prop in get_outputs(callback)]
+        return {
+            "output": callback["output"],
+            "outputs": outputs if callback["output"].startswith("..") else outputs[0],
+            "inputs": [dict(dependency, value=self.state.get(prop_id)) for dependency, prop_id
+                       in zip(callback["inputs"], get_prop_ids(callback["inputs"]))],
+            "state": [dict(dependency, value=self.state.get(prop_id)) for dependency, prop_id
+                      in zip(callback["state"], get_prop_ids(callback["state"]))],
+            "changedPropIds": [prop_id for prop_id in get_prop_ids(callback["inputs"]) if prop_id in changed],
+        }
+
+    def fire(self, step, pending, changed):
+        fired = set()
+        while pending:
+            produced = {f"{component_id}.{prop}" for callback in pending for component_id, prop in get_outputs(callback)}
+            ready = [callback for callback in pending
+                     if not produced.intersection(get_prop_ids(callback["inputs"])) - {
+                         f"{component_id}.{prop}" for component_id, prop in get_outputs(callback)}] or pending
+            pending = [callback for callback in pending if callback not in ready]
+            updated = set()
+            for callback in ready:
+                body = self.build_request(callback, changed)
+                self.requests.append({"step": step, "body": body})
+                fired.add(callback["output"])
+                response = self.http.post(f"{self.url}{update_path}", json=body)
+                if response.status_code != 200:
+                    continue
+                for component_id, props in response.json().get("response", {}).items():
+                    for prop, value in props.items():
+                        self.state[f"{component_id}.{prop}"] = value
+                        updated.add(f"{component_id}.{prop}")
+            changed = changed | updated
+            pending += [callback for callback in self.callbacks
+                        if callback["output"] not in fired and callback not in pending
+                        and updated.intersection(get_prop_ids(callback["inputs"]))]
+
+    def record(self, actions=default_actions):
+        self.fire("page_load", [callback for callback in self.callbacks if not callback.get("prevent_initial_call")],
+                  set())
+        for step, action in actions:
+            values = action(self.state)
+            self.state.update(values)
+            self.fire(step, [callback for callback in self.callbacks
+                             if set(values).intersection(get_prop_ids(callback["inputs"]))], set(values))
+        return self.requests
+
+
+def read_har(path):
+    """Callback requests of a browser session exported as a HAR file from the network tab."""
+    with open(path) as file:
+        entries = json.load(file)["log"]["entries"]
+    return [{"step": "har", "body": json.loads(entry["request"]["postData"]["text"])}
+            for entry in entries if entry["request"]["url"].split("?")[0].endswith(update_path)]
+
+
+def write_session(path, session):
+    with open(path, "w") as file:
+        for request in session:
+            file.write(json.dumps(request) + "\n")
+
+
+def read_session(path):
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def replay(url, session, users=4, duration=30, iterations=None):
+    """Every virtual user replays the session in order, in a loop, until ``duration`` seconds
+    have passed or it has completed ``iterations`` sessions."""
+    url = url.rstrip("/") + update_path
+    samples = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def run_user():
+        http = requests.Session()
+        completed = 0
+        while time.perf_counter() < deadline and (iterations is None or completed < iterations):
+            for request in session:
+                start = time.perf_counter()
+                if start >= deadline:
+                    return
+                try:
+                    response = http.post(url, json=request["body"])
+                    status, size = response.status_code, len(response.content)
+                except requests.RequestException:
+                    status, size = None, 0
+                sample = (request["body"]["output"], time.perf_counter() - start, status, size)
+                with lock:
+                    samples.append(sample)
+            completed += 1
+
+    threads = [threading.Thread(target=run_user) for _ in range(users)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize_samples(samples, time.perf_counter() - start)
+
+
+def summarize_group(samples, elapsed):
+    latencies = np.array([latency for _, latency, _, _ in samples]) * 1000
+    errors = sum(1 for _, _, status, _ in samples if status is None or status >= 400)
+    return {
+        "requests": len(samples),
+        "throughput_rps": len(samples) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "error_rate": errors / len(samples),
+        "mean_bytes": float(np.mean([size for _, _, _, size in samples])),
+    }
+
+
+def summarize_samples(samples, elapsed):
+    by_output = defaultdict(list)
+    for sample in samples:
+        by_output[sample[0]].append(sample)
+    return {
+        "elapsed_s": elapsed,
+        "total": summarize_group(samples, elapsed) if samples else {},
+        "callbacks": {output: summarize_group(group, elapsed) for output, group in by_output.items()},
+    }
+
+
+def create_server():
+    """WSGI server on the local fixture or on ``BENCHMARK_SNAPSHOT``, for ``gunicorn 'benchmarks.loadtest:create_server()'``."""
+    from server.app import create_app
+    if os.environ.get("BENCHMARK_SNAPSHOT"):
+        from benchmarks.synthetic_data import read_snapshot
+        data = read_snapshot(os.environ["BENCHMARK_SNAPSHOT"])
+    else:
+        from benchmarks.fixtures import load_fixture
+        data = load_fixture(int(os.environ.get("BENCHMARK_SCALE", 1)))
+    return create_app(*data, initial_state=os.environ.get("INITIAL_STATE", "true").lower() != "false",
+                      single_flight_timeout=float(os.environ.get("SINGLE_FLIGHT_TIMEOUT", 30))).server
+
+
+def start_server(config, port, snapshot=None, timeout=300, gunicorn_config="gunicorn.conf.py"):
+    """Starts gunicorn with a ``WORKERSxTHREADS`` configuration and the other settings of
+    ``gunicorn_config``, and waits until it serves the layout."""
+    workers, threads = config.split("x")
+    env = dict(os.environ, BENCHMARK_SNAPSHOT=snapshot or "")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--config", gunicorn_config, "--workers", workers, "--threads", threads,
+         "--bind", f"127.0.0.1:{port}", "--timeout", "120", "--log-level", "warning",
+         "benchmarks.loadtest:create_server()"],
+        env=env,
+    )
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {process.returncode} for configuration {config}")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/_dash-layout", timeout=1).status_code == 200:
+                return process
+        except requests.RequestException:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"gunicorn did not become ready within {timeout} s for configuration {config}")
+
+
+def print_report(label, report):
+    total = report["total"]
+    print(f"{label}: {total['requests']} requests in {report['elapsed_s']:.1f} s, "
+          f"{total['throughput_rps']:.1f} req/s, p50 {total['p50_ms']:.1f} ms, p95 {total['p95_ms']:.1f} ms, "
+          f"p99 {total['p99_ms']:.1f} ms, errors {total['error_rate']:.2%}")
+    for output, metrics in sorted(report["callbacks"].items(), key=lambda item: -item[1]["p95_ms"]):
+        print(f"  {output[:90]:<90} {metrics['throughput_rps']:7.1f} req/s  p50 {metrics['p50_ms']:8.1f} ms  "
+              f"p95 {metrics['p95_ms']:8.1f} ms  p99 {metrics['p99_ms']:8.1f} ms  errors {metrics['error_rate']:6.2%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="record a session from a running server or a HAR file")
+    record_parser.add_argument("--url", help="server to drive through the scripted session")
+    record_parser.add_argument("--har", help="import the callback requests of a browser HAR export instead")
+    record_parser.add_argument("--output", required=True, help="session file to write (JSON lines)")
+
+    replay_parser = commands.add_parser("replay", help="replay a recorded session with concurrent users")
+    replay_parser.add_argument("session", help="session file written by 'record'")
+    replay_parser.add_argument("--url", help="replay against this running server")
+    replay_parser.add_argument("--config", nargs="+", default=[],
+                               help="start local gunicorn servers, e.g. 1x1 2x4 (workers x threads), in turn")
+    replay_parser.add_argument("--snapshot", help="snapshot directory served by the local gunicorn servers")
+    replay_parser.add_argument("--gunicorn-config", default="gunicorn.conf.py",
+                               help="settings of the local gunicorn servers besides workers and threads")
+    replay_parser.add_argument("--port", type=int, default=8765)
+    replay_parser.add_argument("--users", type=int, default=4, help="concurrent virtual users")
+    replay_parser.add_argument("--duration", type=float, default=30, help="seconds per run")
+    replay_parser.add_argument("--iterations", type=int, help="stop each user after this many sessions")
+    replay_parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        if not args.url and not args.har:
+            parser.error("record needs --url or --har")
+        session = read_har(args.har) if args.har else SessionRecorder(args.url).record()
+        write_session(args.output, session)
+        print(f"Recorded {len(session)} callback requests to {args.output}")
+        return
+
+    if not args.url and not args.config:
+        parser.error("replay needs --url or --config")
+    session = read_session(args.session)
+    results = {}
+    if args.url:
+        results[args.url] = replay(args.url, session, args.users, args.duration, args.iterations)
+        print_report(args.url, results[args.url])
+    for config in args.config:
+        process = start_server(config, args.port, args.snapshot, gunicorn_config=args.gunicorn_config)
+        try:
+            results[config] = replay(f"http://127.0.0.1:{args.port}", session, args.users, args.duration,
+                                     args.iterations)
+        finally:
+            process.terminate()
+            process.wait()
+        print_report(f"gunicorn {config}", results[config])
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({
+                "meta": {
+                    "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "python": sys.version.split()[0],
+                    "platform": platform.platform(),
+                    "session": args.session,
+                    "session_requests": len(session),
+                    "users": args.users,
+                    "duration_s": args.duration,
+                    "snapshot": args.snapshot,
+                    "gunicorn_config": args.gunicorn_config,
+                },
+                "results": results,
+            }, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
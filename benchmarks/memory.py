@@ -0,0 +1,44 @@
+"""Memory accounting report of the app's datasets, section state, caches and module-level tables:
+
+    python -m benchmarks.memory
+    python -m benchmarks.memory --source database --output memory.json
+    python -m benchmarks.memory --source snapshots/synthetic-100k --warm
+
+The running app serves the same report on ``/admin/memory``.
+"""
+import argparse
+import json
+from server.app import create_app
+from server.memory_report import build_memory_report, format_memory_report
+from benchmarks.harness import CallbackInvoker
+from benchmarks.synthetic_data import load_source
+from benchmarks.callbacks import build_scenarios
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default="fixture",
+                        help="'fixture', 'database' (uses DATABASE_URL) or a snapshot directory")
+    parser.add_argument("--warm", action="store_true",
+                        help="run the benchmark scenarios first, so that the caches are populated")
+    parser.add_argument("--no-columns", action="store_true", help="leave out the per-column breakdown")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    df, subtype_df = load_source(args.source)
+    app = create_app(df, subtype_df, df["id"].nunique())
+
+    if args.warm:
+        invoker = CallbackInvoker(app)
+        for _, output_id, values, triggered in build_scenarios(df):
+            invoker.invoke(output_id, values, triggered)
+
+    report = build_memory_report(app.server.extensions["memory_report"])
+    print(format_memory_report(report, columns=not args.no_columns))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""Transferred bytes and render timings of a cold page load, measured in headless Chromium:
+
+    python -m benchmarks.page_load --output page_load.json
+    python -m benchmarks.page_load --url http://127.0.0.1:8050 --runs 5
+
+Reports the bytes transferred before the first graph is drawn, by resource type and for the
+largest resources, the callback requests sent on page load, the first contentful paint, largest
+contentful paint and first graph render times, and the bytes the lazily loaded images add once the page is scrolled to the bottom.
+Starts a local gunicorn server on the fixture unless ``--url`` is given. Requires Playwright and
+its Chromium build (``pip install playwright && playwright install chromium``).
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from collections import defaultdict
+import numpy as np
+from benchmarks.loadtest import start_server
+
+
+largest_contentful_paint = """() => new Promise(resolve => {
+    new PerformanceObserver(list => {
+        const entries = list.getEntries();
+        resolve(entries[entries.length - 1].startTime);
+    }).observe({type: "largest-contentful-paint", buffered: true});
+    setTimeout(() => resolve(null), 1000);
+})"""
+
+
+def load_page(browser, url):
+    context = browser.new_context(viewport={"width": 1440, "height": 900})
+    page = context.new_page()
+    transfers = []
+    phase = {"name": "initial"}
+
+    def on_request_finished(request):
+        sizes = request.sizes()
+        transfers.append((phase["name"], request.resource_type, request.url,
+                          sizes["responseBodySize"] + sizes["responseHeadersSize"]))
+
+    page.on("requestfinished", on_request_finished)
+    page.goto(url)
+    page.wait_for_selector(".js-plotly-plot .main-svg", timeout=60000)
+    first_graph = page.evaluate("performance.now()")
+    first_contentful_paint = page.evaluate(
+        "performance.getEntriesByName('first-contentful-paint')[0]?.startTime ?? null")
+    largest_paint = page.evaluate(largest_contentful_paint)
+    page.wait_for_load_state("networkidle")
+
+    phase["name"] = "after_scroll"
+    height = page.evaluate("document.body.scrollHeight")
+    for _ in range(0, height, 600):
+        page.mouse.wheel(0, 600)
+        page.wait_for_timeout(50)
+    page.wait_for_load_state("networkidle")
+    context.close()
+    return {
+        "first_contentful_paint_ms": first_contentful_paint,
+        "largest_contentful_paint_ms": largest_paint,
+        "first_graph_ms": first_graph,
+    }, transfers
+
+
+def summarize_transfers(transfers):
+    by_type = defaultdict(int)
+    by_url = defaultdict(int)
+    totals = defaultdict(int)
+    callback_requests = 0
+    for phase, resource_type, url, size in transfers:
+        totals[phase] += size
+        callback_requests += phase == "initial" and "/_dash-update-component" in url
+        if phase == "initial":
+            by_type[resource_type] += size
+            by_url[url.split("?")[0]] += size
+    return {
+        "initial_bytes": totals["initial"],
+        "after_scroll_bytes": totals["after_scroll"],
+        "initial_callback_requests": callback_requests,
+        "initial_by_type": dict(sorted(by_type.items(), key=lambda item: -item[1])),
+        "largest_initial": sorted(by_url.items(), key=lambda item: -item[1])[:10],
+    }
+
+
+def measure_page_load(url, runs=3):
+    from playwright.sync_api import sync_playwright
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch()
+        timings, transfers = [], None
+        for _ in range(runs):
+            timing, transfers = load_page(browser, url)
+            timings.append(timing)
+        browser.close()
+    results = {name: float(np.median([timing[name] for timing in timings if timing[name] is not None]))
+               for name in timings[0] if any(timing[name] is not None for timing in timings)}
+    results.update(summarize_transfers(transfers))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="measure this running server instead of starting one")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--runs", type=int, default=3, help="cold page loads, timings are their median")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    process = None if args.url else start_server("1x4", args.port)
+    try:
+        results = measure_page_load(args.url or f"http://127.0.0.1:{args.port}/", args.runs)
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    print(f"Initial load: {results['initial_bytes'] / 1024:.0f} kB transferred, "
+          f"first contentful paint {results.get('first_contentful_paint_ms', float('nan')):.0f} ms, "
+          f"largest contentful paint {results.get('largest_contentful_paint_ms', float('nan')):.0f} ms, "
+          f"first graph {results['first_graph_ms']:.0f} ms, {results['initial_callback_requests']} callback requests")
+    for resource_type, size in results["initial_by_type"].items():
+        print(f"  {resource_type:<12} {size / 1024:9.0f} kB")
+    print("Largest resources:")
+    for url, size in results["largest_initial"]:
+        print(f"  {url[:90]:<90} {size / 1024:9.0f} kB")
+    print(f"Scrolling to the bottom loads another {results['after_scroll_bytes'] / 1024:.0f} kB")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({
+                "meta": {
+                    "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "python": sys.version.split()[0],
+                    "platform": platform.platform(),
+                    "url": args.url,
+                    "runs": args.runs,
+                },
+                "results": results,
+            }, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
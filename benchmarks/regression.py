@@ -0,0 +1,201 @@
+"""Benchmark regression gate.
+
+Runs the callback, ``QueryData`` pipeline and start-up benchmarks on the local fixture and compares
+them with the committed baseline, exiting with status 1 when latency, peak memory or payload size
+regresses:
+
+    python -m benchmarks.regression
+    python -m benchmarks.regression -k overview --repeat 9
+    python -m benchmarks.regression --update-baseline
+
+Latencies are compared on the fastest timed call, which is far less sensitive to background load
+than the median. A result only counts as a regression when it exceeds the baseline by more than
+all of a relative tolerance, an absolute floor and, for latencies, three baseline standard
+deviations, and when it still does after re-running the regressed benchmarks (twice by default).
+Baseline latencies are rescaled by a CPU calibration workload, so that a baseline recorded on one
+machine can be checked on another.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+import pandas as pd
+from benchmarks.callbacks import run_benchmarks
+
+
+baseline_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+thresholds = {
+    "latency_ms": {"relative": 0.25, "absolute": 2.0, "stdevs": 3},
+    "peak_memory_kb": {"relative": 0.10, "absolute": 256, "stdevs": 0},
+    "payload_bytes": {"relative": 0.01, "absolute": 64, "stdevs": 0},
+}
+
+
+def calibrate(repeat=7):
+    """Median time (ms) of a fixed pandas workload, used to compare latencies across machines."""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"key": rng.choice([f"k{i}" for i in range(200)], 200000), "value": rng.random(200000)})
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df.groupby("key")["value"].agg(["sum", "mean", "count"]).to_json()
+        df[df["value"] > 0.5].drop_duplicates(subset="key")
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples) * 1000)
+
+
+def compact(results):
+    """The fields of ``benchmarks.callbacks`` results that the gate compares."""
+    return {name: {
+        "latency_ms": metrics["latency_ms"]["min"],
+        "latency_stdev_ms": metrics["latency_ms"]["stdev"],
+        "peak_memory_kb": metrics["peak_memory_kb"],
+        "payload_bytes": metrics["payload_bytes"],
+    } for name, metrics in results.items()}
+
+
+def run_startup(repeat=3):
+    """Start-up time, total and per phase, over ``repeat`` fresh interpreters."""
+    reports = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-m", "benchmarks.startup"], capture_output=True, text=True,
+                                check=True).stdout
+        reports.append(json.loads(output.strip().splitlines()[-1]))
+
+    def entry(seconds, rss_mb):
+        return {
+            "latency_ms": float(np.min(seconds) * 1000),
+            "latency_stdev_ms": float(np.std(seconds) * 1000),
+            "peak_memory_kb": float(np.median(rss_mb) * 1024),
+            "payload_bytes": 0,
+        }
+
+    results = {"startup/total": entry([report["total_seconds"] for report in reports],
+                                      [report["peak_rss_mb"] for report in reports])}
+    for index, phase in enumerate(reports[0]["phases"]):
+        results[f"startup/{phase['name']}"] = entry([report["phases"][index]["seconds"] for report in reports],
+                                                    [report["phases"][index]["rss_delta_mb"] for report in reports])
+    return results
+
+
+def is_regression(metric, base, new, stdev=0.0):
+    threshold = thresholds[metric]
+    allowed = max(threshold["relative"] * abs(base), threshold["absolute"], threshold["stdevs"] * stdev)
+    return new - base > allowed, base - new > allowed
+
+
+def compare(baseline, current):
+    """``(regressions, improvements, missing)`` of ``current`` against ``baseline``."""
+    scale = current["meta"]["calibration_ms"] / baseline["meta"]["calibration_ms"]
+    regressions, improvements = [], []
+    for name, base in baseline["results"].items():
+        new = current["results"].get(name)
+        if new is None:
+            continue
+        for metric in thresholds:
+            base_value = base[metric] * scale if metric == "latency_ms" else base[metric]
+            stdev = base["latency_stdev_ms"] * scale if metric == "latency_ms" else 0.0
+            regressed, improved = is_regression(metric, base_value, new[metric], stdev)
+            row = (name, metric, base_value, new[metric])
+            if regressed:
+                regressions.append(row)
+            elif improved:
+                improvements.append(row)
+    missing = sorted(set(baseline["results"]) - set(current["results"]))
+    return regressions, improvements, missing
+
+
+def confirm(baseline, current, regressions, repeat=7, startup_repeat=3, attempts=2):
+    """Re-runs the regressed benchmarks and keeps the best value of each metric, so that only
+    regressions reproduced on every attempt fail the gate."""
+    for _ in range(attempts):
+        names = {name for name, _, _, _ in regressions}
+        if not names:
+            break
+        callback_names = {name.split("/", 1)[1] for name in names if name.startswith("1x/")}
+        rerun = {}
+        if callback_names:
+            rerun.update(compact(run_benchmarks(scales=(1,), repeat=repeat, pattern=lambda name: name in callback_names,
+                                                log=lambda message: None)))
+        if any(name.startswith("startup/") for name in names):
+            rerun.update(run_startup(startup_repeat))
+        for name in names & set(rerun):
+            current["results"][name] = {metric: min(value, rerun[name][metric]) if metric in thresholds else value
+                                        for metric, value in current["results"][name].items()}
+        regressions = compare(baseline, current)[0]
+    return compare(baseline, current)
+
+
+def format_rows(rows):
+    lines = []
+    for name, metric, base, new in sorted(rows, key=lambda row: (row[0], row[1])):
+        change = (new - base) / base if base else float("inf")
+        lines.append(f"  {name[:80]:<80} {metric:<15} {base:12.2f} -> {new:12.2f}  ({change:+.1%})")
+    return "\n".join(lines)
+
+
+def run(pattern=None, repeat=7, startup_repeat=3):
+    results = compact(run_benchmarks(scales=(1,), repeat=repeat, pattern=pattern, log=lambda message: None))
+    if not pattern or "startup" in pattern:
+        results.update(run_startup(startup_repeat))
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "calibration_ms": calibrate(),
+        },
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", default=baseline_path, help="baseline JSON to compare with or update")
+    parser.add_argument("--update-baseline", action="store_true", help="record the results as the new baseline")
+    parser.add_argument("-k", "--pattern", help="only run benchmarks whose name contains this string")
+    parser.add_argument("--repeat", type=int, default=7, help="timed calls per callback scenario")
+    parser.add_argument("--startup-repeat", type=int, default=3, help="fresh interpreters for the start-up time")
+    parser.add_argument("--attempts", type=int, default=2, help="re-runs a regression must survive to fail the gate")
+    parser.add_argument("--output", help="also write the current results to this JSON file")
+    args = parser.parse_args(argv)
+
+    current = run(args.pattern, args.repeat, args.startup_repeat)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(current, file, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(current, file, indent=1, sort_keys=True)
+        print(f"Recorded {len(current['results'])} benchmarks to {args.baseline}")
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    if args.pattern:
+        baseline["results"] = {name: metrics for name, metrics in baseline["results"].items() if args.pattern in name}
+    regressions, improvements, missing = compare(baseline, current)
+    regressions, improvements, missing = confirm(baseline, current, regressions, args.repeat, args.startup_repeat,
+                                                 args.attempts)
+
+    print(f"Compared {len(current['results'])} benchmarks with {args.baseline} "
+          f"(calibration {baseline['meta']['calibration_ms']:.1f} ms -> {current['meta']['calibration_ms']:.1f} ms)")
+    if improvements:
+        print(f"{len(improvements)} improvements:\n{format_rows(improvements)}")
+    if missing:
+        print(f"{len(missing)} baseline benchmarks were not run:\n" + "\n".join(f"  {name}" for name in missing))
+    if regressions:
+        print(f"{len(regressions)} regressions:\n{format_rows(regressions)}")
+        return 1
+    print("No regressions")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Replays recorded production sessions through the callback functions of the current build:
+
+    python -m benchmarks.replay recordings/sessions-*.jsonl --output replay.json
+    python -m benchmarks.replay recordings/sessions-*.jsonl --compare replay.json
+    python -m benchmarks.replay recordings/sessions-*.jsonl --source snapshots/synthetic-100k --sessions 20
+
+Recordings are written by the app when ``SESSION_RECORDING_DIRECTORY`` is set (see
+``server.session_recording``). Every request is called directly, without the HTTP layer, in the
+order the sessions sent them, and timed like the callback benchmarks. ``--compare`` reports the
+per-step timing differences with the results of an earlier replay, for instance on another build.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from collections import defaultdict
+from dash.exceptions import PreventUpdate
+from server.app import create_app
+from server.metrics import get_callback_name
+from benchmarks.harness import CallbackInvoker, measure
+from benchmarks.loadtest import read_session
+from benchmarks.synthetic_data import load_source
+
+
+def read_recordings(paths, max_sessions=None):
+    """Recorded requests grouped by session, each session in step order."""
+    sessions = defaultdict(list)
+    for path in paths:
+        for request in read_session(path):
+            sessions[request.get("session", path)].append(request)
+    sessions = {session: sorted(requests, key=lambda request: request.get("step", 0))
+                for session, requests in sorted(sessions.items())}
+    if max_sessions:
+        sessions = dict(list(sessions.items())[:max_sessions])
+    return sessions
+
+
+def replay_sessions(app, sessions, repeat=3, log=print):
+    invoker = CallbackInvoker(app)
+    results = {}
+    for session, requests in sessions.items():
+        for index, request in enumerate(requests):
+            name = f"{session}/{request.get('step', index)}:{get_callback_name(request['body']['output'])}"
+            if request["body"]["output"] not in invoker.callback_map:
+                log(f"  {name}: callback not registered in this build")
+                continue
+
+            def call():
+                try:
+                    return invoker.invoke_request(request["body"])
+                except PreventUpdate:
+                    return None
+
+            results[name] = measure(call, repeat, payload=False)
+        log(f"  {session}: {len(requests)} requests")
+    return results
+
+
+def compare(baseline, current):
+    """``(name, baseline ms, current ms)`` of the steps replayed in both, fastest timed call each."""
+    return [(name, baseline[name]["latency_ms"]["min"], metrics["latency_ms"]["min"])
+            for name, metrics in current.items() if name in baseline]
+
+
+def format_comparison(rows, top=20):
+    total_base = sum(base for _, base, _ in rows)
+    total_new = sum(new for _, _, new in rows)
+    lines = [f"{len(rows)} steps: {total_base:.1f} ms -> {total_new:.1f} ms "
+             f"({(total_new - total_base) / total_base if total_base else 0:+.1%})"]
+    by_callback = defaultdict(lambda: [0.0, 0.0])
+    for name, base, new in rows:
+        by_callback[name.split(":", 1)[1]][0] += base
+        by_callback[name.split(":", 1)[1]][1] += new
+    lines.append("By callback:")
+    for callback, (base, new) in sorted(by_callback.items(), key=lambda item: item[1][0] - item[1][1]):
+        lines.append(f"  {callback[:80]:<80} {base:10.1f} -> {new:10.1f} ms")
+    lines.append("Largest step differences:")
+    for name, base, new in sorted(rows, key=lambda row: -abs(row[2] - row[1]))[:top]:
+        lines.append(f"  {name[:100]:<100} {base:8.2f} -> {new:8.2f} ms  ({new - base:+.2f} ms)")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recordings", nargs="+", help="session recordings (JSON lines)")
+    parser.add_argument("--source", default="fixture",
+                        help="'fixture', 'database' (uses DATABASE_URL) or a snapshot directory")
+    parser.add_argument("--sessions", type=int, help="only replay this many sessions")
+    parser.add_argument("--repeat", type=int, default=3, help="timed calls per step")
+    parser.add_argument("--compare", help="results of an earlier replay to report the timing differences with")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    df, subtype_df = load_source(args.source)
+    app = create_app(df, subtype_df, df["id"].nunique())
+    sessions = read_recordings(args.recordings, args.sessions)
+    print(f"Replaying {len(sessions)} sessions, {sum(len(requests) for requests in sessions.values())} requests")
+    results = replay_sessions(app, sessions, args.repeat)
+    print(f"Total {sum(metrics['latency_ms']['min'] for metrics in results.values()):.1f} ms over {len(results)} steps")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+        print(format_comparison(compare(baseline, results)))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({
+                "meta": {
+                    "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "python": sys.version.split()[0],
+                    "platform": platform.platform(),
+                    "source": args.source,
+                    "recordings": args.recordings,
+                    "repeat": args.repeat,
+                },
+                "results": results,
+            }, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
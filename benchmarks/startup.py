@@ -0,0 +1,51 @@
+"""Start-up phases of the app on the local fixture, timed like ``main.py`` does in production:
+
+    python -m benchmarks.startup --output startup_profile.json
+
+Run it in a fresh interpreter, since import times are part of the measurement.
+"""
+import argparse
+import json
+from server.startup_profiler import StartupProfiler
+
+
+def profile_startup(scale=1):
+    profiler = StartupProfiler()
+    with profiler.phase("import_libraries"):
+        import pandas
+        import dash
+    with profiler.phase("import_app"):
+        from server.app import create_app
+        from server.query_data import QueryData
+    from benchmarks.fixtures import load_subtype_data, generate_raw_data
+
+    # Stands in for the database queries
+    with profiler.phase("load_fixture"):
+        subtype_df = load_subtype_data(scale)
+        raw_df = generate_raw_data(subtype_df)
+    db_query = QueryData.__new__(QueryData)
+    df = profiler.run("preclean_data", db_query.preclean_data, raw_df)
+    df = profiler.run("clean_initiators", db_query.clean_initiators, df)
+    nb_incidents = df["id"].nunique()
+    df = profiler.run("clean_initiator_names", db_query.clean_initiator_names, df)
+    df["alpha_2_code"] = df["alpha_2_code"].fillna("unknown")
+    profiler.run("create_app", create_app, df, subtype_df, nb_incidents)
+    return profiler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    profiler = profile_startup(args.scale)
+    if args.output:
+        profiler.finish(args.output)
+        print(profiler.summary())
+    else:
+        print(json.dumps(profiler.report()))
+
+
+if __name__ == '__main__':
+    main()
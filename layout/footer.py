@@ -2,6 +2,7 @@ from dash import html
 import dash_mantine_components as dmc
 from dash_iconify import DashIconify
 import dash_bootstrap_components as dbc
+from server.static_assets import asset_url
 
 
 footer = dbc.Row([
@@ -9,7 +10,7 @@ footer = dbc.Row([
         dbc.Row([
             dbc.Col([
                 html.A(
-                    html.Img(src="./assets/EuRepoC_white_logo.svg", height="70px"),
+                    html.Img(**{"data-src": asset_url("optimized/EuRepoC_white_logo.svg")}, height="70px", alt="EuRepoC"),
                     href="https://eurepoc.eu/", target="_blank"
                 ),
                 html.Br(),
@@ -51,7 +52,7 @@ footer = dbc.Row([
     dbc.Col([
         dbc.Row([
             dbc.Col([
-                html.Img(src="./assets/logo_grid.svg", height="150px")
+                html.Img(**{"data-src": asset_url("optimized/logo_grid.svg")}, height="150px", alt="")
             ], md=6, style={'text-align': 'center'}),
             dbc.Col([
                 dbc.Row([
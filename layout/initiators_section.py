@@ -4,6 +4,7 @@ import dash_mantine_components as dmc
 from dash_iconify import DashIconify
 from server.utils import graph_config, generate_year_slider
 from datetime import datetime, date
+from layout.intro_section import default_country
 
 
 button_group = dbc.ButtonGroup(
@@ -180,4 +181,5 @@ initiators_section = dbc.Row([
             ], style={"padding-top": "20px"})
         ], xl=6, style={"padding-top": "20px"})
     ], style={"padding-bottom": "20px"}),
-], className="background-container background-container-initiators page-padding")
+    dcc.Store(id="initiators-section-country", data=default_country),
+], id="initiators-section-content", className="background-container background-container-initiators page-padding lazy-background lazy-section")
@@ -1,8 +1,14 @@
+import os
+import json
 from dash import html, dcc
-import pickle
 
 
-receiver_countries_dd_options = pickle.load(open("./data/receiver_countries_dd.pickle", "rb"))
+country_options_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data",
+                                    "receiver_countries_dd.json")
+default_country = "Global (states)"
+
+with open(country_options_path, encoding="utf-8") as file:
+    receiver_countries_dd_options = json.load(file)
 
 
 intro_section = html.Div([
@@ -44,7 +50,7 @@ intro_section = html.Div([
                 dcc.Dropdown(
                     id='selected-country',
                     options=receiver_countries_dd_options,
-                    value="Global (states)",
+                    value=default_country,
                     clearable=False
                 ),
             ], style={'margin': 'auto', 'width': '50%'})
@@ -5,7 +5,7 @@ from layout.overview_section import overview_section
 from layout.types_section import types_section
 from layout.initiators_section import initiators_section
 from layout.footer import footer
-from dash import html
+from dash import html, dcc
 import dash_mantine_components as dmc
 from dash_iconify import DashIconify
 
@@ -19,10 +19,10 @@ def serve_layout():
         ], class_name="transition-container transition-container-intro"),
         html.Div(id="overview-section"),
         overview_section,
-        dbc.Row(className="transition-container transition-container-types"),
+        dbc.Row(className="transition-container transition-container-types lazy-background"),
         html.Div(id="types-section"),
         types_section,
-        dbc.Row(className="transition-container transition-container-initiators"),
+        dbc.Row(className="transition-container transition-container-initiators lazy-background"),
         html.Div(id="initiators-section"),
         initiators_section,
         html.A(
@@ -36,6 +36,7 @@ def serve_layout():
             ),
             href="#intro-section"
         ),
-        footer
+        footer,
+        dcc.Store(id="section-visibility", data={}),
     ], fluid=True)
     return full_layout
@@ -1,5 +1,6 @@
 import dash_bootstrap_components as dbc
 from dash import html
+from server.static_assets import asset_url
 
 
 navbar = dbc.NavbarSimple(
@@ -20,7 +21,7 @@ navbar = dbc.NavbarSimple(
             style={"color": "black", "font-weight": "650", "text-decoration": "none", "font-size": "1.3em"}
         )),
     ],
-    brand=html.Img(src="./assets/EuRepoC_logo.svg", height="60px"),
+    brand=html.Img(src=asset_url("optimized/EuRepoC_logo.svg"), height="60px"),
     brand_href="https://eurepoc.eu",
     color="rgba(0, 0, 0, 0);",
     links_left=True,
@@ -57,6 +57,7 @@ overview_section = dbc.Row([
         dbc.Col([
             html.H5(id="overview-section-evolution-graph-title", style={"text-align": "center", 'margin-bottom': '2.8rem'}),
             dcc.Store(id="overview-section-bar-label-store", data=[]),
+            dcc.Store(id="overview-section-evolution-range"),
             dcc.Graph(
                 id="overview-section-evolution-graph",
                 config=graph_config("EuRepoC_targeted_critical_infrastructure_sectors_timeline"),
@@ -110,4 +111,4 @@ overview_section = dbc.Row([
             )
         ], style={"height": "510px"})
     ], style={"padding-bottom": "20px"}),
-], className="background-container background-container-overview page-padding")
+], className="background-container background-container-overview page-padding lazy-background")
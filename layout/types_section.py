@@ -3,26 +3,28 @@ from dash import html, dcc
 import dash_mantine_components as dmc
 from dash_iconify import DashIconify
 from server.utils import graph_config, generate_year_slider
+from server.static_assets import asset_url
+from layout.intro_section import default_country
 
 
 initial_access_techniques = [
     {
         "id": "drive_by_compromise",
-        "image": "/assets/mitre/drive_by_compromise.svg",
+        "image": asset_url("optimized/mitre/drive_by_compromise.svg"),
         "label": "Drive-By Compromise",
         "description": "Attackers infiltrate a user's system by exploiting vulnerabilities \
         or stealing credentials through compromised websites visited during regular browsing.",
     },
     {
         "id": "public_facing_application",
-        "image": "/assets/mitre/public_facing_application.svg",
+        "image": asset_url("optimized/mitre/public_facing_application.svg"),
         "label": "Exploit Public Facing Application",
         "description": "Attackers exploit vulnerabilities in internet-exposed systems or software to gain \
         unauthorized access to a network. The weakness in the system can be a software bug, a temporary glitch, or a misconfiguration.",
     },
     {
         "id": "external_remote_services",
-        "image": "/assets/mitre/external_remote_services.svg",
+        "image": asset_url("optimized/mitre/external_remote_services.svg"),
         "label": "External Remote Services",
         "description": "Attackers use external network services \
         (e.g. VPNs, Secure Shell (SSH), email and cloud services) to gain unauthorized access or maintain persistence within a target's network.",
@@ -30,41 +32,41 @@ initial_access_techniques = [
     },
     {
         "id": "hardware_additions",
-        "image": "/assets/mitre/hardware_additions.svg",
+        "image": asset_url("optimized/mitre/hardware_additions.svg"),
         "label": "Hardware Additions",
         "description": "Attackers introduce unauthorized devices, like computer accessories or network hardware, \
         into a system to create new attack vectors or functionalities for exploitation.",
     },
     {
         "id": "phishing",
-        "image": "/assets/mitre/phishing.svg",
+        "image": asset_url("optimized/mitre/phishing.svg"),
         "label": "Phishing",
         "description": "Attackers send deceptive electronic messages to manipulate individuals into providing \
         sensitive information or accessing malicious content, ranging from broadly targeted mass campaigns to highly tailored spearphishing against specific targets.",
     },
     {
         "id": "removable_media",
-        "image": "/assets/mitre/removable_media.svg",
+        "image": asset_url("optimized/mitre/removable_media.svg"),
         "label": "Replication Through Removable Media",
         "description": "Attackers use portable storage devices like USB drives to transfer malware onto systems, \
         exploiting features like Autorun or deceiving users into manually executing the malware, which can compromise isolated or air-gapped networks",
     },
     {
         "id": "supply_chain_compromise",
-        "image": "/assets/mitre/supply_chain_compromise.svg",
+        "image": asset_url("optimized/mitre/supply_chain_compromise.svg"),
         "label": "Supply Chain Compromise",
         "description": "Attackers tamper with products or their delivery processes before they reach the final consumer, aiming to breach data or systems",
     },
     {
         "id": "trusted_relationship",
-        "image": "/assets/mitre/trusted_relationship.svg",
+        "image": asset_url("optimized/mitre/trusted_relationship.svg"),
         "label": "Trusted Relationship",
         "description": "Attackers compromise or use organisations with existing access to target victims, \
         taking advantage of the trust and potentially lower security scrutiny in these third-party connections.",
     },
     {
         "id": "valid_accounts",
-        "image": "/assets/mitre/valid_accounts.svg",
+        "image": asset_url("optimized/mitre/valid_accounts.svg"),
         "label": "Valid Accounts",
         "description": "Attackers obtain and use legitimate user credentials to bypass security measures, \
         gain access to network resources, and potentially increase privileges, often avoiding detection by blending in with normal user activities.",
@@ -300,4 +302,5 @@ types_section = dbc.Row([
             mitre_accordion
         ], xl=6, style={"padding-left": "20px"})
     ], style={"padding-bottom": "20px"}),
-], className="background-container background-container-types page-padding")
+    dcc.Store(id="types-section-country", data=default_country),
+], id="types-section-content", className="background-container background-container-types page-padding lazy-background lazy-section")
@@ -1,92 +1,84 @@
-import dash
-from dash.dependencies import Output, Input
-import dash_bootstrap_components as dbc
-from layout.layout import serve_layout
-from server.titles import update_titles
-from server.overview_section import OverviewIntensity
-from server.types_section import Types
-from server.initiators_section import Initiators
-from server.query_data import QueryData
+import importlib
+import logging
 import os
+from server.startup_profiler import StartupProfiler
 
+logging.basicConfig(level=logging.INFO)
+import_profiler = StartupProfiler()
 
-DATABASE_URL = os.environ.get('DATABASE_URL')
+with import_profiler.phase("import_libraries"):
+    # Imported here only to time them apart from the app, which imports them again
+    importlib.import_module("pandas")
+    importlib.import_module("dash")
+with import_profiler.phase("import_app"):
+    from server.app import create_app
+    from server.query_data import QueryData
 
-db_query = QueryData(DATABASE_URL)
-df = db_query.query_database()
-subtype_df = db_query.get_subtype_data()
-subtype_df = subtype_df.drop_duplicates()
-df = db_query.preclean_data(df)
-df = db_query.clean_initiators(df)
-nb_incidents = df["id"].nunique()
-df = db_query.clean_initiator_names(df)
-db_query.dispose()
-df["alpha_2_code"] = df["alpha_2_code"].fillna("unknown")
 
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
+DATABASE_URL = os.environ.get('DATABASE_URL')
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() != 'false'
+STARTUP_PROFILE = os.environ.get('STARTUP_PROFILE')
+SLOW_CALLBACK_THRESHOLD_MS = os.environ.get('SLOW_CALLBACK_THRESHOLD_MS')
+SLOW_CALLBACK_PROFILES = os.environ.get('SLOW_CALLBACK_PROFILES', '/tmp/slow_callback_profiles')
+SLOW_CALLBACK_PROFILE_MODE = os.environ.get('SLOW_CALLBACK_PROFILE_MODE', 'sample')
+SLOW_CALLBACK_SAMPLE_RATE = float(os.environ.get('SLOW_CALLBACK_SAMPLE_RATE', 1.0))
+TRACE_DIRECTORY = os.environ.get('TRACE_DIRECTORY')
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', 1.0))
+SESSION_RECORDING_DIRECTORY = os.environ.get('SESSION_RECORDING_DIRECTORY')
+SESSION_RECORDING_SAMPLE_RATE = float(os.environ.get('SESSION_RECORDING_SAMPLE_RATE', 0.05))
+COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() != 'false'
+COMPRESSION_MINIMUM_SIZE = int(os.environ.get('COMPRESSION_MINIMUM_SIZE', 500))
+CALLBACK_CACHE_MAX_AGE = os.environ.get('CALLBACK_CACHE_MAX_AGE', '300')
+WARM_UP = os.environ.get('WARM_UP', 'true').lower() != 'false'
+INITIAL_STATE = os.environ.get('INITIAL_STATE', 'true').lower() != 'false'
+LAZY_SECTIONS = os.environ.get('LAZY_SECTIONS', 'true').lower() != 'false'
+SINGLE_FLIGHT_TIMEOUT = float(os.environ.get('SINGLE_FLIGHT_TIMEOUT', 30))
 
-app.layout = serve_layout()
 
+def create_dash_app():
+    """Queries the database and builds the app, timing each phase, after the imports of this
+    module, in a new profiler."""
+    profiler = StartupProfiler(import_profiler.phases)
+    db_query = profiler.run("reflect_database", QueryData, DATABASE_URL)
+    df = profiler.run("query_database", db_query.query_database)
+    subtype_df = profiler.run("get_subtype_data", db_query.get_subtype_data)
+    subtype_df = profiler.run("drop_subtype_duplicates", subtype_df.drop_duplicates)
+    df = profiler.run("preclean_data", db_query.preclean_data, df)
+    df = profiler.run("clean_initiators", db_query.clean_initiators, df)
+    nb_incidents = df["id"].nunique()
+    df = profiler.run("clean_initiator_names", db_query.clean_initiator_names, df)
+    db_query.dispose()
+    df["alpha_2_code"] = df["alpha_2_code"].fillna("unknown")
 
-@app.callback(
-    Output("total-incidents", "children"),
-    Input("selected-country", "value"),
-)
-def update_total_incidents(selected_country):
-    return [f"{nb_incidents} cyberattacks against critical infrastructure"]
+    app = profiler.run(
+        "create_app", create_app, df, subtype_df, nb_incidents,
+        metrics=METRICS_ENABLED,
+        slow_callback_threshold_ms=float(SLOW_CALLBACK_THRESHOLD_MS) if SLOW_CALLBACK_THRESHOLD_MS else None,
+        profiles_directory=SLOW_CALLBACK_PROFILES,
+        profile_mode=SLOW_CALLBACK_PROFILE_MODE,
+        profile_sample_rate=SLOW_CALLBACK_SAMPLE_RATE,
+        trace_directory=TRACE_DIRECTORY,
+        trace_sample_rate=TRACE_SAMPLE_RATE,
+        recording_directory=SESSION_RECORDING_DIRECTORY,
+        recording_sample_rate=SESSION_RECORDING_SAMPLE_RATE,
+        compression=COMPRESSION_ENABLED,
+        compression_minimum_size=COMPRESSION_MINIMUM_SIZE,
+        callback_cache_max_age=int(CALLBACK_CACHE_MAX_AGE) if CALLBACK_CACHE_MAX_AGE else None,
+        warm_up_callbacks=WARM_UP,
+        initial_state=INITIAL_STATE,
+        lazy_sections=LAZY_SECTIONS,
+        single_flight_timeout=SINGLE_FLIGHT_TIMEOUT,
+    )
+    profiler.finish(STARTUP_PROFILE)
+    return app
 
 
-update_titles(app)
-overview_section_callbacks = OverviewIntensity(
-    app=app,
-    df=df,
-    subtype_df=subtype_df,
-    aggregate_graph_id="overview-section-aggregate-graph",
-    bar_index_store_id='overview-section-bar-index-store',
-    evolution_graph_id="overview-section-evolution-graph",
-    bar_label_store_id="overview-section-bar-label-store",
-    sunburst_chart_id="overview-section-sunburst-chart",
-    reset_button="overview-section-reset-graphs",
-)
-types_section_callbacks = Types(
-    app=app,
-    df=df,
-    aggregate_graph_id="types-section-aggregate-graph",
-    aggregate_graph_title_year_id="types-section-aggregate-title-year",
-    aggregate_graph_subtitle_id="types-section-aggregate-subtitle",
-    impact_graph_id="types-section-impact-graph",
-    impact_graph_title_year_id="types-section-impact-title-year",
-    impact_graph_subtitle_id="types-section-impact-subtitle",
-    intelligence_impact_graph_id="types-section-intelligence-impact-graph",
-    intelligence_impact_graph_subtitle_id="types-section-intell-subtitle",
-    functional_impact_graph_id="types-section-functional-impact-graph",
-    functional_impact_graph_subtitle_id="types-section-functional-subtitle",
-    techniques_dropdown_sectors_id="types-section-techniques-sectors-dropdown",
-    techniques_dropdown_types_id="types-section-techniques-types-dropdown",
-    techniques_graph_id="types-section-techniques-bar-chart",
-    year_slider_id="types-section-year-slider",
-    reset_button="types-section-reset-graphs",
-    last_selected_stack="types-section-last-selected"
-)
-initiators_callbacks = Initiators(
-    app=app,
-    df=df,
-    aggregate_graph_id="initiators-section-aggregate-graph",
-    aggregate_graph_title_id="initiators-section-aggregate-sector-year",
-    total_cyberattacks_id="initiators-section-total-cyberattacks",
-    year_slider_id="initiators-section-year-slider",
-    table_id="initiators-section-table",
-    table_title_id="initiators-section-table-title-sector-year",
-    conflicts_main_graph_id="initiators-section-conflicts-main-graph",
-    conflicts_sectors_graph_id="initiators-section-conflicts-sectors-graph",
-    conflicts_initiators_graph_id="initiators-section-conflicts-initiators-graph",
-    conflicts_store_id="initiators-section-conflicts-initiators-store",
-    date_range_picker_id="initiators-section-date-range-picker",
-    reset_button="initiators-section-reset-graphs"
-)
+def create_server():
+    """WSGI server of the app, for ``gunicorn 'main:create_server()'``: importing this module
+    neither queries the database nor builds the app."""
+    return create_dash_app().server
 
-server = app.server
-app.title = "EuRepoC Critical Infrastructure Tracker"
 
+# Development server only, production runs gunicorn with gunicorn.conf.py
 if __name__ == '__main__':
-    app.run_server(host="0.0.0.0")
+    create_dash_app().run(host="0.0.0.0")
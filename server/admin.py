@@ -0,0 +1,20 @@
+import hmac
+import os
+from functools import wraps
+from flask import abort, request
+
+
+def admin_required(view):
+    """Restricts a Flask view to requests carrying the ``ADMIN_TOKEN`` environment variable as a
+    bearer token (or ``?token=``). Admin routes answer 404 when no token is configured."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = os.environ.get("ADMIN_TOKEN")
+        if not token:
+            abort(404)
+        header = request.headers.get("Authorization", "")
+        supplied = header[len("Bearer "):] if header.startswith("Bearer ") else request.args.get("token", "")
+        if not hmac.compare_digest(supplied.encode(), token.encode()):
+            abort(403)
+        return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,139 @@
+import os
+import dash
+from dash.dependencies import Output, Input
+from layout.layout import serve_layout
+from server.titles import update_titles
+from server.overview_section import OverviewIntensity
+from server.types_section import Types
+from server.initiators_section import Initiators
+from server.metrics import CallbackMetrics, track_callbacks, instrument_app
+from server.slow_callbacks import profile_slow_callbacks
+from server.memory_report import register_memory_report
+from server.tracing import trace_callbacks
+from server.session_recording import record_sessions
+from server.static_assets import get_assets_options, register_cache_headers
+from server.compression import compress_responses
+from server.http_caching import get_data_version, cache_callback_responses
+from server.health import Readiness, register_health_checks
+from server.warmup import warm_up
+from server.initial_state import embed_initial_state, serve_serialized_layout
+from server.lazy_sections import defer_sections
+from server.single_flight import coalesce_callbacks
+
+
+assets_folder = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+
+
+def create_app(df, subtype_df, nb_incidents, metrics=False, slow_callback_threshold_ms=None,
+               profiles_directory="profiles", profile_mode="sample", profile_sample_rate=1.0, trace_directory=None, trace_sample_rate=1.0,
+               recording_directory=None, recording_sample_rate=0.05, compression=True, compression_minimum_size=500,
+               callback_cache_max_age=300, warm_up_callbacks=False, initial_state=False, lazy_sections=True,
+               single_flight_timeout=30):
+    app = dash.Dash(__name__, assets_folder=assets_folder, **get_assets_options())
+    register_cache_headers(app.server)
+    track_callbacks(app)
+
+    app.layout = serve_layout()
+
+    @app.callback(
+        Output("total-incidents", "children"),
+        Input("selected-country", "value"),
+    )
+    def update_total_incidents(selected_country):
+        return [f"{nb_incidents} cyberattacks against critical infrastructure"]
+
+    update_titles(app)
+    overview = OverviewIntensity(
+        app=app,
+        df=df,
+        subtype_df=subtype_df,
+        aggregate_graph_id="overview-section-aggregate-graph",
+        bar_index_store_id='overview-section-bar-index-store',
+        evolution_graph_id="overview-section-evolution-graph",
+        bar_label_store_id="overview-section-bar-label-store",
+        sunburst_chart_id="overview-section-sunburst-chart",
+        reset_button="overview-section-reset-graphs",
+        visible_range_store_id="overview-section-evolution-range",
+    )
+    types = Types(
+        app=app,
+        df=df,
+        aggregate_graph_id="types-section-aggregate-graph",
+        aggregate_graph_title_year_id="types-section-aggregate-title-year",
+        aggregate_graph_subtitle_id="types-section-aggregate-subtitle",
+        impact_graph_id="types-section-impact-graph",
+        impact_graph_title_year_id="types-section-impact-title-year",
+        impact_graph_subtitle_id="types-section-impact-subtitle",
+        intelligence_impact_graph_id="types-section-intelligence-impact-graph",
+        intelligence_impact_graph_subtitle_id="types-section-intell-subtitle",
+        functional_impact_graph_id="types-section-functional-impact-graph",
+        functional_impact_graph_subtitle_id="types-section-functional-subtitle",
+        techniques_dropdown_sectors_id="types-section-techniques-sectors-dropdown",
+        techniques_dropdown_types_id="types-section-techniques-types-dropdown",
+        techniques_graph_id="types-section-techniques-bar-chart",
+        year_slider_id="types-section-year-slider",
+        reset_button="types-section-reset-graphs",
+        last_selected_stack="types-section-last-selected",
+        country_id="types-section-country" if lazy_sections else "selected-country",
+        country_property="data" if lazy_sections else "value"
+    )
+    initiators = Initiators(
+        app=app,
+        df=df,
+        aggregate_graph_id="initiators-section-aggregate-graph",
+        aggregate_graph_title_id="initiators-section-aggregate-sector-year",
+        total_cyberattacks_id="initiators-section-total-cyberattacks",
+        year_slider_id="initiators-section-year-slider",
+        table_id="initiators-section-table",
+        table_title_id="initiators-section-table-title-sector-year",
+        conflicts_main_graph_id="initiators-section-conflicts-main-graph",
+        conflicts_sectors_graph_id="initiators-section-conflicts-sectors-graph",
+        conflicts_initiators_graph_id="initiators-section-conflicts-initiators-graph",
+        conflicts_store_id="initiators-section-conflicts-initiators-store",
+        date_range_picker_id="initiators-section-date-range-picker",
+        reset_button="initiators-section-reset-graphs",
+        country_id="initiators-section-country" if lazy_sections else "selected-country",
+        country_property="data" if lazy_sections else "value"
+    )
+    if lazy_sections:
+        defer_sections(app, {
+            "types-section-content": "types-section-country",
+            "initiators-section-content": "initiators-section-country",
+        })
+
+    register_memory_report(app.server, {
+        "df": df, "subtype_df": subtype_df, "overview": overview, "types": types, "initiators": initiators
+    })
+    app.title = "EuRepoC Critical Infrastructure Tracker"
+
+    readiness = Readiness(["data"] + ["initial_state"] * initial_state + ["warm_up"] * warm_up_callbacks)
+    readiness.set("data", nb_incidents > 0, incidents=nb_incidents, rows=len(df))
+    register_health_checks(app.server, readiness)
+    # Also warms up the callbacks it embeds, which then no longer fire on page load
+    if initial_state:
+        calls, errors, elapsed = embed_initial_state(app)
+        readiness.set("initial_state", True, calls=calls, errors=errors, seconds=round(elapsed, 3))
+        serve_serialized_layout(app)
+    if warm_up_callbacks:
+        calls, errors, elapsed = warm_up(app)
+        readiness.set("warm_up", errors == 0, calls=calls, errors=errors, seconds=round(elapsed, 3))
+
+    data_version = get_data_version(df, subtype_df)
+    callback_metrics = CallbackMetrics() if metrics else None
+    # Inside the request wrappers below, so that requests waiting for a computation are still measured
+    if single_flight_timeout:
+        coalesce_callbacks(app, data_version, single_flight_timeout, metrics=callback_metrics)
+    if metrics:
+        instrument_app(app, callback_metrics)
+    if trace_directory:
+        trace_callbacks(app, trace_directory, trace_sample_rate)
+    if recording_directory:
+        record_sessions(app, recording_directory, recording_sample_rate)
+    if slow_callback_threshold_ms:
+        profile_slow_callbacks(app, profiles_directory, slow_callback_threshold_ms, mode=profile_mode,
+                               sample_rate=profile_sample_rate)
+    if callback_cache_max_age is not None:
+        cache_callback_responses(app, data_version, callback_cache_max_age)
+    if compression:
+        compress_responses(app.server, assets_folder, compression_minimum_size, metrics=callback_metrics)
+    return app
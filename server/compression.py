@@ -0,0 +1,137 @@
+"""gzip and brotli compression of the responses of the Flask server.
+
+Callback responses (``/_dash-update-component``), the layout, the index page and text assets are
+compressed when the client accepts it, their content type is in ``compressible_types`` and they
+are at least ``minimum_size`` bytes. Brotli is preferred when the ``brotli`` package is installed.
+Static files that ``build_assets.py bundle`` precompressed (``<file>.br``, ``<file>.gz``) are
+served from those files, and other static files, including the component bundles Dash serves under
+``/_dash-component-suites/``, are compressed once per version and kept in memory, so only dynamic
+responses cost CPU per request. With metrics enabled, the compressed size and the
+CPU time spent compressing each callback's responses are reported on ``/metrics``.
+"""
+import gzip
+import os
+import threading
+import time
+from flask import request
+from server.metrics import get_callback_name
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+compressible_types = {"application/json", "text/html", "text/css", "text/plain", "text/javascript",
+                      "application/javascript", "image/svg+xml"}
+precompressed_extensions = {"br": ".br", "gzip": ".gz"}
+# Component bundles are fingerprinted in their path, or have an ETag, like the assets
+static_prefixes = ("/assets/", "/_dash-component-suites/")
+
+
+def compress(data, encoding, level=None):
+    if encoding == "br":
+        return brotli.compress(data, quality=5 if level is None else level)
+    return gzip.compress(data, compresslevel=6 if level is None else level, mtime=0)
+
+
+def get_accepted_encodings(header):
+    """Encodings of an ``Accept-Encoding`` header that are not refused with ``q=0``."""
+    accepted = set()
+    for item in header.split(","):
+        name, _, parameters = item.partition(";")
+        key, _, value = parameters.partition("=")
+        try:
+            if key.strip() == "q" and float(value) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+class Compression:
+    def __init__(self, assets_folder, minimum_size=500, precompressed=True, metrics=None, max_cached=256):
+        self.assets_folder = assets_folder
+        self.minimum_size = minimum_size
+        self.precompressed = precompressed
+        self.metrics = metrics
+        self.max_cached = max_cached
+        self.encodings = ["br", "gzip"] if brotli else ["gzip"]
+        self.cache = {}
+        self.lock = threading.Lock()
+
+    def choose_encoding(self):
+        accepted = get_accepted_encodings(request.headers.get("Accept-Encoding", ""))
+        for encoding in self.encodings:
+            if encoding in accepted:
+                return encoding
+        return None
+
+    def get_precompressed(self, encoding):
+        path = os.path.normpath(os.path.join(self.assets_folder, request.path[len("/assets/"):]))
+        if not path.startswith(self.assets_folder + os.sep):
+            return None
+        path += precompressed_extensions[encoding]
+        if not os.path.isfile(path):
+            return None
+        with open(path, "rb") as file:
+            return file.read()
+
+    def get_static(self, response, encoding):
+        """Compressed body of a static file response, read from its precompressed copy or
+        compressed once per file version: assets at the highest level, component bundles at the
+        default one, as the highest brotli level takes over a second on the larger bundles."""
+        key = (request.path, response.get_etag()[0], encoding)
+        with self.lock:
+            if key in self.cache:
+                return self.cache[key]
+        is_asset = request.path.startswith("/assets/")
+        data = self.get_precompressed(encoding) if self.precompressed and is_asset else None
+        if data is None:
+            response.direct_passthrough = False
+            level = (11 if encoding == "br" else 9) if is_asset else None
+            data = compress(response.get_data(), encoding, level=level)
+        with self.lock:
+            if len(self.cache) >= self.max_cached:
+                self.cache.clear()
+            self.cache[key] = data
+        return data
+
+    def compress_response(self, response):
+        if (request.method == "HEAD" or response.status_code != 200 or "Content-Encoding" in response.headers
+                or response.mimetype not in compressible_types):
+            return response
+        response.vary.add("Accept-Encoding")
+        if response.content_length is not None and response.content_length < self.minimum_size:
+            return response
+        encoding = self.choose_encoding()
+        if encoding is None:
+            return response
+
+        if request.path.startswith(static_prefixes):
+            data = self.get_static(response, encoding)
+        else:
+            raw = response.get_data()
+            if len(raw) < self.minimum_size:
+                return response
+            start = time.thread_time()
+            data = compress(raw, encoding)
+            if self.metrics and request.path.endswith("/_dash-update-component"):
+                body = request.get_json(silent=True) or {}
+                self.metrics.observe_compression(get_callback_name(body.get("output", "")), encoding,
+                                                 len(data), time.thread_time() - start)
+        response.set_data(data)
+        response.headers["Content-Encoding"] = encoding
+        # The compressed body differs byte for byte, but is the same resource for conditional requests
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+def compress_responses(server, assets_folder, minimum_size=500, precompressed=True, metrics=None):
+    """Compresses the responses of ``server``, recording callback compression in ``metrics``."""
+    compression = Compression(assets_folder, minimum_size, precompressed, metrics)
+    server.after_request(compression.compress_response)
+    return compression
@@ -0,0 +1,39 @@
+"""Liveness and readiness probes.
+
+``/healthz`` answers as soon as the process serves requests. ``/readyz`` answers 503 until every
+readiness check has passed: the data is loaded and, when enabled, the initial state has been
+embedded in the layout (see ``server.initial_state``) and the callbacks have been warmed up (see
+``server.warmup``). Both report their checks as JSON.
+"""
+import threading
+from flask import jsonify
+
+
+class Readiness:
+    def __init__(self, required=("data",)):
+        self.required = list(required)
+        self.checks = {}
+        self.lock = threading.Lock()
+
+    def set(self, name, passed, **details):
+        with self.lock:
+            self.checks[name] = dict(details, passed=bool(passed))
+
+    def is_ready(self):
+        with self.lock:
+            return all(self.checks.get(name, {}).get("passed") for name in self.required)
+
+    def report(self):
+        with self.lock:
+            return {name: self.checks.get(name, {"passed": False, "pending": True}) for name in self.required}
+
+
+def register_health_checks(server, readiness):
+    @server.route("/healthz")
+    def healthz():
+        return jsonify(status="ok")
+
+    @server.route("/readyz")
+    def readyz():
+        ready = readiness.is_ready()
+        return jsonify(status="ready" if ready else "not ready", checks=readiness.report()), 200 if ready else 503
@@ -0,0 +1,90 @@
+"""ETags and ``Cache-Control`` headers for callback responses.
+
+A callback's output only depends on its request (output, input and state values, and which inputs
+changed) and on the loaded dataset, so the ETag of a response is a hash of the request body and
+of a version hash of the data computed once at load time. It can be computed before the callback
+runs, and a request whose ``If-None-Match`` matches it is answered with ``304 Not Modified``
+without calling the callback. Callbacks are POST requests, which browsers neither cache nor
+revalidate, so these headers are meant for a caching reverse proxy in front of the workers that
+keys its cache on the request body. ETags are identical across workers and instances serving the
+same data, so the proxy can share them. They are weak ETags: ``server.compression`` encodes the
+body after they are computed, and the br, gzip and identity bodies of a response share one ETag.
+
+Callbacks whose output also depends on the clock or the session are marked with
+``session_dependent`` and get ``Cache-Control: no-store`` instead.
+"""
+import hashlib
+import inspect
+import json
+import pandas as pd
+from flask import Response, g, request
+from server.metrics import get_server_callbacks
+
+
+def get_data_version(*frames):
+    """Hash of the columns, types and values of ``frames``."""
+    digest = hashlib.sha256()
+    for frame in frames:
+        digest.update(json.dumps([[str(column), str(dtype)] for column, dtype in frame.dtypes.items()]).encode())
+        try:
+            hashes = pd.util.hash_pandas_object(frame, index=True)
+        except TypeError:
+            # Columns of unhashable objects, such as lists, are hashed through their representation
+            hashes = pd.util.hash_pandas_object(frame.astype(str), index=True)
+        digest.update(hashes.to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def session_dependent(func):
+    """Marks a callback whose output depends on more than its request and the data, or that has
+    side effects. Its responses are neither cached nor shared between concurrent requests."""
+    func.session_dependent = True
+    return func
+
+
+def get_request_etag(body, data_version):
+    key = json.dumps([data_version, body.get("output"), body.get("inputs"), body.get("state"),
+                      sorted(body.get("changedPropIds", []))], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+class CallbackCaching:
+    def __init__(self, app, data_version, max_age=300):
+        self.data_version = data_version
+        self.max_age = max_age
+        self.cacheable = {output for output, entry in get_server_callbacks(app)
+                          if not getattr(inspect.unwrap(entry["callback"]), "session_dependent", False)}
+
+    def check_request(self):
+        """Answers the conditional callback requests whose ETag still matches."""
+        g.callback_etag = None
+        if request.method != "POST" or not request.path.endswith("/_dash-update-component"):
+            return None
+        body = request.get_json(silent=True) or {}
+        if body.get("output") not in self.cacheable:
+            g.callback_etag = False
+            return None
+        g.callback_etag = get_request_etag(body, self.data_version)
+        if request.if_none_match.contains_weak(g.callback_etag):
+            response = Response(status=304)
+            self.set_headers(response)
+            return response
+        return None
+
+    def set_headers(self, response):
+        etag = g.get("callback_etag")
+        if etag is False:
+            response.headers["Cache-Control"] = "no-store"
+        elif etag and response.status_code in (200, 304):
+            response.set_etag(etag, weak=True)
+            response.headers["Cache-Control"] = f"public, max-age={self.max_age}"
+        return response
+
+
+def cache_callback_responses(app, data_version, max_age=300):
+    """Adds ETags to the deterministic callback responses of ``app`` and answers the conditional
+    requests that match them with 304."""
+    caching = CallbackCaching(app, data_version, max_age)
+    app.server.before_request(caching.check_request)
+    app.server.after_request(caching.set_headers)
+    return caching
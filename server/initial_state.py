@@ -0,0 +1,94 @@
+"""Initial state of the page, computed on the server and embedded in the served layout.
+
+On page load the renderer calls every callback without ``prevent_initial_call`` with the values of
+the initial layout: more than fifteen requests that compute the same default-state figures and
+texts for every visitor. ``embed_initial_state`` calls those callbacks once, in the order the
+renderer would (callbacks whose inputs are outputs of other page-load callbacks after those),
+writes their outputs into the layout components and marks them ``prevent_initial_call``, so the
+page renders without any callback request. Callbacks that fail keep firing on page load.
+
+The figures make the layout about three times larger, so ``serve_serialized_layout`` serializes it
+once instead of on every ``/_dash-layout`` request, as it is the same for every visitor.
+"""
+import json
+import logging
+import time
+from dash import no_update
+from dash.exceptions import PreventUpdate
+from flask import Response, request
+from plotly.io.json import to_json_plotly
+from server.warmup import get_layout_values, build_request, call_request
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_outputs(output):
+    return [tuple(prop_id.rsplit(".", 1)) for prop_id in output.strip(".").split("...")]
+
+
+def sort_callbacks(callbacks):
+    """``callbacks`` ordered so that each comes after the callbacks producing its inputs, in
+    registration order otherwise. Callbacks left in a cycle keep their registration order."""
+    producers = {}
+    for index, callback in enumerate(callbacks):
+        for component_id, prop in get_outputs(callback["output"]):
+            producers.setdefault(f"{component_id}.{prop}", set()).add(index)
+    dependencies = [
+        {producer for dependency in callback["inputs"]
+         for producer in producers.get(f"{dependency['id']}.{dependency['property']}", ()) if producer != index}
+        for index, callback in enumerate(callbacks)
+    ]
+    ordered, done = [], set()
+    while len(ordered) < len(callbacks):
+        ready = [index for index in range(len(callbacks)) if index not in done and dependencies[index] <= done]
+        if not ready:
+            ready = [index for index in range(len(callbacks)) if index not in done]
+        for index in ready:
+            ordered.append(callbacks[index])
+            done.add(index)
+    return ordered
+
+
+def embed_initial_state(app):
+    """Embeds the page-load outputs in ``app.layout``; returns ``(calls, errors, seconds)``."""
+    start = time.perf_counter()
+    components = {component.id: component for component in app.layout._traverse()
+                  if isinstance(getattr(component, "id", None), str)}
+    values = get_layout_values(json.loads(to_json_plotly(app.layout)))
+    callbacks = [callback for callback in app._callback_list
+                 if not callback.get("prevent_initial_call") and not callback.get("clientside_function")]
+    calls, errors = 0, 0
+    for callback in sort_callbacks(callbacks):
+        output, entry = callback["output"], app.callback_map[callback["output"]]
+        outputs = get_outputs(output)
+        calls += 1
+        try:
+            result = call_request(entry, build_request(output, entry, values))
+        except PreventUpdate:
+            result = [no_update] * len(outputs)
+        except Exception as error:
+            errors += 1
+            logger.warning("Initial state of %s could not be computed, it is left to the browser: %r", output, error)
+            continue
+        if not output.startswith(".."):
+            result = [result]
+        for (component_id, prop), value in zip(outputs, result):
+            if value is no_update or component_id not in components:
+                continue
+            setattr(components[component_id], prop, value)
+            values[f"{component_id}.{prop}"] = json.loads(to_json_plotly(value))
+        callback["prevent_initial_call"] = True
+    elapsed = time.perf_counter() - start
+    logger.info("Embedded the initial state of %d callbacks in %.2f s", calls - errors, elapsed)
+    return calls, errors, elapsed
+
+
+def serve_serialized_layout(app):
+    body = to_json_plotly(app.layout)
+
+    @app.server.before_request
+    def serve_layout():
+        if request.path.endswith("/_dash-layout"):
+            return Response(body, mimetype="application/json")
+        return None
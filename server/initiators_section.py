@@ -1,12 +1,15 @@
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 from dash.dependencies import Input, Output, State
 from dash import html, ctx
 import dash_bootstrap_components as dbc
-from server.utils import filter_data, empty_figure, sectors_color_map, initiator_types_color_map
-from io import StringIO
+from server.utils import (
+    filter_data, empty_figure, flag_icon, plotly_express, sectors_color_map, initiator_types_color_map
+)
+from server.metrics import timed_phase
+from server.http_caching import session_dependent
 from datetime import datetime, date
+from functools import lru_cache, partial
 
 
 button_to_sector = {
@@ -41,6 +44,9 @@ apt_profiles = {
     "NSA/Equation Group": "https://eurepoc.eu/publication/apt-profile-equation-group/",
 }
 
+conflict_sectors_hovertemplate = "<b>%{fullData.name}</b><br>Percentage: %{x:.2f}%<br>Number of incidents: %{text}<extra>"
+
+
 def create_initiator_element(row, apt_profiles):
     key = next((k for k in apt_profiles if k in row["initiator_name"]), None)
     if key:
@@ -51,6 +57,7 @@ def create_initiator_element(row, apt_profiles):
 
     return init_name
 
+@timed_phase("filter")
 def filter_data_initiators(df, click_button, initiator_name=None):
     if click_button and click_button != "all-button":
         sector = button_to_sector[click_button]
@@ -91,6 +98,7 @@ def filter_data_initiators(df, click_button, initiator_name=None):
     return df_top, total
 
 
+@timed_phase("figure")
 def conflict_sectors_graph(df, click_data=None, conflict_name=None):
     callback_data = df[df["conflict_name"] != "Not available"]
     if click_data:
@@ -99,30 +107,29 @@ def conflict_sectors_graph(df, click_data=None, conflict_name=None):
     else:
         selected_conflict = "All conflicts"
     if callback_data.empty:
-        return empty_figure(), callback_data
+        return empty_figure(), {"conflict_name": selected_conflict, "sectors": []}
     else:
         callback_data = callback_data.groupby(["receiver_subcategory"]).agg(
             {"id": "nunique"}).reset_index()
         callback_data['percent'] = callback_data['id'] / callback_data['id'].sum() * 100
         callback_data = callback_data.sort_values(by='percent', ascending=False)
-        callback_data["conflict_name"] = selected_conflict
 
         fig = go.Figure(data=[
             go.Bar(
                 name=category,
                 y=[""],
-                x=[percentage],
+                x=[round(percentage, 2)],
                 text=f"{value}",
                 textposition='auto',
                 orientation='h',
                 marker=dict(color=sectors_color_map.get(category, '#000000')),
-                hovertemplate=f"<b>{category}</b><br>Percentage: {percentage:.2f}%<br>Number of incidents: {value}<extra>{selected_conflict}</extra>",
             )
             for category, percentage, value in zip(callback_data['receiver_subcategory'],
                                                    callback_data['percent'],
                                                    callback_data['id'])
         ])
         fig.update_layout(
+            template_data_bar=[{"hovertemplate": conflict_sectors_hovertemplate + selected_conflict + "</extra>"}],
             barmode='stack',
             xaxis=dict(
                 ticksuffix='%',
@@ -143,7 +150,29 @@ def conflict_sectors_graph(df, click_data=None, conflict_name=None):
                 traceorder="normal",
             ),
         )
-        return fig, callback_data
+        return fig, {"conflict_name": selected_conflict, "sectors": callback_data["receiver_subcategory"].tolist()}
+
+
+def aggregate_conflict_initiators(df, selected_country, dates, selected_conflict, selected_sector):
+    callback_data = df.copy(deep=True)
+    callback_data = filter_data(callback_data, selected_country, date_range=list(dates) if dates else None)
+    callback_data = callback_data[callback_data["conflict_name"] != "Not available"]
+
+    if callback_data.empty:
+        return None
+
+    if selected_sector != "All sectors":
+        callback_data = callback_data[callback_data["receiver_subcategory"] == selected_sector]
+    if selected_conflict != "All conflicts":
+        callback_data = callback_data[callback_data["conflict_name"] == selected_conflict]
+
+    callback_data = callback_data.groupby(["initiator_country", "initiator_category"]).agg({"id": "nunique"}).reset_index()
+    callback_data.rename(columns={"id": "total"}, inplace=True)
+    overall_totals = callback_data.groupby('initiator_country')['total'].sum()
+    top_countries = overall_totals.nlargest(10).index
+    df_top = callback_data[callback_data['initiator_country'].isin(top_countries)]
+    df_top = df_top.merge(overall_totals.rename('total_overall'), on='initiator_country')
+    return df_top.sort_values(by=["total_overall", "total"], ascending=[True, True])
 
 
 class Initiators:
@@ -162,10 +191,14 @@ class Initiators:
             conflicts_initiators_graph_id,
             conflicts_store_id,
             date_range_picker_id,
-            reset_button
+            reset_button,
+            country_id="selected-country",
+            country_property="value"
     ):
         self.app = app
         self.df = df
+        # Keyed on plain arguments and kept on the section, so the cached frames go with it
+        self.cached_conflict_initiators = lru_cache(maxsize=256)(partial(aggregate_conflict_initiators, df))
         self.aggregate_graph_id = aggregate_graph_id
         self.aggregate_graph_title_id = aggregate_graph_title_id
         self.total_cyberattacks_id = total_cyberattacks_id
@@ -179,6 +212,8 @@ class Initiators:
         self.conflicts_store_id = conflicts_store_id
         self.date_range_picker_id = date_range_picker_id
         self.reset_button = reset_button
+        self.country_id = country_id
+        self.country_property = country_property
 
         self.initialize_callbacks()
 
@@ -190,16 +225,21 @@ class Initiators:
         self.generate_sectors_conflict_graph()
         self.generate_initiators_conflict_graph()
 
+    def get_conflict_initiators(self, selected_country, dates, selected_conflict, selected_sector):
+        """Top 10 initiator countries of a selection, as a new frame that callers may modify."""
+        df_top = self.cached_conflict_initiators(selected_country, dates, selected_conflict, selected_sector)
+        return None if df_top is None else df_top.copy()
+
     def active_button(self):
         @self.app.callback(
             [Output("active-button-store", "data")] +
             [Output(key, "active") for key in self.button_group_dict.keys()],
-            [Input("selected-country", "value")] +
+            [Input(self.country_id, self.country_property)] +
             [Input(key, "n_clicks") for key in self.button_group_dict.keys()],
         )
         def update_button_active_state(selected_country, *args):
             button_id = ctx.triggered_id
-            if not ctx.triggered or button_id == "selected-country":
+            if not ctx.triggered or button_id == self.country_id:
                 active_button = "all-button"
                 active_status_list = [True] + [False] * (len(self.button_group_dict) - 1)
                 return active_button, *active_status_list
@@ -212,15 +252,16 @@ class Initiators:
         @self.app.callback(
             Output(self.year_slider_id, "value"),
             Output(self.date_range_picker_id, "value"),
-            Input("selected-country", "value"),
+            Input(self.country_id, self.country_property),
             Input(self.date_range_picker_id, "value"),
             Input(self.reset_button, "n_clicks"),
             [State(self.year_slider_id, "value"),
              State(self.date_range_picker_id, "value")]
         )
+        @session_dependent
         def reset_year_slider(selected_country, date_range, reset_button, current_year, current_dates):
             triggered_id = ctx.triggered_id
-            if triggered_id == "selected-country":
+            if triggered_id == self.country_id:
                 return 2025, [date(2000, 1, 1), datetime.now().date()]
             elif triggered_id == self.reset_button or date_range is None:
                 return current_year, [date(2000, 1, 1), datetime.now().date()]
@@ -233,7 +274,7 @@ class Initiators:
             Output(self.aggregate_graph_title_id, "children"),
             Output(self.table_title_id, "children"),
             Output(self.total_cyberattacks_id, "children"),
-            [Input(self.year_slider_id, "value"), Input("selected-country", "value"), Input("active-button-store", "data")],
+            [Input(self.year_slider_id, "value"), Input(self.country_id, self.country_property), Input("active-button-store", "data")],
             [State(button_id, "n_clicks") for button_id in self.button_group_dict.keys()]
         )
         def update_aggregate_plot(year, selected_country, active_button, *args):
@@ -259,6 +300,7 @@ class Initiators:
                 if year == 2025:
                     year = "All years"
 
+                px = plotly_express()
                 fig = px.bar(
                     df_filtered,
                     x='total',
@@ -299,7 +341,7 @@ class Initiators:
                 for index, row in df_table.iterrows():
                     initiator_name = create_initiator_element(row, apt_profiles)
                     item = dbc.ListGroupItem([
-                        html.Span(html.Img(src=f"/assets/flag/{row['alpha_2_code'].lower()}.svg", style={"width": "25px"})),
+                        flag_icon(row['alpha_2_code']),
                         html.B(initiator_name),
                         html.Br(),
                         html.Small(f"Nb of operations: {row['total']}"),
@@ -315,7 +357,7 @@ class Initiators:
     def generate_main_conflict_graph(self):
         @self.app.callback(
             Output(self.conflicts_main_graph_id, "figure"),
-            [Input("selected-country", "value"),
+            [Input(self.country_id, self.country_property),
              Input(self.conflicts_main_graph_id, "clickData"),
              Input(self.reset_button, "n_clicks"),
              Input(self.date_range_picker_id, "value")]
@@ -333,7 +375,7 @@ class Initiators:
             if click_data:
                 selected_segment = click_data['points'][0]['pointNumber']
 
-            if triggered_id == self.reset_button or triggered_id == "selected-country" or triggered_id == self.date_range_picker_id:
+            if triggered_id == self.reset_button or triggered_id == self.country_id or triggered_id == self.date_range_picker_id:
                 selected_segment = None
 
             callback_data = callback_data.groupby(["conflict_name"]).agg({"id": "nunique"}).reset_index()
@@ -342,6 +384,7 @@ class Initiators:
             line_colors = ["#cc0130" if i == selected_segment else "#002C38" for i in range(len(callback_data))]
             pull_values = [0.1 if i == selected_segment else 0 for i in range(len(callback_data))]
 
+            px = plotly_express()
             fig = px.pie(callback_data, values='id', names='conflict_name', title='')
             fig.update_traces(textposition='inside', textinfo='percent+label+value',
                               marker=dict(colors=colors, line=dict(color=line_colors, width=1.5)),
@@ -361,7 +404,7 @@ class Initiators:
             Output(self.conflicts_sectors_graph_id, "figure"),
             Output(self.conflicts_store_id, "data"),
             Output("initiators-section-conflicts-sectors-title", "children"),
-            [Input("selected-country", "value"),
+            [Input(self.country_id, self.country_property),
              Input(self.conflicts_main_graph_id, "clickData"),
              Input(self.reset_button, "n_clicks"),
              Input(self.date_range_picker_id, "value")]
@@ -380,94 +423,69 @@ class Initiators:
 
             else:
 
-                if triggered_id == self.reset_button or triggered_id == "selected-country":
-                    fig, filtered_data = conflict_sectors_graph(callback_data)
+                if triggered_id == self.reset_button or triggered_id == self.country_id:
+                    fig, conflict_selection = conflict_sectors_graph(callback_data)
                     return (fig,
-                            filtered_data.to_json(orient='records'),
+                            conflict_selection,
                             f"Sectors targeted by cyberattacks linked to offline conflicts in {selected_country}")
 
                 if click_data:
                     conflict_name = click_data['points'][0]['label']
-                    fig, filtered_data = conflict_sectors_graph(callback_data, click_data=True, conflict_name=conflict_name)
-                    return fig, filtered_data.to_json(orient='records'), f"Sectors targeted by cyberattacks linked to the {conflict_name} offline conflict in {selected_country}"
+                    fig, conflict_selection = conflict_sectors_graph(callback_data, click_data=True, conflict_name=conflict_name)
+                    return fig, conflict_selection, f"Sectors targeted by cyberattacks linked to the {conflict_name} offline conflict in {selected_country}"
 
                 else:
-                    fig, filtered_data = conflict_sectors_graph(callback_data)
+                    fig, conflict_selection = conflict_sectors_graph(callback_data)
                     return (fig,
-                            filtered_data.to_json(orient='records'),
+                            conflict_selection,
                             f"Sectors targeted by cyberattacks linked to offline conflicts in {selected_country}")
 
     def generate_initiators_conflict_graph(self):
         @self.app.callback(
             Output(self.conflicts_initiators_graph_id, "figure"),
             Output("initiators-section-conflicts-initiators-title", "children"),
-            [Input("selected-country", "value"),
+            [Input(self.country_id, self.country_property),
              Input(self.conflicts_sectors_graph_id, "clickData"),
              Input(self.conflicts_store_id, "data"),
              Input(self.date_range_picker_id, "value")]
         )
         def update_initiators_conflict_graph(selected_country, click_data, data, dates):
-            callback_data = self.df.copy(deep=True)
-            callback_data = filter_data(callback_data, selected_country, date_range=dates)
-            callback_data = callback_data[callback_data["conflict_name"] != "Not available"]
-
             triggered_id = ctx.triggered_id
 
-            if selected_country == "Global (states)":
-                selected_country = "all countries"
-
-            if triggered_id == "selected-country" or triggered_id == self.reset_button or triggered_id == self.date_range_picker_id:
+            if triggered_id == self.country_id or triggered_id == self.reset_button or triggered_id == self.date_range_picker_id:
                 click_data = None
 
-            if callback_data.empty:
-                return empty_figure(), ""
+            if click_data and triggered_id != self.conflicts_store_id:
+                selected_sector_index = click_data['points'][0]['curveNumber']
+                selected_sector = data["sectors"][selected_sector_index]
+                selected_conflict = data["conflict_name"]
+            elif data and triggered_id == self.conflicts_store_id:
+                selected_sector = "All sectors"
+                selected_conflict = data["conflict_name"]
             else:
-                if click_data and triggered_id != self.conflicts_store_id:
-                    selected_sector_index = click_data['points'][0]['curveNumber']
-                    stored_data = pd.read_json(StringIO(data))
-                    selected_sector = stored_data["receiver_subcategory"][selected_sector_index]
-                    selected_conflict = stored_data["conflict_name"][0]
-                    if selected_conflict == "All conflicts":
-                        callback_data = callback_data[callback_data["receiver_subcategory"] == selected_sector]
-                    else:
-                        callback_data = callback_data[
-                            (callback_data["receiver_subcategory"] == selected_sector) &
-                            (callback_data["conflict_name"] == selected_conflict)
-                        ]
-                elif click_data and triggered_id == self.conflicts_store_id:
-                    stored_data = pd.read_json(StringIO(data))
-                    selected_conflict = stored_data["conflict_name"][0]
-                    if selected_conflict != "All conflicts":
-                        callback_data = callback_data[
-                            callback_data["conflict_name"] == selected_conflict
-                        ]
-                    selected_sector = "All sectors"
-                elif not click_data and triggered_id == self.conflicts_store_id:
-                    stored_data = pd.read_json(StringIO(data))
-                    selected_sector = "All sectors"
-                    selected_conflict = stored_data["conflict_name"][0]
-                    if selected_conflict != "All conflicts":
-                        callback_data = callback_data[
-                            callback_data["conflict_name"] == selected_conflict
-                        ]
-                else:
-                    selected_sector = "All sectors"
-                    selected_conflict = "All conflicts"
+                selected_sector = "All sectors"
+                selected_conflict = "All conflicts"
+
+            df_top = self.get_conflict_initiators(
+                selected_country,
+                tuple(dates) if dates else None,
+                selected_conflict,
+                selected_sector
+            )
 
-                callback_data = callback_data.groupby(["initiator_country", "initiator_category"]).agg({"id": "nunique"}).reset_index()
-                callback_data.rename(columns={"id": "total"}, inplace=True)
-                overall_totals = callback_data.groupby('initiator_country')['total'].sum()
-                top_countries = overall_totals.nlargest(10).index
-                df_top = callback_data[callback_data['initiator_country'].isin(top_countries)]
-                df_top = df_top.merge(overall_totals.rename('total_overall'), on='initiator_country')
-                df_top = df_top.sort_values(by=["total_overall", "total"], ascending=[True, True])
+            if selected_country == "Global (states)":
+                selected_country = "all countries"
 
+            if df_top is None:
+                return empty_figure(), ""
+            else:
                 df_top = df_top.sort_values(by='total_overall', ascending=False)
                 stack_order = [
                     "Non-state-group", "Individual hacker(s)", "State affiliated actor",
                     "State", "Not attributed", "Unknown"
                 ]
 
+                px = plotly_express()
                 fig = px.bar(
                     df_top,
                     y='total',
@@ -0,0 +1,34 @@
+"""Sections whose callbacks only run once the section is near the viewport.
+
+Most visitors never scroll down to the Types and Initiators sections, yet every change of the
+selected country recomputed all their figures. The callbacks of those sections take the country
+from a store of their own (``types-section-country``, ``initiators-section-country``) instead of
+the dropdown. ``assets/lazy_sections.js`` reports which ``.lazy-section`` elements are within
+600 px of the viewport to the ``section-visibility`` store, and a clientside callback per section
+copies the selected country into its store while the section is visible. A section scrolled past
+keeps its pending country until it comes back into view, when its callbacks compute it.
+"""
+import json
+from dash import Input, Output, State
+
+
+sync_country = """function (country, visibility, current) {
+    if (!visibility || !visibility[%s] || country === current) {
+        return window.dash_clientside.no_update;
+    }
+    return country;
+}"""
+
+
+def defer_sections(app, sections, country_id="selected-country", visibility_id="section-visibility"):
+    """Registers the clientside callbacks copying the selected country into the store of each
+    section while it is visible; ``sections`` maps section element ids to store ids."""
+    for section_id, store_id in sections.items():
+        app.clientside_callback(
+            sync_country % json.dumps(section_id),
+            Output(store_id, "data"),
+            Input(country_id, "value"),
+            Input(visibility_id, "data"),
+            State(store_id, "data"),
+            prevent_initial_call=True,
+        )
@@ -0,0 +1,158 @@
+"""Deep memory use of the datasets, section state, caches and module-level tables of the app.
+
+Served as JSON on ``/admin/memory`` (``?format=text`` for a table), and available offline through
+``python -m benchmarks.memory``. Objects referenced from several places are counted once, under
+the first name they are reached by, and reported as shared under the others.
+"""
+import sys
+import time
+from types import BuiltinFunctionType, FunctionType, MethodType, ModuleType
+import dash
+import numpy as np
+import pandas as pd
+from flask import Response, jsonify, request
+from server.admin import admin_required
+from server.startup_profiler import get_rss_mb
+
+
+module_prefixes = ("server.", "layout.")
+min_table_bytes = 1024
+skipped_types = (type, ModuleType, FunctionType, BuiltinFunctionType, MethodType, dash.Dash)
+
+
+def get_size(obj, seen):
+    """Deep size in bytes of ``obj``, not counting objects already in ``seen``."""
+    if id(obj) in seen or isinstance(obj, skipped_types):
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True, index=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(get_size(key, seen) + get_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(get_size(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__") and not callable(obj):
+        size += get_size(vars(obj), seen)
+    return size
+
+
+class MemoryReport:
+    def __init__(self):
+        self.seen = set()
+        self.owners = {}
+        self.structures = []
+
+    def add(self, name, obj):
+        structure = {"name": name, "type": type(obj).__name__}
+        if id(obj) in self.owners:
+            structure.update(bytes=0, shared_with=self.owners[id(obj)])
+        elif hasattr(obj, "cache_info"):
+            # functools.lru_cache does not expose its entries, only their number
+            structure.update(bytes=None, entries=obj.cache_info().currsize, maxsize=obj.cache_info().maxsize)
+        else:
+            self.owners[id(obj)] = name
+            structure["bytes"] = get_size(obj, self.seen)
+            if isinstance(obj, pd.DataFrame):
+                structure["rows"] = len(obj)
+                structure["columns"] = {str(column): int(size) for column, size
+                                        in obj.memory_usage(deep=True, index=True).items()}
+            elif isinstance(obj, dict):
+                structure["entries"] = len(obj)
+        self.structures.append(structure)
+
+    def add_object(self, name, obj, depth=1):
+        """Adds the attributes of a section object, and those of its helper objects up to ``depth``."""
+        for attribute, value in vars(obj).items():
+            if isinstance(value, (str, int, float, bool, type(None))) or isinstance(value, skipped_types):
+                continue
+            is_helper = hasattr(value, "__dict__") and not isinstance(value, (pd.DataFrame, pd.Series, pd.Index)) \
+                and not callable(value)
+            if is_helper and depth > 0:
+                self.add_object(f"{name}.{attribute}", value, depth - 1)
+            else:
+                self.add(f"{name}.{attribute}", value)
+
+    def add_modules(self):
+        """Adds the module-level tables of the app's own modules. Modules that import fewer app modules
+        are visited first, so that a table imported elsewhere is attributed to the module defining it."""
+        modules = {name: module for name, module in sys.modules.items()
+                   if name.startswith(module_prefixes) and module is not None}
+
+        def get_imports(module):
+            names = {value.__name__ if isinstance(value, ModuleType) else getattr(value, "__module__", None)
+                     for value in vars(module).values()}
+            return names.intersection(modules) - {module.__name__}
+
+        dependencies = {}
+        for name, module in modules.items():
+            dependencies[name] = set()
+            pending = list(get_imports(module))
+            while pending:
+                imported = pending.pop()
+                if imported not in dependencies[name] and imported != name:
+                    dependencies[name].add(imported)
+                    pending.extend(get_imports(modules[imported]))
+
+        for module_name, module in sorted(modules.items(), key=lambda item: (len(dependencies[item[0]]), item[0])):
+            for attribute, value in vars(module).items():
+                if attribute.startswith("_") or not isinstance(value, (pd.DataFrame, dict, list, tuple, set)):
+                    continue
+                if id(value) in self.owners or get_size(value, set()) >= min_table_bytes:
+                    self.add(f"{module_name}.{attribute}", value)
+
+    def report(self):
+        return {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "rss_mb": get_rss_mb(),
+            "total_bytes": sum(structure["bytes"] or 0 for structure in self.structures),
+            "structures": self.structures,
+        }
+
+
+def build_memory_report(roots):
+    """Report over ``roots``, a ``{name: object}`` dict of datasets and section objects, followed
+    by the module-level tables."""
+    memory_report = MemoryReport()
+    for name, obj in roots.items():
+        if hasattr(obj, "__dict__") and not isinstance(obj, (pd.DataFrame, pd.Series)):
+            memory_report.add_object(name, obj)
+        else:
+            memory_report.add(name, obj)
+    memory_report.add_modules()
+    return memory_report.report()
+
+
+def format_memory_report(report, columns=True):
+    lines = [f"Total {report['total_bytes'] / 2 ** 20:.1f} MB counted, process RSS {report['rss_mb']:.0f} MB"]
+    for structure in report["structures"]:
+        if structure.get("shared_with"):
+            size = f"shared with {structure['shared_with']}"
+        elif structure["bytes"] is None:
+            size = f"{structure['entries']} cached entries (size not available)"
+        else:
+            size = f"{structure['bytes'] / 2 ** 20:9.2f} MB"
+        details = f"  {structure['rows']} rows" if "rows" in structure else ""
+        lines.append(f"  {structure['name']:<56} {structure['type']:<18} {size}{details}")
+        if columns and "columns" in structure:
+            for column, size in sorted(structure["columns"].items(), key=lambda item: -item[1]):
+                lines.append(f"      {column:<52} {size / 2 ** 20:9.2f} MB")
+    return "\n".join(lines)
+
+
+def register_memory_report(server, roots):
+    """Serves the report over ``roots`` on ``/admin/memory`` and keeps them in ``server.extensions``."""
+    server.extensions["memory_report"] = roots
+
+    @admin_required
+    def memory_report():
+        report = build_memory_report(roots)
+        if request.args.get("format") == "text":
+            return Response(format_memory_report(report), mimetype="text/plain")
+        return jsonify(report)
+
+    server.add_url_rule("/admin/memory", "memory_report", memory_report)
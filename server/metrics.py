@@ -0,0 +1,240 @@
+"""Per-callback call counts, latency and response size metrics, served on ``/metrics`` in the
+Prometheus text exposition format.
+
+Each callback request is split into phases:
+
+- ``filter``: time spent in the data filtering functions decorated with ``timed_phase("filter")``,
+- ``figure``: time spent in the figure-building functions decorated with ``timed_phase("figure")``,
+- ``aggregate``: the remaining time spent in the callback function itself,
+- ``wait``: time spent waiting for an identical request computed concurrently (see ``server.single_flight``),
+- ``serialize``: the time Dash spends preparing and JSON-encoding the response,
+
+and ``total`` covers the whole request. Metrics are kept in memory per process, so with several
+gunicorn workers each scrape reports the worker that served it.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from functools import wraps
+from dash.exceptions import PreventUpdate
+from flask import Response
+from server.admin import admin_required
+from server.tracing import call_traced
+
+
+duration_buckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+size_buckets = (1000, 5000, 10000, 25000, 50000, 100000, 250000, 500000, 1000000)
+
+_local = threading.local()
+
+
+def timed_phase(phase):
+    """Adds the time spent in the decorated function to ``phase`` of the callback request being
+    measured on this thread. Calls nested inside another timed call count towards the outer one.
+    The call is also recorded as a span of the request trace, if one is being recorded."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            phases = getattr(_local, "phases", None)
+            if phases is None or _local.active:
+                return call_traced(phase, func, args, kwargs)
+            _local.active = True
+            start = time.perf_counter()
+            try:
+                return call_traced(phase, func, args, kwargs)
+            finally:
+                phases[phase] += time.perf_counter() - start
+                _local.active = False
+        return wrapper
+    return decorator
+
+
+def add_to_phase(phase, seconds):
+    """Adds ``seconds`` to ``phase`` of the callback request being measured on this thread, if any."""
+    phases = getattr(_local, "phases", None)
+    if phases is not None:
+        phases[phase] = phases.get(phase, 0.0) + seconds
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+class CallbackMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.durations = defaultdict(lambda: Histogram(duration_buckets))
+        self.sizes = defaultdict(lambda: Histogram(size_buckets))
+        self.compressed_sizes = defaultdict(lambda: Histogram(size_buckets))
+        self.compression_seconds = defaultdict(float)
+        self.single_flight = defaultdict(int)
+
+    def observe(self, callback, durations, size, error=False):
+        with self.lock:
+            self.calls[callback] += 1
+            if error:
+                self.errors[callback] += 1
+            for phase, duration in durations.items():
+                self.durations[(callback, phase)].observe(duration)
+            self.sizes[callback].observe(size)
+
+    def observe_compression(self, callback, encoding, size, seconds):
+        with self.lock:
+            self.compressed_sizes[(callback, encoding)].observe(size)
+            self.compression_seconds[(callback, encoding)] += seconds
+
+    def observe_single_flight(self, callback, outcome):
+        with self.lock:
+            self.single_flight[(callback, outcome)] += 1
+
+    def render(self):
+        with self.lock:
+            lines = [
+                "# HELP dash_callback_calls_total Callback requests handled.",
+                "# TYPE dash_callback_calls_total counter",
+            ]
+            lines += [f'dash_callback_calls_total{{callback="{callback}"}} {count}'
+                      for callback, count in sorted(self.calls.items())]
+            lines += [
+                "# HELP dash_callback_errors_total Callback requests that raised an exception.",
+                "# TYPE dash_callback_errors_total counter",
+            ]
+            lines += [f'dash_callback_errors_total{{callback="{callback}"}} {self.errors[callback]}'
+                      for callback in sorted(self.calls)]
+            lines += [
+                "# HELP dash_callback_duration_seconds Callback request latency by phase.",
+                "# TYPE dash_callback_duration_seconds histogram",
+            ]
+            for (callback, phase), histogram in sorted(self.durations.items()):
+                lines += histogram.render("dash_callback_duration_seconds", f'callback="{callback}",phase="{phase}"')
+            lines += [
+                "# HELP dash_callback_response_bytes Size of the JSON callback response.",
+                "# TYPE dash_callback_response_bytes histogram",
+            ]
+            for callback, histogram in sorted(self.sizes.items()):
+                lines += histogram.render("dash_callback_response_bytes", f'callback="{callback}"')
+            lines += [
+                "# HELP dash_callback_compressed_response_bytes Size of the compressed callback response sent.",
+                "# TYPE dash_callback_compressed_response_bytes histogram",
+            ]
+            for (callback, encoding), histogram in sorted(self.compressed_sizes.items()):
+                lines += histogram.render("dash_callback_compressed_response_bytes",
+                                          f'callback="{callback}",encoding="{encoding}"')
+            lines += [
+                "# HELP dash_callback_compression_cpu_seconds_total CPU time spent compressing callback responses.",
+                "# TYPE dash_callback_compression_cpu_seconds_total counter",
+            ]
+            lines += [f'dash_callback_compression_cpu_seconds_total{{callback="{callback}",encoding="{encoding}"}} '
+                      f'{seconds}' for (callback, encoding), seconds in sorted(self.compression_seconds.items())]
+            lines += [
+                "# HELP dash_callback_single_flight_total Coalesced callback requests, by outcome: computed (leader), "
+                "shared (follower) or computed after waiting too long (timeout).",
+                "# TYPE dash_callback_single_flight_total counter",
+            ]
+            lines += [f'dash_callback_single_flight_total{{callback="{callback}",outcome="{outcome}"}} {count}'
+                      for (callback, outcome), count in sorted(self.single_flight.items())]
+        return "\n".join(lines) + "\n"
+
+
+def get_callback_name(key):
+    """First output ``component-id.property`` of a ``callback_map`` key."""
+    return key.strip(".").split("...")[0]
+
+
+def get_server_callbacks(app):
+    """``(key, entry)`` of the callbacks of ``app`` that run on the server: clientside callbacks
+    are in ``callback_map`` too, without a function."""
+    return [(key, entry) for key, entry in app.callback_map.items() if "callback" in entry]
+
+
+def track_function(func):
+    """Records the time spent in the callback function itself, inside a tracked request."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        phases = getattr(_local, "phases", None)
+        if phases is None:
+            return call_traced("callback", func, args, kwargs)
+        start = time.perf_counter()
+        try:
+            return call_traced("callback", func, args, kwargs)
+        finally:
+            phases["function"] = time.perf_counter() - start
+    return wrapper
+
+
+def track_request(dispatch, metrics, callback):
+    """Wraps the function Dash dispatches a callback request to, which calls the callback
+    function and serializes its output."""
+    def wrapper(*args, **kwargs):
+        _local.phases = {"filter": 0.0, "figure": 0.0, "function": 0.0, "wait": 0.0}
+        _local.active = False
+        start = time.perf_counter()
+        response, error = None, False
+        try:
+            response = dispatch(*args, **kwargs)
+            return response
+        except PreventUpdate:
+            raise
+        except Exception:
+            error = True
+            raise
+        finally:
+            total = time.perf_counter() - start
+            phases = _local.phases
+            _local.phases = None
+            metrics.observe(callback, {
+                "total": total,
+                "filter": phases["filter"],
+                "figure": phases["figure"],
+                "aggregate": max(phases["function"] - phases["filter"] - phases["figure"], 0.0),
+                "wait": phases["wait"],
+                "serialize": max(total - phases["function"] - phases["wait"], 0.0),
+            }, len(response) if isinstance(response, str) else 0, error)
+
+    wrapper.__wrapped__ = dispatch.__wrapped__
+    return wrapper
+
+
+def track_callbacks(app):
+    """Wraps every callback function registered on ``app`` from now on with ``track_function``, so
+    that request wrappers can tell the callback function apart from Dash's own work around it."""
+    register = app.callback
+
+    def callback(*args, **kwargs):
+        decorator = register(*args, **kwargs)
+        return lambda func: decorator(track_function(func))
+
+    app.callback = callback
+
+
+def instrument_app(app, metrics=None):
+    """Records metrics for every callback registered on ``app`` through ``track_callbacks`` and
+    serves them on ``/metrics``, to requests carrying the admin token (see ``server.admin``)."""
+    metrics = metrics or CallbackMetrics()
+    for key, entry in get_server_callbacks(app):
+        entry["callback"] = track_request(entry["callback"], metrics, get_callback_name(key))
+    app.server.add_url_rule(
+        "/metrics", "metrics",
+        admin_required(lambda: Response(metrics.render(), mimetype="text/plain; version=0.0.4"))
+    )
+    return metrics
@@ -1,10 +1,36 @@
 from dash.dependencies import Input, Output, State
 import dash
-import plotly.express as px
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from server.utils import filter_data, empty_figure, sectors_color_map
+from plotly.colors import qualitative
+from server.utils import filter_data, empty_figure, sectors_color_map, downsample_indices, plotly_express
+from server.metrics import timed_phase
+
+
+max_evolution_points = 400
+
+# Keeps the x range of the evolution graph together with the uirevision it was zoomed under, so
+# that a zoom is forgotten once the figure is redrawn for another country. Layout changes without
+# a range, such as the autosize plotly reports on first render, do not reach the server.
+store_visible_range = """function (relayoutData, figure) {
+    if (!relayoutData) {
+        return window.dash_clientside.no_update;
+    }
+    var uirevision = figure && figure.layout ? figure.layout.uirevision : null;
+    if (relayoutData["xaxis.autorange"]) {
+        return {uirevision: uirevision, range: null};
+    }
+    var range = relayoutData["xaxis.range"];
+    if (!range && "xaxis.range[0]" in relayoutData && "xaxis.range[1]" in relayoutData) {
+        range = [relayoutData["xaxis.range[0]"], relayoutData["xaxis.range[1]"]];
+    }
+    if (!range) {
+        return window.dash_clientside.no_update;
+    }
+    return {uirevision: uirevision, range: range};
+}"""
 
 
 def aggregate_plot_layout(grid_title):
@@ -81,21 +107,151 @@ evolution_plot_layout = {
 }
 
 
-def generate_plot_data(data, moving_average=False):
-    data = data.copy()
-    if moving_average:
-        data = data[data["added_to_db"] >= "2023-01-01"]
-        data = data.groupby(['added_to_db']).agg({"id": "nunique", "weighted_intensity": "mean"}).reset_index()
-        data['value_moving_avg'] = data['id'].rolling(window=30, min_periods=1).mean()
-        data['intensity_moving_avg'] = data['weighted_intensity'].rolling(window=30, min_periods=1).mean()
-    else:
-        data = data.groupby([pd.Grouper(key='added_to_db', freq='ME')]).agg(
-            {"id": "nunique", "weighted_intensity": "mean"}).reset_index()
-        data['cumulative_count'] = data['id'].cumsum()
-    return data
+class EvolutionSeries:
+    """Daily incident counts and intensity sums per (country/region, sector), held as prefix sums
+    over a shared dense calendar so that rolling windows and cumulative counts are O(days) slices."""
+
+    def __init__(self, df, moving_average_start="2023-01-01", window=30):
+        data = df[~df["receiver_subcategory"].isin(["Not available", "Other"])]
+        data = data[data["added_to_db"].notna()]
+        self.data = data[["id", "added_to_db", "receiver_country", "region_name",
+                          "receiver_subcategory", "weighted_intensity"]]
+        days = pd.to_datetime(self.data["added_to_db"]).dt.normalize()
+        self.dates = pd.date_range(days.min(), days.max(), freq="D")
+        self.day_positions = pd.Series((days - self.dates[0]).dt.days.to_numpy(), index=self.data.index)
+        self.moving_average_start = self.dates.searchsorted(pd.Timestamp(moving_average_start))
+        self.window = window
+        self.prefix_sums = {}
+
+    def get_prefix_sums(self, selected_country, sector=None):
+        key = (selected_country, sector)
+        if key not in self.prefix_sums:
+            data = filter_data(self.data, selected_country)
+            if sector:
+                data = data[data["receiver_subcategory"] == sector]
+            incidents = data.drop_duplicates(subset="id")
+            positions = self.day_positions.loc[incidents.index].to_numpy()
+            intensity = incidents["weighted_intensity"].to_numpy(dtype=float)
+            rated = ~np.isnan(intensity)
+            n_days = len(self.dates)
+            counts = np.bincount(positions, minlength=n_days)
+            intensity_sum = np.bincount(positions[rated], weights=intensity[rated], minlength=n_days)
+            intensity_count = np.bincount(positions[rated], minlength=n_days)
+            self.prefix_sums[key] = tuple(
+                np.concatenate([[0], np.cumsum(values)]) for values in (counts, intensity_sum, intensity_count)
+            )
+        return self.prefix_sums[key]
+
+    def is_empty(self, selected_country):
+        return self.get_prefix_sums(selected_country)[0][-1] == 0
+
+    def moving_average(self, selected_country, sector=None):
+        counts, intensity_sum, intensity_count = self.get_prefix_sums(selected_country, sector)
+        end = np.arange(self.moving_average_start + 1, len(self.dates) + 1)
+        start = np.maximum(end - self.window, 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            data = pd.DataFrame({
+                "added_to_db": self.dates[end - 1],
+                "id": counts[end] - counts[end - 1],
+                "weighted_intensity": (intensity_sum[end] - intensity_sum[end - 1]) /
+                                      (intensity_count[end] - intensity_count[end - 1]),
+                "value_moving_avg": (counts[end] - counts[start]) / (end - start),
+                "intensity_moving_avg": (intensity_sum[end] - intensity_sum[start]) /
+                                        (intensity_count[end] - intensity_count[start]),
+            })
+        return data
+
+    def cumulative(self, selected_country, sector=None):
+        counts, intensity_sum, intensity_count = (np.diff(values) for values in
+                                                  self.get_prefix_sums(selected_country, sector))
+        data = pd.DataFrame({
+            "added_to_db": self.dates,
+            "id": counts,
+            "intensity_sum": intensity_sum,
+            "intensity_count": intensity_count,
+        })
+        data = data.groupby(pd.Grouper(key="added_to_db", freq="ME")).sum().reset_index()
+        data = data[data["id"].cumsum() > 0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            data["weighted_intensity"] = data["intensity_sum"] / data["intensity_count"]
+        data["cumulative_count"] = data["id"].cumsum()
+        return data.drop(columns=["intensity_sum", "intensity_count"])
+
+
+class SunburstHierarchy:
+    """Sector -> ci_subtype hierarchy of the sunburst chart, built once per dataset.
+
+    The ids/labels/parents/colors arrays and the figure layout are fixed; a country change only
+    swaps in that country's ``values`` vector, which is computed on first use and kept.
+    """
+
+    def __init__(self, subtype_df):
+        data = subtype_df[~subtype_df["receiver_subcategory"].isin(["Not available", "Other"])]
+        self.data = data.dropna(subset=["receiver_subcategory", "ci_subtype"])
+        leaves = self.data[["receiver_subcategory", "ci_subtype"]].drop_duplicates()
+        leaves = leaves.sort_values(by=["receiver_subcategory", "ci_subtype"])
+        sectors = list(leaves["receiver_subcategory"].unique())
+        self.leaf_index = pd.MultiIndex.from_frame(leaves)
+        self.sector_index = pd.Index(sectors)
+        leaf_parents = leaves["receiver_subcategory"].to_numpy()
+        self.leaf_sector_positions = self.sector_index.get_indexer(leaf_parents)
+
+        default_colors = qualitative.Plotly
+        sector_colors = [sectors_color_map.get(sector, default_colors[i % len(default_colors)])
+                         for i, sector in enumerate(sectors)]
+        fig = go.Figure(go.Sunburst(
+            ids=[f"{sector}/{subtype}" for sector, subtype in self.leaf_index] + sectors,
+            labels=list(leaves["ci_subtype"]) + sectors,
+            parents=list(leaf_parents) + [""] * len(sectors),
+            branchvalues="total",
+            marker=dict(
+                colors=[sector_colors[i] for i in self.leaf_sector_positions] + sector_colors,
+                line=dict(width=0.5, color='rgba(225,225,225,0.4)')
+            ),
+            hovertemplate='<b>%{label}</b><br>Number of targeted organisations: %{value}',
+        ))
+        fig.update_layout(
+            plot_bgcolor="rgba(0,0,0,0)",
+            paper_bgcolor="rgba(0,0,0,0)",
+            margin=dict(l=0, r=0, t=0, b=0),
+            font=dict(color='black'),
+            height=500
+        )
+        self.figure = fig.to_dict()
+        self.values = {}
+
+    def get_values(self, selected_country):
+        """Leaf values followed by sector totals; the last entry is the grand total."""
+        if selected_country not in self.values:
+            data = filter_data(self.data, selected_country)
+            counts = data.groupby(["receiver_subcategory", "ci_subtype"])["id"].nunique()
+            leaf_values = counts.reindex(self.leaf_index, fill_value=0).to_numpy()
+            sector_values = np.bincount(self.leaf_sector_positions, weights=leaf_values,
+                                        minlength=len(self.sector_index)).astype(int)
+            self.values[selected_country] = leaf_values.tolist() + sector_values.tolist() + [int(leaf_values.sum())]
+        return self.values[selected_country]
+
+    @timed_phase("figure")
+    def generate_figure(self, values):
+        trace = dict(self.figure["data"][0], values=values[:-1])
+        return dict(self.figure, data=[trace])
+
+
+def get_visible_range(visible_range, uirevision):
+    """``(start, end)`` of a range stored by ``store_visible_range``, if it was zoomed under ``uirevision``."""
+    if not visible_range or not visible_range.get("range") or visible_range.get("uirevision") != uirevision:
+        return None
+    start, end = visible_range["range"]
+    return pd.to_datetime(start), pd.to_datetime(end)
+
+
+def downsample_plot_data(data, column, visible_range=None):
+    indices = downsample_indices(data['added_to_db'], data[column], visible_range, max_evolution_points)
+    return data.iloc[indices]
 
 
-def generate_plot(data, fig, moving_average=False, selected_sector=None, len_sector=None):
+@timed_phase("figure")
+def generate_plot(data, fig, moving_average=False, selected_sector=None, len_sector=None, visible_range=None):
     if moving_average:
         col_name_count = "value_moving_avg"
         col_name_intensity = "intensity_moving_avg"
@@ -125,12 +281,15 @@ def generate_plot(data, fig, moving_average=False, selected_sector=None, len_sec
         visibility = True
 
 
+    count_data = downsample_plot_data(data, col_name_count, visible_range)
+    intensity_data = downsample_plot_data(data, col_name_intensity, visible_range)
+
     fig.add_trace(
         go.Scatter(
-            x=data['added_to_db'],
-            y=data[col_name_count],
+            x=count_data['added_to_db'],
+            y=count_data[col_name_count],
             mode='lines',
-            text=data['id'],
+            text=count_data['id'],
             name=f'{name}',
             line=dict(color=color),
             hovertemplate=hovertemplate_count
@@ -138,10 +297,10 @@ def generate_plot(data, fig, moving_average=False, selected_sector=None, len_sec
     )
     fig.add_trace(
         go.Scatter(
-            x=data['added_to_db'],
-            y=data[col_name_intensity],
+            x=intensity_data['added_to_db'],
+            y=intensity_data[col_name_intensity],
             mode='lines',
-            text=data['weighted_intensity'],
+            text=intensity_data['weighted_intensity'],
             name=f'Intensity',
             line=dict(color=color, dash='dot'),
             hovertemplate=hovertemplate_intensity,
@@ -168,7 +327,8 @@ class OverviewIntensity:
             evolution_graph_id=None,
             bar_label_store_id=None,
             sunburst_chart_id=None,
-            reset_button=None
+            reset_button=None,
+            visible_range_store_id=None
     ):
         self.app = app
         self.df = df
@@ -179,6 +339,11 @@ class OverviewIntensity:
         self.evolution_graph_id = evolution_graph_id
         self.sunburst_chart_id = sunburst_chart_id
         self.reset_button = reset_button
+        self.visible_range_store_id = visible_range_store_id
+        self.evolution_series = EvolutionSeries(df)
+        self.evolution_series.get_prefix_sums("Global (states)")
+        self.sunburst_hierarchy = SunburstHierarchy(subtype_df)
+        self.sunburst_hierarchy.get_values("Global (states)")
 
         self.initialize_callbacks()
 
@@ -246,6 +411,7 @@ class OverviewIntensity:
                     {"id": "nunique", "weighted_intensity": "mean"}
                 ).reset_index()
                 callback_data = callback_data.sort_values(by="id", ascending=True)
+                px = plotly_express()
                 fig = px.bar(callback_data, y="receiver_subcategory", x="id", orientation='h')
                 fig.update_traces(hovertemplate='Sector: %{y}<br>Number of incidents: %{x}<extra></extra>')
                 grid_title = "Number of operations"
@@ -262,18 +428,23 @@ class OverviewIntensity:
                 return fig
 
     def evolution_graph(self):
+        self.app.clientside_callback(
+            store_visible_range,
+            Output(self.visible_range_store_id, 'data'),
+            Input(self.evolution_graph_id, 'relayoutData'),
+            State(self.evolution_graph_id, 'figure'),
+            prevent_initial_call=True,
+        )
+
         @self.app.callback(
             Output(self.evolution_graph_id, 'figure'),
             Output('overview-section-evolution-graph-title', 'children'),
             Input('selected-country', 'value'),
             Input(self.bar_label_store_id, 'data'),
-            Input("toggle-switch", "checked")
+            Input("toggle-switch", "checked"),
+            Input(self.visible_range_store_id, 'data')
         )
-        def generate_timeline(selected_country, selected_bars, toggle):
-            callback_data = self.df.copy(deep=True)
-            callback_data = callback_data[~callback_data["receiver_subcategory"].isin(["Not available", "Other"])]
-            callback_data = filter_data(callback_data, selected_country)
-
+        def generate_timeline(selected_country, selected_bars, toggle, stored_range):
             country = selected_country if selected_country != "Global (states)" else "all countries"
 
             if toggle:
@@ -281,42 +452,44 @@ class OverviewIntensity:
             else:
                 title = f"Rolling average number of attacks disclosed since Jan 2023 in {country}"
 
-            if callback_data.empty:
+            visible_range = get_visible_range(stored_range, selected_country)
+
+            if self.evolution_series.is_empty(selected_country):
                 return empty_figure(), title
             else:
                 fig = go.Figure()
                 if selected_bars and len(selected_bars) > 0 and not toggle:
                     for sector in selected_bars:
                         selected_sector = sector
-                        sector_data = callback_data[callback_data["receiver_subcategory"] == selected_sector]
-                        sector_data = generate_plot_data(sector_data, moving_average=True)
+                        sector_data = self.evolution_series.moving_average(selected_country, selected_sector)
                         fig = generate_plot(
                             sector_data,
                             fig,
                             moving_average=True,
                             selected_sector=selected_sector,
-                            len_sector=len(selected_bars)
+                            len_sector=len(selected_bars),
+                            visible_range=visible_range
                         )
                 elif not selected_bars and len(selected_bars) == 0 and not toggle:
-                    callback_data = generate_plot_data(callback_data, moving_average=True)
-                    fig = generate_plot(callback_data, fig, moving_average=True)
+                    callback_data = self.evolution_series.moving_average(selected_country)
+                    fig = generate_plot(callback_data, fig, moving_average=True, visible_range=visible_range)
 
                 elif selected_bars and len(selected_bars) > 0 and toggle:
                     for sector in selected_bars:
                         selected_sector = sector
-                        sector_data = callback_data[callback_data["receiver_subcategory"] == selected_sector]
-                        sector_data = generate_plot_data(sector_data)
+                        sector_data = self.evolution_series.cumulative(selected_country, selected_sector)
                         fig = generate_plot(
                             sector_data,
                             fig,
                             selected_sector=selected_sector,
-                            len_sector=len(selected_bars)
+                            len_sector=len(selected_bars),
+                            visible_range=visible_range
                         )
                 else:
-                    callback_data = generate_plot_data(callback_data)
-                    fig = generate_plot(callback_data, fig)
-
+                    callback_data = self.evolution_series.cumulative(selected_country)
+                    fig = generate_plot(callback_data, fig, visible_range=visible_range)
 
+                fig.update_layout(uirevision=selected_country)
                 return fig, title
 
     def sunburst_chart(self):
@@ -325,29 +498,7 @@ class OverviewIntensity:
             Input('selected-country', 'value'),
         )
         def generate_sunburst(selected_country):
-            callback_data = self.subtype_df.copy(deep=True)
-            callback_data = callback_data[~callback_data["receiver_subcategory"].isin(["Not available", "Other"])]
-            callback_data = filter_data(callback_data, selected_country)
-
-            callback_data = callback_data.groupby(["receiver_subcategory", "ci_subtype"]).agg({"id": "nunique"}).reset_index()
-            callback_data = callback_data.rename(columns={"id": "count"})
-
-            fig = px.sunburst(
-                callback_data,
-                path=['receiver_subcategory', 'ci_subtype'],
-                values='count',
-                color='receiver_subcategory',
-                color_discrete_map=sectors_color_map
-            )
-            fig.update_traces(
-                hovertemplate='<b>%{label}</b><br>Number of targeted organisations: %{value}',
-                marker=dict(line=dict(width=0.5, color='rgba(225,225,225,0.4)'))
-            )
-            fig.update_layout(
-                plot_bgcolor="rgba(0,0,0,0)",
-                paper_bgcolor="rgba(0,0,0,0)",
-                margin=dict(l=0, r=0, t=0, b=0),
-                font=dict(color='black'),
-                height=500
-            )
-            return fig
+            values = self.sunburst_hierarchy.get_values(selected_country)
+            if values[-1] == 0:
+                return empty_figure(height_value=500)
+            return self.sunburst_hierarchy.generate_figure(values)
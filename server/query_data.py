@@ -1,16 +1,26 @@
+import os
 import re
+from functools import lru_cache
 import pandas as pd
-from sqlalchemy import create_engine, MetaData
-from sqlalchemy.ext.automap import automap_base
-from sqlalchemy.orm import sessionmaker, aliased
 from datetime import datetime
 
 
-iso_codes = pd.read_excel("./data/iso_codes.xlsx")
+iso_codes_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "iso_codes.csv")
+
+
+@lru_cache(maxsize=None)
+def load_iso_codes():
+    """``country_name`` to ``alpha_2_code`` table, read on first use."""
+    return pd.read_csv(iso_codes_path)
 
 
 class QueryData:
     def __init__(self, database_url):
+        # SQLAlchemy and the automap extension are only needed to query the database
+        from sqlalchemy import create_engine, MetaData
+        from sqlalchemy.ext.automap import automap_base
+        from sqlalchemy.orm import sessionmaker, aliased
+
         self.engine = create_engine(database_url)
         self.metadata = MetaData()
         self.metadata.reflect(self.engine)
@@ -241,7 +251,7 @@ class QueryData:
         df['receiver_subcategory'] = df['receiver_subcategory'].apply(lambda x: "Other" if x == "Not available" else x)
         df['weighted_intensity'] = pd.to_numeric(df['weighted_intensity'], errors='coerce')
 
-        df = df.merge(iso_codes, left_on="initiator_country_most_common", right_on="country_name", how="left")
+        df = df.merge(load_iso_codes(), left_on="initiator_country_most_common", right_on="country_name", how="left")
         df = df.drop(columns=["country_name"])
 
         df["initiator_country"] = df["initiator_country"].replace("Iran, Islamic Republic of", "Iran")
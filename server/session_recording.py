@@ -0,0 +1,86 @@
+"""Sampled, anonymized recording of the callback requests production sessions send.
+
+A session is identified by a salted hash of the client address and user agent, and sessions are
+sampled as a whole. Each recorded request is appended to ``<directory>/sessions-<pid>.jsonl`` as
+``{"session", "step", "offset_ms", "callback", "body"}``, where ``step`` numbers the requests of a
+session and ``offset_ms`` is the time since its first request. Neither addresses, user agents,
+cookies nor wall-clock times are stored. Recordings are replayed with ``python -m benchmarks.replay``
+and, since they carry the request bodies, can also drive ``python -m benchmarks.loadtest replay``.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from flask import has_request_context, request
+from server.metrics import get_callback_name, get_server_callbacks
+
+
+class SessionRecording:
+    def __init__(self, directory, sample_rate=0.05, salt=None, max_requests=100000, session_timeout=1800):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.salt = (salt or os.urandom(16).hex()).encode()
+        self.max_requests = max_requests
+        self.session_timeout = session_timeout
+        self.sessions = {}
+        self.recorded = 0
+        self.lock = threading.Lock()
+        self.file = None
+        self.pid = None
+        os.makedirs(directory, exist_ok=True)
+
+    def get_session(self):
+        client = f"{request.remote_addr}|{request.user_agent.string}".encode()
+        digest = hashlib.sha256(self.salt + client).hexdigest()
+        # Sampling on the hash keeps or drops every request of a session together
+        if int(digest[:8], 16) / 16 ** 8 >= self.sample_rate:
+            return None
+        return digest[:16]
+
+    def record(self, callback, body):
+        session = self.get_session()
+        if session is None:
+            return
+        now = time.time()
+        with self.lock:
+            if self.recorded >= self.max_requests:
+                return
+            start, step, last = self.sessions.get(session, (now, 0, now))
+            if now - last > self.session_timeout:
+                start, step = now, 0
+            self.sessions[session] = (start, step + 1, now)
+            if len(self.sessions) > 10000:
+                self.sessions = {key: value for key, value in self.sessions.items()
+                                 if now - value[2] <= self.session_timeout}
+            if self.file is None or self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.file = open(os.path.join(self.directory, f"sessions-{self.pid}.jsonl"), "a")
+            self.file.write(json.dumps({
+                "session": session,
+                "step": step,
+                "offset_ms": round((now - start) * 1000),
+                "callback": callback,
+                "body": body,
+            }) + "\n")
+            self.file.flush()
+            self.recorded += 1
+
+    def wrap(self, dispatch, callback):
+        def wrapper(*args, **kwargs):
+            if has_request_context():
+                body = request.get_json(silent=True)
+                if body:
+                    self.record(callback, body)
+            return dispatch(*args, **kwargs)
+
+        wrapper.__wrapped__ = dispatch.__wrapped__
+        return wrapper
+
+
+def record_sessions(app, directory, sample_rate=0.05, **kwargs):
+    """Records sampled sessions of every callback registered on ``app`` so far."""
+    recording = SessionRecording(directory, sample_rate, **kwargs)
+    for key, entry in get_server_callbacks(app):
+        entry["callback"] = recording.wrap(entry["callback"], get_callback_name(key))
+    return recording
@@ -0,0 +1,94 @@
+"""Single-flight execution of identical concurrent callback requests.
+
+When a link to a country is shared, many clients send the same callback requests at once and
+every worker thread computes the same figures. Requests with the same key, the ETag of
+``server.http_caching`` (output, input and state values, changed inputs and data version), that
+arrive while one of them is being computed wait for it and share its serialized response, or its
+exception. A waiting request that times out computes the response itself, so a stuck computation
+only delays the others by the timeout of its callback. Nothing is kept once the computation is
+done, and requests are coalesced per process: with several gunicorn workers, each computes a key
+at most once at a time. Callbacks marked ``session_dependent`` are not coalesced.
+
+The time spent waiting is reported as the ``wait`` phase of the request in ``server.metrics``.
+"""
+import inspect
+import threading
+import time
+from flask import has_request_context, request
+from server.http_caching import get_request_etag
+from server.metrics import add_to_phase, get_callback_name, get_server_callbacks
+
+
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, data_version, timeout=30, timeouts=None, metrics=None):
+        self.data_version = data_version
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+        self.metrics = metrics
+        self.flights = {}
+        self.lock = threading.Lock()
+
+    def run(self, key, timeout, compute, callback=None):
+        """Result of ``compute()``, or of the computation of ``key`` already in flight."""
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Flight()
+        if leader:
+            self.observe(callback, "leader")
+            try:
+                flight.response = compute()
+                return flight.response
+            except BaseException as error:
+                flight.error = error
+                raise
+            finally:
+                with self.lock:
+                    del self.flights[key]
+                flight.done.set()
+
+        start = time.perf_counter()
+        completed = flight.done.wait(timeout)
+        add_to_phase("wait", time.perf_counter() - start)
+        if not completed:
+            self.observe(callback, "timeout")
+            return compute()
+        self.observe(callback, "follower")
+        if flight.error is not None:
+            raise flight.error
+        return flight.response
+
+    def observe(self, callback, outcome):
+        if self.metrics is not None and callback is not None:
+            self.metrics.observe_single_flight(callback, outcome)
+
+    def wrap(self, dispatch, callback):
+        timeout = self.timeouts.get(callback, self.timeout)
+
+        def wrapper(*args, **kwargs):
+            body = request.get_json(silent=True) if has_request_context() else None
+            if not body:
+                return dispatch(*args, **kwargs)
+            return self.run(get_request_etag(body, self.data_version), timeout,
+                            lambda: dispatch(*args, **kwargs), callback)
+
+        wrapper.__wrapped__ = dispatch.__wrapped__
+        return wrapper
+
+
+def coalesce_callbacks(app, data_version, timeout=30, timeouts=None, metrics=None):
+    """Coalesces the identical concurrent requests of every deterministic callback registered on
+    ``app`` so far; ``timeouts`` overrides ``timeout`` for some callbacks, by callback name."""
+    single_flight = SingleFlight(data_version, timeout, timeouts, metrics)
+    for key, entry in get_server_callbacks(app):
+        if not getattr(inspect.unwrap(entry["callback"]), "session_dependent", False):
+            entry["callback"] = single_flight.wrap(entry["callback"], get_callback_name(key))
+    return single_flight
@@ -0,0 +1,224 @@
+"""Profiles of callback requests slower than a latency threshold.
+
+Every callback request is profiled while it runs, either by sampling its thread's stack at a fixed
+interval (``mode="sample"``, the default) or with ``cProfile`` (``mode="cprofile"``, deterministic
+but slower). The profile is kept only when the request exceeds the threshold, and stored with the
+callback id and its normalized inputs. Stored profiles are listed on ``/admin/profiles`` and
+downloaded from ``/admin/profiles/<name>``, as JSON or, with ``?format=folded``, as collapsed stacks
+for flame graph tools (speedscope, flamegraph.pl). ``.pstats`` files of ``cprofile`` captures are
+downloaded directly.
+
+Profiling is off unless a threshold is given, and ``sample_rate`` limits it to a fraction of the
+requests. The sampling thread is started on the first profiled request of each process, so with
+``preload_app`` it runs in the gunicorn workers, never in the master they are forked from.
+"""
+import cProfile
+import json
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from flask import Response, abort, has_request_context, jsonify, request, send_from_directory
+from server.admin import admin_required
+from server.metrics import get_callback_name, get_server_callbacks
+
+
+max_value_size = 1000
+
+
+def get_stack(frame, max_depth=128):
+    """Code objects of a thread's stack, innermost first. Formatting is deferred to ``collapse_stack``
+    so that sampling stays cheap."""
+    codes = []
+    while frame is not None and len(codes) < max_depth:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    return tuple(codes)
+
+
+def collapse_stack(codes):
+    return ";".join(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                    for code in reversed(codes))
+
+
+def normalize_inputs(body):
+    """``{"component-id.property": value}`` of the request inputs and state, with large values
+    such as figures replaced by their size."""
+    values = {}
+    for dependency in body.get("inputs", []) + body.get("state", []):
+        if isinstance(dependency, list):
+            continue
+        value = dependency.get("value")
+        size = len(json.dumps(value, default=str))
+        values[f"{dependency['id']}.{dependency['property']}"] = value if size <= max_value_size else f"<{size} bytes>"
+    return dict(sorted(values.items()))
+
+
+class StackSampler:
+    """Samples the stacks of the threads currently serving a callback request."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = {}
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.thread = None
+        self.pid = None
+
+    def start(self, thread_id):
+        with self.lock:
+            # Threads do not survive a fork, so a forked process starts its own
+            if self.thread is None or self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.samples.clear()
+                self.thread = threading.Thread(target=self.run, name="callback-stack-sampler", daemon=True)
+                self.thread.start()
+            self.samples[thread_id] = Counter()
+        self.wake.set()
+
+    def stop(self, thread_id):
+        with self.lock:
+            return self.samples.pop(thread_id, Counter())
+
+    def run(self):
+        while True:
+            self.wake.wait()
+            frames = sys._current_frames()
+            with self.lock:
+                if not self.samples:
+                    self.wake.clear()
+                    continue
+                for thread_id, counter in self.samples.items():
+                    if thread_id in frames:
+                        counter[get_stack(frames[thread_id])] += 1
+            time.sleep(self.interval)
+
+
+class SlowCallbackProfiler:
+    def __init__(self, directory, threshold_ms=1000, mode="sample", interval=0.005, max_profiles=100,
+                 max_age_days=7, min_interval=60, sample_rate=1.0):
+        self.directory = directory
+        self.threshold = threshold_ms / 1000
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.sampler = StackSampler(interval)
+        self.max_profiles = max_profiles
+        self.max_age = max_age_days * 86400
+        self.min_interval = min_interval
+        self.last_capture = {}
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def wrap(self, dispatch, callback):
+        def wrapper(*args, **kwargs):
+            if random.random() >= self.sample_rate:
+                return dispatch(*args, **kwargs)
+            thread_id = threading.get_ident()
+            profile = cProfile.Profile() if self.mode == "cprofile" else None
+            if profile:
+                profile.enable()
+            else:
+                self.sampler.start(thread_id)
+            start = time.perf_counter()
+            try:
+                return dispatch(*args, **kwargs)
+            finally:
+                duration = time.perf_counter() - start
+                if profile:
+                    profile.disable()
+                stacks = None if profile else self.sampler.stop(thread_id)
+                if duration >= self.threshold and self.should_capture(callback):
+                    self.save(callback, duration, stacks, profile)
+
+        wrapper.__wrapped__ = dispatch.__wrapped__
+        return wrapper
+
+    def should_capture(self, callback):
+        now = time.time()
+        with self.lock:
+            if now - self.last_capture.get(callback, 0) < self.min_interval:
+                return False
+            self.last_capture[callback] = now
+            return True
+
+    def save(self, callback, duration, stacks=None, profile=None):
+        stacks = {collapse_stack(codes): count for codes, count in (stacks or {}).items()}
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{re.sub(r'[^A-Za-z0-9]+', '-', callback)}"
+        leaves = Counter()
+        for stack, count in stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        if profile:
+            stats = pstats.Stats(profile).stats
+            leaves = Counter({f"{function} ({os.path.basename(filename)}:{line})": total_time
+                              for (filename, line, function), (_, _, total_time, _, _) in stats.items()})
+        record = {
+            "name": name,
+            "callback": callback,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "duration_ms": duration * 1000,
+            "mode": self.mode,
+            "inputs": normalize_inputs(request.get_json(silent=True) or {}) if has_request_context() else {},
+            "samples": sum(leaves.values()) if stacks else None,
+            "top_functions": leaves.most_common(20),
+            "stacks": stacks,
+        }
+        with open(os.path.join(self.directory, f"{name}.json"), "w") as file:
+            json.dump(record, file)
+        if profile:
+            profile.dump_stats(os.path.join(self.directory, f"{name}.pstats"))
+        self.prune()
+
+    def list_profiles(self):
+        profiles = []
+        for filename in sorted(os.listdir(self.directory), reverse=True):
+            if filename.endswith(".json"):
+                with open(os.path.join(self.directory, filename)) as file:
+                    record = json.load(file)
+                profiles.append({key: record[key] for key in ["name", "callback", "created", "duration_ms", "mode",
+                                                              "inputs"]})
+        return profiles
+
+    def prune(self):
+        now = time.time()
+        names = sorted({filename.rsplit(".", 1)[0] for filename in os.listdir(self.directory)}, reverse=True)
+        for index, name in enumerate(names):
+            path = os.path.join(self.directory, f"{name}.json")
+            expired = os.path.exists(path) and now - os.path.getmtime(path) > self.max_age
+            if index >= self.max_profiles or expired:
+                for extension in [".json", ".pstats"]:
+                    if os.path.exists(os.path.join(self.directory, name + extension)):
+                        os.remove(os.path.join(self.directory, name + extension))
+
+    def register_routes(self, server):
+        @admin_required
+        def list_profiles():
+            return jsonify(self.list_profiles())
+
+        @admin_required
+        def download_profile(name):
+            if name.endswith(".pstats"):
+                return send_from_directory(self.directory, name, as_attachment=True)
+            path = os.path.join(self.directory, f"{os.path.basename(name)}.json")
+            if not os.path.exists(path):
+                abort(404)
+            if request.args.get("format") != "folded":
+                return send_from_directory(self.directory, f"{os.path.basename(name)}.json")
+            with open(path) as file:
+                stacks = json.load(file)["stacks"]
+            return Response("".join(f"{stack} {count}\n" for stack, count in stacks.items()), mimetype="text/plain")
+
+        server.add_url_rule("/admin/profiles", "list_profiles", list_profiles)
+        server.add_url_rule("/admin/profiles/<name>", "download_profile", download_profile)
+
+
+def profile_slow_callbacks(app, directory, threshold_ms=1000, **kwargs):
+    """Profiles every callback registered on ``app`` so far and serves the profiles on ``/admin/profiles``."""
+    profiler = SlowCallbackProfiler(directory, threshold_ms, **kwargs)
+    for key, entry in get_server_callbacks(app):
+        entry["callback"] = profiler.wrap(entry["callback"], get_callback_name(key))
+    profiler.register_routes(app.server)
+    return profiler
@@ -0,0 +1,115 @@
+"""Times the phases of the application start-up and records the memory and row counts after each one.
+
+``main.py`` logs a summary once the app is built and, when ``STARTUP_PROFILE`` is set, writes a
+JSON report to that path:
+
+    STARTUP_PROFILE=startup_profile.json gunicorn 'main:create_server()'
+"""
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_rss_mb():
+    """Current resident set size of the process, or the peak one where ``/proc`` is not available."""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return get_peak_rss_mb()
+
+
+def get_peak_rss_mb():
+    """Peak resident set size of the process. ``ru_maxrss`` survives ``exec``, so in a process
+    started by a larger one it reports the parent's peak: ``VmHWM`` is read instead where available."""
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 2 ** 10
+    except (OSError, ValueError):
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+class Stage:
+    def __init__(self, name):
+        self.name = name
+        self.rows = None
+        self.columns = None
+
+    def set_result(self, df):
+        """Records the shape of the frame a stage produced."""
+        self.rows, self.columns = df.shape
+        return df
+
+
+class StartupProfiler:
+    def __init__(self, phases=()):
+        """``phases`` were recorded before, by another profiler, and count in the total."""
+        self.start = time.perf_counter() - sum(phase["seconds"] for phase in phases)
+        self.phases = list(phases)
+
+    @contextmanager
+    def phase(self, name):
+        stage = Stage(name)
+        rss_before = get_rss_mb()
+        start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield stage
+        finally:
+            rss_after = get_rss_mb()
+            self.phases.append({
+                "name": name,
+                "seconds": time.perf_counter() - start,
+                "cpu_seconds": time.process_time() - cpu_start,
+                "rss_before_mb": rss_before,
+                "rss_after_mb": rss_after,
+                "rss_delta_mb": rss_after - rss_before,
+                "rows": stage.rows,
+                "columns": stage.columns,
+            })
+
+    def run(self, name, func, *args, **kwargs):
+        """Calls ``func`` as a phase and records the shape of the frame it returns."""
+        with self.phase(name) as stage:
+            result = func(*args, **kwargs)
+            if hasattr(result, "shape"):
+                stage.set_result(result)
+        return result
+
+    def report(self):
+        return {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "pid": os.getpid(),
+            "total_seconds": time.perf_counter() - self.start,
+            "peak_rss_mb": get_peak_rss_mb(),
+            "phases": self.phases,
+        }
+
+    def summary(self):
+        report = self.report()
+        lines = [f"Start-up took {report['total_seconds']:.2f} s, peak RSS {report['peak_rss_mb']:.0f} MB"]
+        for phase in self.phases:
+            rows = f", {phase['rows']} rows" if phase["rows"] is not None else ""
+            lines.append(f"  {phase['name']:<32} {phase['seconds']:8.3f} s  "
+                         f"{phase['rss_delta_mb']:+8.1f} MB{rows}")
+        return "\n".join(lines)
+
+    def finish(self, path=None):
+        """Logs the summary and writes the JSON report to ``path`` if given."""
+        logger.info(self.summary())
+        if path:
+            with open(path, "w") as file:
+                json.dump(self.report(), file, indent=2)
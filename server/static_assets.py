@@ -0,0 +1,47 @@
+import os
+import json
+import re
+from flask import request
+
+
+assets_folder = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+manifest_path = os.path.join(assets_folder, "dist", "manifest.json")
+immutable_cache_control = "public, max-age=31536000, immutable"
+
+
+def load_manifest(path=manifest_path):
+    """The ``assets/dist/manifest.json`` written by ``build_assets.py bundle``, or ``None`` when the
+    bundle has not been built."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        return json.load(file)
+
+
+manifest = load_manifest()
+
+
+def asset_url(path):
+    """URL of ``assets/<path>``, its fingerprinted copy in ``assets/dist/`` when there is one."""
+    if manifest and path in manifest["files"]:
+        return f"/assets/dist/{manifest['files'][path]}"
+    return f"/assets/{path}"
+
+
+def get_assets_options():
+    """``dash.Dash`` arguments that serve the bundle instead of the stylesheets and scripts it was
+    built from, or that skip ``assets/dist/`` when it has not been built."""
+    if not manifest:
+        return {"assets_path_ignore": ["dist"]}
+    names = sorted({os.path.basename(path) for path in manifest["bundled"]})
+    return {"assets_ignore": "^(" + "|".join(re.escape(name) for name in names) + ")$"}
+
+
+def register_cache_headers(server):
+    """Lets browsers and proxies keep the fingerprinted files for a year without revalidating
+    them: a new build changes their names."""
+    @server.after_request
+    def set_cache_headers(response):
+        if response.status_code == 200 and request.path.startswith("/assets/dist/"):
+            response.headers["Cache-Control"] = immutable_cache_control
+        return response
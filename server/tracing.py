@@ -0,0 +1,156 @@
+"""Opt-in tracing of callback requests, exported in the Chrome trace event format.
+
+Each traced callback request produces a root span with nested spans for:
+
+- ``normalize_inputs``: Dash's parsing of the request into callback arguments,
+- the callback function itself,
+- the data filtering helpers, pandas groupby/pivot aggregations and the figure-building functions
+  called from it, annotated with their input and output row counts,
+- ``serialize``: preparing and JSON-encoding the response, annotated with its size in bytes.
+
+Every process appends its spans to ``<directory>/trace-<pid>.json``, which opens in
+chrome://tracing, https://ui.perfetto.dev or speedscope.
+"""
+import json
+import os
+import random
+import threading
+import time
+from functools import wraps
+import pandas as pd
+from pandas.core.groupby import DataFrameGroupBy, SeriesGroupBy
+
+
+aggregation_methods = [
+    (DataFrameGroupBy, ["agg", "aggregate", "apply", "count", "mean", "nunique", "size", "sum"]),
+    (SeriesGroupBy, ["agg", "aggregate", "apply", "count", "mean", "nunique", "size", "sum"]),
+    (pd.DataFrame, ["pivot", "pivot_table", "value_counts"]),
+    (pd.Series, ["value_counts"]),
+]
+
+_local = threading.local()
+
+
+def get_rows(obj):
+    obj = getattr(obj, "obj", obj)
+    shape = getattr(obj, "shape", None)
+    return shape[0] if shape else None
+
+
+def call_traced(category, func, args, kwargs):
+    """Calls ``func`` and records it as a span of the trace being recorded on this thread, if any."""
+    spans = getattr(_local, "spans", None)
+    if spans is None:
+        return func(*args, **kwargs)
+    start = time.perf_counter()
+    result = None
+    try:
+        result = func(*args, **kwargs)
+        return result
+    finally:
+        span_args = {}
+        if args and get_rows(args[0]) is not None:
+            span_args["rows_in"] = get_rows(args[0])
+        if get_rows(result) is not None:
+            span_args["rows_out"] = get_rows(result)
+        spans.append((func.__qualname__, category, start, time.perf_counter(), span_args))
+
+
+def traced(category):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return call_traced(category, func, args, kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_pandas():
+    """Traces pandas aggregations as ``aggregate`` spans. Applied once per process."""
+    if getattr(pd.DataFrame, "_traced", False):
+        return
+    for cls, methods in aggregation_methods:
+        for method in methods:
+            setattr(cls, method, traced("aggregate")(getattr(cls, method)))
+    pd.DataFrame._traced = True
+
+
+class Tracer:
+    def __init__(self, directory, sample_rate=1.0):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.offset = time.time() - time.perf_counter()
+        self.lock = threading.Lock()
+        self.file = None
+        self.pid = None
+        os.makedirs(directory, exist_ok=True)
+
+    def make_event(self, name, category, start, end, args=None):
+        return {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round((start + self.offset) * 1e6),
+            "dur": round((end - start) * 1e6),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args or {},
+        }
+
+    def write(self, events):
+        with self.lock:
+            # Reopened after a fork, so that every gunicorn worker writes its own file
+            if self.file is None or self.pid != os.getpid():
+                self.pid = os.getpid()
+                path = os.path.join(self.directory, f"trace-{self.pid}.json")
+                is_new = not os.path.exists(path)
+                self.file = open(path, "a")
+                if is_new:
+                    # The trace event format allows the closing bracket of the array to be omitted
+                    self.file.write("[\n")
+            self.file.write("".join(json.dumps(event) + ",\n" for event in events))
+            self.file.flush()
+
+    def trace_request(self, dispatch, callback):
+        """Wraps the function Dash dispatches a callback request to."""
+        def wrapper(*args, **kwargs):
+            if getattr(_local, "spans", None) is not None or random.random() >= self.sample_rate:
+                return dispatch(*args, **kwargs)
+            _local.spans = []
+            start = time.perf_counter()
+            response = None
+            try:
+                response = dispatch(*args, **kwargs)
+                return response
+            finally:
+                end = time.perf_counter()
+                spans = _local.spans
+                _local.spans = None
+                self.write(self.build_events(callback, start, end, spans, response, kwargs))
+
+        wrapper.__wrapped__ = dispatch.__wrapped__
+        return wrapper
+
+    def build_events(self, callback, start, end, spans, response, kwargs):
+        callback_context = kwargs.get("callback_context") or {}
+        triggered = [item["prop_id"] for item in callback_context.get("triggered_inputs", [])]
+        size = len(response) if isinstance(response, str) else 0
+        events = [self.make_event(callback, "request", start, end, {
+            "triggered": triggered, "response_bytes": size, "prevented": response is None
+        })]
+        function = next((span for span in spans if span[1] == "callback"), None)
+        if function:
+            events.append(self.make_event("normalize_inputs", "dash", start, function[2]))
+            events.append(self.make_event("serialize", "dash", function[3], end, {"response_bytes": size}))
+        events += [self.make_event(*span) for span in spans]
+        return events
+
+
+def trace_callbacks(app, directory, sample_rate=1.0):
+    """Traces the callbacks registered on ``app`` through ``server.metrics.track_callbacks``."""
+    from server.metrics import get_callback_name, get_server_callbacks
+    tracer = Tracer(directory, sample_rate)
+    instrument_pandas()
+    for key, entry in get_server_callbacks(app):
+        entry["callback"] = tracer.trace_request(entry["callback"], get_callback_name(key))
+    return tracer
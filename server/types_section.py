@@ -1,11 +1,10 @@
 from dash.dependencies import Input, Output, State
 from dash import ctx, html
 import plotly.graph_objects as go
-import re
 import json
-import pandas as pd
 from dash_iconify import DashIconify
 from server.utils import filter_data, empty_figure, incident_types_color_map
+from server.metrics import timed_phase
 
 
 chosen_types = ["Data theft", "DDoS/Defacement", "Ransomware", "Wiper", "Hack and leak", "Other"]
@@ -25,7 +24,27 @@ mitre_impact_definitions = {
     "System Shutdown/Reboot": "Shutdown/reboot of systems to interrupt access to,<br>or aid in the destruction of, those systems."
 }
 
-mitre_impact_definitions = pd.DataFrame(mitre_impact_definitions.items(), columns=["impact", "definition"])
+aggregate_graph_hovertemplate = "Type: %{fullData.name}<br>Sector: %{y}<br>%{x:.2f}% (%{customdata[0]})<extra></extra>"
+
+mitre_impacts = list(mitre_impact_definitions)
+
+# The definitions are looked up in the browser from this static table, by the impact index each bar
+# carries as customdata, instead of being sent with every impact graph
+add_impact_definitions = """function (figure) {
+    var definitions = %s;
+    var trace = figure && figure.data && figure.data[0];
+    if (!trace || !trace.customdata || trace.hovertext) {
+        return window.dash_clientside.no_update;
+    }
+    var data = figure.data.slice();
+    data[0] = Object.assign({}, trace, {hovertext: trace.customdata.map(function (index) {
+        return definitions[index];
+    })});
+    return Object.assign({}, figure, {data: data});
+}""" % json.dumps([mitre_impact_definitions[impact] for impact in mitre_impacts])
+
+impact_graph_hovertemplate = "<b>%{x}</b><br><b>%{y}</b> incidents<br>%{hovertext}<extra></extra>"
+
 
 def generate_graph_subtitle(default=True, text=None):
     if default:
@@ -61,6 +80,7 @@ functional_category_array_list = [
 ]
 
 
+@timed_phase("figure")
 def generate_aggregate_graph(data):
     df_clean = data.groupby(["receiver_subcategory", "type_clean"]).agg(
                     {"id": "nunique", "weighted_intensity": "mean"}).reset_index()
@@ -75,20 +95,16 @@ def generate_aggregate_graph(data):
     pivot_df = pivot_df[
         [incident_type for incident_type in chosen_types if incident_type in pivot_df.columns]]
     pivot_df = pivot_df.reindex(total_count_per_sector.sort_values(ascending=True).index)
-    counts_dict = {(row['receiver_subcategory'], row['type_clean']): row['id']
-                   for _, row in grouped_df.iterrows()}
+    counts_df = grouped_df.pivot(index='receiver_subcategory', columns='type_clean', values='id')
+    counts_df = counts_df.reindex(index=pivot_df.index, columns=pivot_df.columns).fillna(0).astype(int)
 
     bars = [
         go.Bar(
             name=incident_type,
-            x=pivot_df[incident_type],
+            x=pivot_df[incident_type].round(2),
             y=pivot_df.index,
             orientation='h',
-            hovertext=[
-                f"Type: {incident_type}<br>Sector: {sector}<br>{percentage:.2f}% ({counts_dict.get((sector, incident_type), 0)})"
-                for sector, percentage in zip(pivot_df.index, pivot_df[incident_type])
-            ],
-            hoverinfo='text',
+            customdata=[[count, chosen_types.index(incident_type)] for count in counts_df[incident_type]],
             marker=dict(color=incident_types_color_map["full_opacity"][incident_type]),
         ) for incident_type in pivot_df.columns
     ]
@@ -96,6 +112,7 @@ def generate_aggregate_graph(data):
     aggregate_fig = go.Figure(data=bars)
 
     aggregate_fig.update_layout(
+        template_data_bar=[{"hovertemplate": aggregate_graph_hovertemplate}],
         barmode='stack',
         title='',
         xaxis_title='Percentage',
@@ -112,6 +129,7 @@ def generate_aggregate_graph(data):
     return aggregate_fig
 
 
+@timed_phase("figure")
 def generate_impact_graph(data=None, clicked_category=None, clicked_type=None, click_data=None):
     if click_data:
         data = data[
@@ -121,13 +139,15 @@ def generate_impact_graph(data=None, clicked_category=None, clicked_type=None, c
 
     df_group = data.groupby("impact").agg({"id": "nunique"}).reset_index()
     df_group = df_group.sort_values(by="id", ascending=False)
-    df_group = df_group.merge(mitre_impact_definitions, on="impact")
+    df_group = df_group[df_group["impact"].isin(mitre_impact_definitions.keys())]
 
-    fig = go.Figure(data=[go.Bar(x=df_group["impact"], y=df_group["id"], customdata=df_group["definition"])])
+    fig = go.Figure(data=[go.Bar(x=df_group["impact"], y=df_group["id"],
+                                 customdata=df_group["impact"].map(mitre_impacts.index))])
     fig.update_traces(marker_color='#668088', marker_line_color='#002C38',
-                      marker_line_width=1.5, opacity=1, hovertemplate='<b>%{x}</b><br><b>%{y}</b> incidents<br>%{customdata}<extra></extra>')
+                      marker_line_width=1.5, opacity=1)
 
     fig.update_layout(
+        template_data_bar=[{"hovertemplate": impact_graph_hovertemplate}],
         plot_bgcolor='rgba(0,0,0,0)',
         paper_bgcolor='rgba(0,0,0,0)',
         barcornerradius=8,
@@ -148,6 +168,7 @@ def generate_impact_graph(data=None, clicked_category=None, clicked_type=None, c
     return fig
 
 
+@timed_phase("figure")
 def generate_impact_type_graph(data=None, impact_type=None, text_column=None, marker_color=None, marker_line_color=None, category_array_list=None):
     if text_column:
         agg_data = data.groupby([impact_type, text_column]).agg({"id": "nunique"}).reset_index()
@@ -193,6 +214,12 @@ def generate_impact_type_graph(data=None, impact_type=None, text_column=None, ma
     return fig
 
 
+def get_clicked_type(click_data):
+    incident_type_index = click_data['points'][0]['customdata'][1]
+    return chosen_types[incident_type_index]
+
+
+@timed_phase("filter")
 def filter_data_click_data(data, category=None, incident_type=None, impact=None):
     conditions = {}
     if category is not None:
@@ -228,7 +255,9 @@ class Types:
             techniques_graph_id=None,
             year_slider_id=None,
             reset_button=None,
-            last_selected_stack=None
+            last_selected_stack=None,
+            country_id="selected-country",
+            country_property="value"
     ):
         self.app = app
         self.df = df[~df["receiver_subcategory"].isin(["Not available", "Other"])]
@@ -248,8 +277,9 @@ class Types:
         self.techniques_dropdown_types_id = techniques_dropdown_types_id
         self.year_slider_id = year_slider_id
         self.reset_button = reset_button
-        self.last_selected = None
         self.last_selected_stack = last_selected_stack
+        self.country_id = country_id
+        self.country_property = country_property
 
         self.initialize_callbacks()
 
@@ -259,6 +289,7 @@ class Types:
         self.reset_year_slider()
         self.reset_drop_downs()
         self.techniques_graph()
+        self.impact_definitions()
 
     def aggregate_graph(self):
         @self.app.callback(
@@ -269,21 +300,23 @@ class Types:
             Output(self.aggregate_graph_subtitle_id, "children"),
             Output(self.impact_graph_title_year_id, "children"),
             Output(self.impact_graph_subtitle_id, "children"),
-            [Input("selected-country", "value"),
+            [Input(self.country_id, self.country_property),
              Input(self.year_slider_id, "value"),
              Input(self.aggregate_graph_id, 'clickData'),
              Input(self.reset_button, 'n_clicks')],
-            [State(self.aggregate_graph_id, 'figure')]
+            [State(self.aggregate_graph_id, 'figure'),
+             State(self.last_selected_stack, 'data')]
         )
-        def update_aggregate_graph(selected_country, selected_year, clickData, n_clicks, aggregate_fig):
+        def update_aggregate_graph(selected_country, selected_year, clickData, n_clicks, aggregate_fig, last_selected):
+            # The [type, category] selected by the previous click, as stored by this callback
+            last_selected = (json.loads(last_selected) if isinstance(last_selected, str) else last_selected) or None
 
             year_title = f' in {selected_year}' if selected_year != 2025 else ""
             default_aggregate_subtitle = generate_graph_subtitle(text=" Click on sectors in the bar chart to filter graphs.")
             default_impact_subtitle = generate_graph_subtitle(text=" Click on sectors in the bar chart to filter graphs.")
 
             triggered_id = ctx.triggered_id
-            if triggered_id == self.reset_button or triggered_id == self.year_slider_id or triggered_id == "selected-country":
-                self.last_selected = None
+            if triggered_id == self.reset_button or triggered_id == self.year_slider_id or triggered_id == self.country_id:
                 df_filtered = filter_data(self.df.copy(deep=True), selected_country, selected_year)
                 if df_filtered.empty:
                     return empty_figure(), empty_figure(), [], year_title, default_aggregate_subtitle, year_title, default_impact_subtitle
@@ -306,17 +339,15 @@ class Types:
 
                 if clickData:
                     clicked_category = clickData['points'][0]['y']
-                    hover_info = clickData['points'][0]['hovertext']
-                    type_match = re.search(r"Type: (.*?)<br>", hover_info)
-                    clicked_type = type_match.group(1) if type_match else None
+                    clicked_type = get_clicked_type(clickData)
 
-                    if [clicked_type, clicked_category] == self.last_selected:
+                    if [clicked_type, clicked_category] == last_selected:
 
                         for i, trace in enumerate(aggregate_fig['data']):
                             trace['marker']['color'] = [incident_types_color_map["full_opacity"][trace['name']] for _ in
                                                         trace['y']]
 
-                        self.last_selected = None
+                        last_selected = None
 
                         impact_fig = generate_impact_graph(data=df_filtered)
                         aggregate_subtitle = default_aggregate_subtitle
@@ -339,7 +370,7 @@ class Types:
                                     incident_types_color_map["low_opacity"][trace['name']] for _ in trace['y']
                                 ]
 
-                        self.last_selected = [clicked_type, clicked_category]
+                        last_selected = [clicked_type, clicked_category]
 
                         impact_fig = generate_impact_graph(
                             data=df_filtered,
@@ -351,17 +382,25 @@ class Types:
                         aggregate_subtitle = generate_graph_subtitle(default=False, text=f" {clicked_category} - {clicked_type} selected")
                         impact_subtitle = generate_graph_subtitle(default=False, text=f" {clicked_category} - {clicked_type} selected")
 
-                return aggregate_fig, impact_fig, json.dumps(self.last_selected), year_title, aggregate_subtitle, year_title, impact_subtitle
+                return aggregate_fig, impact_fig, json.dumps(last_selected), year_title, aggregate_subtitle, year_title, impact_subtitle
+
+    def impact_definitions(self):
+        self.app.clientside_callback(
+            add_impact_definitions,
+            Output(self.impact_graph_id, "figure", allow_duplicate=True),
+            Input(self.impact_graph_id, "figure"),
+            prevent_initial_call="initial_duplicate",
+        )
 
     def reset_year_slider(self):
         @self.app.callback(
             Output(self.year_slider_id, "value"),
-            Input("selected-country", "value"),
+            Input(self.country_id, self.country_property),
             State(self.year_slider_id, "value")
         )
         def reset_year_slider(selected_country, current_year):
             triggered_id = ctx.triggered_id
-            if triggered_id == "selected-country":
+            if triggered_id == self.country_id:
                 return 2025
             return current_year
 
@@ -371,7 +410,7 @@ class Types:
             Output(self.functional_impact_graph_id, 'figure'),
             Output(self.intelligence_impact_graph_subtitle_id, 'children'),
             Output(self.functional_impact_graph_subtitle_id, 'children'),
-            [Input('selected-country', 'value'),
+            [Input(self.country_id, self.country_property),
              Input(self.year_slider_id, "value"),
              Input(self.aggregate_graph_id, 'clickData'),
              Input(self.impact_graph_id, 'clickData'),
@@ -387,7 +426,7 @@ class Types:
                 n_clicks
         ):
             triggered_id = ctx.triggered_id
-            if triggered_id == self.reset_button or triggered_id == self.year_slider_id or triggered_id == "selected-country":
+            if triggered_id == self.reset_button or triggered_id == self.year_slider_id or triggered_id == self.country_id:
                 impact_graph_click_data = None
                 aggregate_graph_click_data = None
                 df_clean = filter_data(self.df.copy(deep=True), selected_country, selected_year)
@@ -421,9 +460,7 @@ class Types:
 
                 if aggregate_graph_click_data:
                     clicked_category = aggregate_graph_click_data['points'][0]['y']
-                    hover_info = aggregate_graph_click_data['points'][0]['hovertext']
-                    type_match = re.search(r"Type: (.*?)<br>", hover_info)
-                    clicked_type = type_match.group(1) if type_match else None
+                    clicked_type = get_clicked_type(aggregate_graph_click_data)
                 else:
                     clicked_category = None
                     clicked_type = None
@@ -465,20 +502,20 @@ class Types:
         @self.app.callback(
             Output(self.techniques_dropdown_sectors_id, 'value'),
             Output(self.techniques_dropdown_types_id, 'value'),
-            [Input('selected-country', 'value')],
+            [Input(self.country_id, self.country_property)],
             [State(self.techniques_dropdown_sectors_id, 'value'),
              State(self.techniques_dropdown_types_id, 'value')]
         )
         def reset_drop_downs(selected_country, current_sector_value, current_type_value):
             triggered_id = ctx.triggered_id
-            if triggered_id == "selected-country":
+            if triggered_id == self.country_id:
                 return "all", "all"
             return current_sector_value, current_type_value
 
     def techniques_graph(self):
         @self.app.callback(
             Output(self.techniques_graph_id, 'figure'),
-            [Input('selected-country', 'value'),
+            [Input(self.country_id, self.country_property),
              Input(self.techniques_dropdown_sectors_id, 'value'),
              Input(self.techniques_dropdown_types_id, 'value')]
         )
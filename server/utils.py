@@ -1,9 +1,16 @@
+import json
+import os
+from functools import lru_cache
 import plotly.graph_objects as go
-from dash import dcc
+from dash import dcc, html
 import pandas as pd
+import numpy as np
 from datetime import datetime
+from server.metrics import timed_phase
 
 
+flags_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "flags.json")
+
 sectors_color_map = {
     "Finance": "#002C38",
     "Health": "#CC0130",
@@ -81,32 +88,34 @@ def generate_year_slider(id_name=None):
     return year_slider
 
 
-def filter_data(df, selected_country, selected_year=None, date_range=None):
-    states_codes = {
-        "Global (states)": None,
-        "Asia (states)": "ASIA",
-        "Central America (states)": "CENTAM",
-        "Central Asia (states)": "CENTAS",
-        "Collective Security Treaty Organization (states)": "CSTO",
-        "EU (member states)": "EU",
-        "Eastern Asia (states)": "EASIA",
-        "Europe (states)": "EUROPE",
-        "Gulf Countries (states)": "GULFC",
-        "Mena Region (states)": "MENA",
-        "Middle East (states)": "MEA",
-        "NATO (member states)": "NATO",
-        "North Africa (states)": "NAF",
-        "Northeast Asia (states)": "NEA",
-        "Oceania (states)": "OC",
-        "Shanghai Cooperation Organisation (states)": "SCO",
-        "South Asia (states)": "SASIA",
-        "South China Sea (states)": "SCS",
-        "Southeast Asia (states)": "SEA",
-        "Sub-Saharan Africa (states)": "SSA",
-        "Western Balkans (states)": "WBALKANS",
-        "Africa (states)": "AFRICA",
-    }
+states_codes = {
+    "Global (states)": None,
+    "Asia (states)": "ASIA",
+    "Central America (states)": "CENTAM",
+    "Central Asia (states)": "CENTAS",
+    "Collective Security Treaty Organization (states)": "CSTO",
+    "EU (member states)": "EU",
+    "Eastern Asia (states)": "EASIA",
+    "Europe (states)": "EUROPE",
+    "Gulf Countries (states)": "GULFC",
+    "Mena Region (states)": "MENA",
+    "Middle East (states)": "MEA",
+    "NATO (member states)": "NATO",
+    "North Africa (states)": "NAF",
+    "Northeast Asia (states)": "NEA",
+    "Oceania (states)": "OC",
+    "Shanghai Cooperation Organisation (states)": "SCO",
+    "South Asia (states)": "SASIA",
+    "South China Sea (states)": "SCS",
+    "Southeast Asia (states)": "SEA",
+    "Sub-Saharan Africa (states)": "SSA",
+    "Western Balkans (states)": "WBALKANS",
+    "Africa (states)": "AFRICA",
+}
+
 
+@timed_phase("filter")
+def filter_data(df, selected_country, selected_year=None, date_range=None):
     if selected_country in states_codes.keys():
         selected_country = states_codes[selected_country]
         if selected_country and selected_country != "Global (states)":
@@ -126,11 +135,72 @@ def filter_data(df, selected_country, selected_year=None, date_range=None):
             df = df
         else:
             df["start_date"] = pd.to_datetime(df["start_date"])
-            df = df[(df["start_date"] >= date_range[0]) & (df["start_date"] <= date_range[1])]
+            # The picker sends None for an end that is not chosen yet
+            if date_range[0] is not None:
+                df = df[df["start_date"] >= date_range[0]]
+            if date_range[1] is not None:
+                df = df[df["start_date"] <= date_range[1]]
 
     return df
 
 
+def lttb_indices(x, y, threshold):
+    """Indices of the points kept by the Largest-Triangle-Three-Buckets algorithm.
+
+    The first and last points are always kept; every bucket in between keeps the point
+    forming the largest triangle with the previously kept point and the next bucket's mean.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    bucket_edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    indices = np.empty(threshold, dtype=int)
+    indices[0] = 0
+    indices[-1] = n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = bucket_edges[i], bucket_edges[i + 1]
+        next_start, next_end = end, bucket_edges[i + 2] if i + 2 < len(bucket_edges) else n
+        next_x = x[next_start:next_end].mean()
+        next_y = y[next_start:next_end].mean()
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous]) -
+            (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        indices[i + 1] = previous
+    return indices
+
+
+def downsample_indices(dates, values, visible_range=None, max_points=400):
+    """At most ``max_points`` indices to plot for a daily series: LTTB over the whole range, or
+    full resolution inside ``visible_range`` (when it fits) with a coarse outline outside it."""
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+
+    dates = pd.to_datetime(pd.Series(dates)).reset_index(drop=True)
+    x = dates.astype("int64").to_numpy()
+    values = np.asarray(values, dtype=float)
+    if visible_range is None:
+        return lttb_indices(x, values, max_points)
+
+    before = np.flatnonzero((dates < visible_range[0]).to_numpy())
+    after = np.flatnonzero((dates > visible_range[1]).to_numpy())
+    inside = np.flatnonzero(((dates >= visible_range[0]) & (dates <= visible_range[1])).to_numpy())
+    outline = [
+        segment[lttb_indices(x[segment], values[segment], max_points // 8)]
+        for segment in (before, after) if len(segment)
+    ]
+    budget = max_points - sum(len(segment) for segment in outline)
+    segments = outline + [inside[lttb_indices(x[inside], values[inside], budget)]]
+    return np.unique(np.concatenate(segments))
+
+
+@timed_phase("figure")
 def empty_figure(height_value=400):
     fig = go.Figure()
     fig.update_layout(
@@ -190,3 +260,24 @@ def graph_config(image_name):
         }
     }
     return config
+
+
+def plotly_express():
+    """``plotly.express``, imported by the first figure that needs it: the import takes a tenth of
+    a second, which is kept off the app's import path."""
+    import plotly.express as px
+    return px
+
+
+@lru_cache(maxsize=None)
+def load_flags():
+    """``{code: data URI}`` of the flags built by ``build_assets.py``, read on first use."""
+    with open(flags_path) as file:
+        return json.load(file)
+
+
+def flag_icon(alpha_2_code):
+    """Flag of a country inlined as a data URI, 25px wide."""
+    flags = load_flags()
+    code = alpha_2_code.lower() if alpha_2_code.lower() in flags else "unknown"
+    return html.Img(src=flags[code], alt=code, style={"width": "25px"})
@@ -0,0 +1,90 @@
+"""Warm-up of the callbacks before a server takes traffic.
+
+The first call of a callback in a process pays for plotly's lazily imported validators, pandas
+code paths and the section caches, which adds up to seconds on the first page load a worker serves.
+``warm_up`` calls every callback the renderer calls on page load, with the values of the initial
+layout, and serializes its output. The functions are called directly rather than through the
+server, so that Flask's setup stays open and the warm-up calls do not show up in metrics, traces
+or session recordings. With gunicorn's ``preload_app``, this runs once in the master and the
+workers inherit the warmed-up state.
+"""
+import json
+import logging
+import time
+from contextvars import copy_context
+from dash._callback_context import context_value
+from dash._utils import AttributeDict
+from dash.exceptions import PreventUpdate
+from plotly.io.json import to_json_plotly
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_layout_values(layout):
+    """``{"component-id.property": value}`` of every identified component in a serialized layout."""
+    values = {}
+    stack = [layout]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict) and "props" in node:
+            props = node["props"]
+            if isinstance(props.get("id"), str):
+                values.update({f"{props['id']}.{prop}": value for prop, value in props.items()})
+            stack.extend(value for value in props.values() if isinstance(value, (list, dict)))
+    return values
+
+
+def build_request(output, entry, values):
+    """Body of the ``/_dash-update-component`` request for ``entry`` with the given values."""
+    return {
+        "output": output,
+        "inputs": [dict(dependency, value=values.get(f"{dependency['id']}.{dependency['property']}"))
+                   for dependency in entry["inputs"]],
+        "state": [dict(dependency, value=values.get(f"{dependency['id']}.{dependency['property']}"))
+                  for dependency in entry["state"]],
+        "changedPropIds": [],
+    }
+
+
+def call_request(entry, body):
+    """Calls the function of a callback with the input and state values of a request body, with a
+    callback context set as Dash would set it."""
+    function = entry["callback"].__wrapped__
+    dependencies = body.get("inputs", []) + body.get("state", [])
+    arguments = [[item.get("value") for item in dependency] if isinstance(dependency, list)
+                 else dependency.get("value") for dependency in dependencies]
+    values = {f"{dependency['id']}.{dependency['property']}": dependency.get("value")
+              for dependency in dependencies if isinstance(dependency, dict)}
+    triggered_inputs = [{"prop_id": prop_id, "value": values.get(prop_id)}
+                        for prop_id in body.get("changedPropIds", [])]
+
+    def run():
+        context_value.set(AttributeDict(triggered_inputs=triggered_inputs))
+        return function(*arguments)
+
+    return copy_context().run(run)
+
+
+def warm_up(app):
+    """Calls every callback the renderer calls on page load; returns ``(calls, errors, seconds)``."""
+    start = time.perf_counter()
+    values = get_layout_values(json.loads(to_json_plotly(app.layout)))
+    calls, errors = 0, 0
+    for callback in app._callback_list:
+        if callback.get("prevent_initial_call") or callback.get("clientside_function"):
+            continue
+        output, entry = callback["output"], app.callback_map[callback["output"]]
+        calls += 1
+        try:
+            to_json_plotly(call_request(entry, build_request(output, entry, values)))
+        except PreventUpdate:
+            pass
+        except Exception as error:
+            errors += 1
+            logger.warning("Warm-up of %s failed: %r", output, error)
+    elapsed = time.perf_counter() - start
+    logger.info("Warmed up %d callbacks in %.2f s", calls, elapsed)
+    return calls, errors, elapsed
@@ -0,0 +1,13 @@
+import pytest
+from benchmarks.fixtures import load_fixture
+
+
+@pytest.fixture(scope="session")
+def fixture_data():
+    """``(df, subtype_df, nb_incidents)`` of the local fixture dataset."""
+    return load_fixture(1)
+
+
+@pytest.fixture(scope="session")
+def df(fixture_data):
+    return fixture_data[0]
@@ -0,0 +1,34 @@
+"""Wiring of the callbacks registered by ``server.app.create_app``."""
+import json
+import pytest
+from benchmarks.harness import CallbackInvoker
+from server.app import create_app
+from server.types_section import get_clicked_type
+
+
+@pytest.mark.parametrize("lazy_sections", [True, False])
+def test_sections_listen_to_the_country_property(fixture_data, lazy_sections):
+    app = create_app(*fixture_data, lazy_sections=lazy_sections)
+    dependencies = [dependency for entry in app.callback_map.values()
+                    for dependency in entry["inputs"] + entry["state"]]
+    country_properties = {dependency["property"] for dependency in dependencies
+                          if dependency["id"] == "selected-country"}
+    assert country_properties == {"value"}
+    assert any(dependency["id"].endswith("-section-country") for dependency in dependencies) == lazy_sections
+
+
+def test_aggregate_selection_is_read_from_the_store(fixture_data):
+    app = create_app(*fixture_data, lazy_sections=False)
+    invoker = CallbackInvoker(app)
+    figure = invoker.invoke("types-section-aggregate-graph")[0]
+    click_data = {"points": [{"y": figure["data"][0]["y"][0], "customdata": figure["data"][0]["customdata"][0]}]}
+    values = {"types-section-aggregate-graph.clickData": click_data}
+    triggered = "types-section-aggregate-graph.clickData"
+
+    selected = invoker.invoke("types-section-aggregate-graph", values, triggered)[2]
+    assert json.loads(selected) == [get_clicked_type(click_data), click_data["points"][0]["y"]]
+    # The same click on another worker, or from another session, selects too
+    assert invoker.invoke("types-section-aggregate-graph", values, triggered)[2] == selected
+    # and clicking the selected bar again clears the selection
+    values["types-section-last-selected.data"] = selected
+    assert json.loads(invoker.invoke("types-section-aggregate-graph", values, triggered)[2]) is None
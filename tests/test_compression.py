@@ -0,0 +1,22 @@
+"""Compression of the static responses of ``server.compression``."""
+import re
+import dash
+from dash import html
+import server.compression
+from server.compression import compress_responses
+
+
+def test_component_bundles_are_compressed_once(tmp_path, monkeypatch):
+    app = dash.Dash(__name__, assets_folder=str(tmp_path))
+    app.layout = html.Div("content")
+    compress_responses(app.server, str(tmp_path))
+    client = app.server.test_client()
+    path = re.search(r'src="(/_dash-component-suites/[^"]+dash_renderer[^"]+)"', client.get("/").text).group(1)
+
+    calls = []
+    compress = server.compression.compress
+    monkeypatch.setattr(server.compression, "compress",
+                        lambda *args, **kwargs: calls.append(args) or compress(*args, **kwargs))
+    bodies = [client.get(path, headers={"Accept-Encoding": "gzip"}).data for _ in range(3)]
+    assert len(calls) == 1
+    assert bodies[0] == bodies[1] == bodies[2]
@@ -0,0 +1,46 @@
+"""The cached aggregation behind the conflict initiators graph."""
+import gc
+import weakref
+import dash
+import pytest
+from server.initiators_section import Initiators
+
+
+def create_initiators(df):
+    ids = ["aggregate_graph_id", "aggregate_graph_title_id", "total_cyberattacks_id", "year_slider_id", "table_id",
+           "table_title_id", "conflicts_main_graph_id", "conflicts_sectors_graph_id",
+           "conflicts_initiators_graph_id", "conflicts_store_id", "date_range_picker_id", "reset_button"]
+    return Initiators(app=dash.Dash(__name__), df=df, **{name: name.replace("_", "-") for name in ids})
+
+
+@pytest.fixture
+def initiators(df):
+    return create_initiators(df)
+
+
+def test_callers_get_their_own_frames(initiators):
+    arguments = ("Global (states)", None, "All conflicts", "All sectors")
+    first = initiators.get_conflict_initiators(*arguments)
+    first["total"] = 0
+    second = initiators.get_conflict_initiators(*arguments)
+    assert second is not first
+    assert second["total"].gt(0).all()
+
+
+def test_open_date_ranges_keep_none(initiators):
+    open_range = initiators.get_conflict_initiators("Global (states)", ("2020-01-01", None), "All conflicts", "All sectors")
+    closed_range = initiators.get_conflict_initiators(
+        "Global (states)", ("2020-01-01", "2100-01-01"), "All conflicts", "All sectors"
+    )
+    assert open_range.equals(closed_range)
+
+
+def test_cache_is_released_with_the_section(df):
+    initiators = create_initiators(df.copy())
+    initiators.get_conflict_initiators("Global (states)", None, "All conflicts", "All sectors")
+    frame = weakref.ref(initiators.df)
+    del initiators
+    # Dash keeps the last app it created
+    dash.Dash(__name__)
+    gc.collect()
+    assert frame() is None
@@ -0,0 +1,50 @@
+"""Point budgets of the evolution graph downsampling."""
+import numpy as np
+import pandas as pd
+import pytest
+from server.utils import downsample_indices, lttb_indices
+
+
+@pytest.fixture(scope="module")
+def series():
+    dates = pd.date_range("2000-01-01", periods=9000, freq="D")
+    values = np.random.default_rng(0).poisson(3, len(dates)).astype(float)
+    values[4321] = 500
+    return dates, values
+
+
+def test_lttb_keeps_endpoints_and_peaks(series):
+    dates, values = series
+    indices = lttb_indices(dates.astype("int64"), values, 300)
+    assert len(indices) == 300
+    assert indices[0] == 0 and indices[-1] == len(values) - 1
+    assert 4321 in indices
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_short_series_is_not_downsampled():
+    values = np.arange(50)
+    dates = pd.date_range("2020-01-01", periods=50, freq="D")
+    assert list(downsample_indices(dates, values, max_points=400)) == list(range(50))
+
+
+@pytest.mark.parametrize("visible_range", [
+    None,
+    (pd.Timestamp("2010-01-01"), pd.Timestamp("2010-06-30")),
+    (pd.Timestamp("2003-01-01"), pd.Timestamp("2020-12-31")),
+    (pd.Timestamp("1990-01-01"), pd.Timestamp("2001-01-01")),
+])
+def test_downsampling_stays_within_budget(series, visible_range):
+    dates, values = series
+    indices = downsample_indices(dates, values, visible_range, max_points=400)
+    assert len(indices) <= 400
+    assert indices[0] == 0 and indices[-1] == len(values) - 1
+    assert 4321 in indices
+
+
+def test_visible_range_is_kept_at_full_resolution(series):
+    dates, values = series
+    visible_range = (pd.Timestamp("2010-01-01"), pd.Timestamp("2010-06-30"))
+    indices = downsample_indices(dates, values, visible_range, max_points=400)
+    inside = np.flatnonzero((dates >= visible_range[0]) & (dates <= visible_range[1]))
+    assert set(inside) <= set(indices)
@@ -0,0 +1,43 @@
+"""Serialized size budgets of the section figures on the fixture dataset, so that per-point
+strings do not creep back into the payloads."""
+import pytest
+from plotly.io.json import to_json_plotly
+from server.initiators_section import conflict_sectors_graph
+from server.types_section import generate_aggregate_graph, generate_impact_graph, mitre_impact_definitions
+
+
+@pytest.fixture(scope="module")
+def types_df(df):
+    return df[~df["receiver_subcategory"].isin(["Not available", "Other"])]
+
+
+@pytest.fixture(scope="module")
+def conflict(df):
+    return df.loc[df["conflict_name"] != "Not available", "conflict_name"].value_counts().index[0]
+
+
+def payload_size(figure):
+    return len(to_json_plotly(figure))
+
+
+def test_aggregate_graph_budget(types_df):
+    assert payload_size(generate_aggregate_graph(types_df)) <= 11500
+
+
+def test_impact_graph_budget(types_df):
+    figure = generate_impact_graph(data=types_df)
+    assert payload_size(figure) <= 8000
+    # The MITRE definitions are looked up in the browser, not sent with the figure
+    serialized = to_json_plotly(figure)
+    assert not any(definition and definition in serialized for definition in mitre_impact_definitions.values())
+
+
+def test_conflict_sectors_graph_budget(df, conflict):
+    assert payload_size(conflict_sectors_graph(df)[0]) <= 9500
+    assert payload_size(conflict_sectors_graph(df, click_data=True, conflict_name=conflict)[0]) <= 9500
+
+
+def test_conflict_sectors_hovertemplate_keeps_braces(df, conflict):
+    renamed = df.replace({"conflict_name": {conflict: "Conflict {a} {0}"}})
+    figure, _ = conflict_sectors_graph(renamed, click_data=True, conflict_name="Conflict {a} {0}")
+    assert figure.layout.template.data.bar[0].hovertemplate.endswith("<extra>Conflict {a} {0}</extra>")
@@ -0,0 +1,12 @@
+"""Flags inlined by ``server.utils.flag_icon``."""
+from server.utils import flag_icon, load_flags
+
+
+def test_flags_are_inlined():
+    flag = flag_icon("RU")
+    assert flag.src == load_flags()["ru"]
+    assert flag.src.startswith("data:image/webp;base64,")
+
+
+def test_unknown_codes_fall_back():
+    assert flag_icon("not-a-code").src == load_flags()["unknown"]
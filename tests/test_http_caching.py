@@ -0,0 +1,41 @@
+"""Callback ETags of ``server.http_caching``, as a caching reverse proxy sees them."""
+import dash
+from dash import Input, Output, dcc, html
+from server.compression import compress_responses
+from server.http_caching import cache_callback_responses, session_dependent
+
+
+def create_test_app(tmp_path):
+    app = dash.Dash(__name__, assets_folder=str(tmp_path))
+    app.layout = html.Div([dcc.Input(id="text"), html.Div(id="output"), html.Div(id="clock")])
+    app.callback(Output("output", "children"), Input("text", "value"))(lambda value: (value or "") * 1000)
+    app.callback(Output("clock", "children"), Input("text", "value"))(session_dependent(lambda value: value))
+    cache_callback_responses(app, "version")
+    compress_responses(app.server, str(tmp_path))
+    return app
+
+
+def get_body(output):
+    return {"output": output, "outputs": {"id": output.split(".")[0], "property": "children"},
+            "inputs": [{"id": "text", "property": "value", "value": "a"}], "changedPropIds": ["text.value"]}
+
+
+def test_encodings_share_a_weak_etag(tmp_path):
+    client = create_test_app(tmp_path).server.test_client()
+    responses = [client.post("/_dash-update-component", json=get_body("output.children"),
+                             headers={"Accept-Encoding": encoding}) for encoding in ("br", "gzip", "identity")]
+    assert {response.headers.get("Content-Encoding") for response in responses} == {"br", "gzip", None}
+    etags = {response.headers["ETag"] for response in responses}
+    assert len(etags) == 1 and etags.pop().startswith('W/"')
+    assert responses[0].headers["Cache-Control"] == "public, max-age=300"
+
+
+def test_proxy_revalidation_is_answered_without_the_callback(tmp_path):
+    client = create_test_app(tmp_path).server.test_client()
+    etag = client.post("/_dash-update-component", json=get_body("output.children")).headers["ETag"]
+    response = client.post("/_dash-update-component", json=get_body("output.children"),
+                           headers={"If-None-Match": etag})
+    assert response.status_code == 304 and response.headers["ETag"] == etag
+
+    response = client.post("/_dash-update-component", json=get_body("clock.children"))
+    assert response.headers["Cache-Control"] == "no-store" and "ETag" not in response.headers
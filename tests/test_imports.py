@@ -0,0 +1,9 @@
+"""The deferred imports of ``benchmarks.imports``: importing ``main`` in a fresh interpreter. The
+import time budget is left to ``python -m benchmarks.imports``, as it depends on the machine."""
+from benchmarks.imports import check_imports
+
+
+def test_importing_main_defers_the_heavy_modules():
+    total, imported, loaded = check_imports(repeat=1)
+    assert "main" in imported
+    assert loaded == [], f"deferred modules imported at start-up: {loaded}"
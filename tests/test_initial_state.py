@@ -0,0 +1,37 @@
+"""Page load with the initial state embedded by ``server.initial_state``: the renderer should
+find every server callback either already computed or not triggered by the initial layout."""
+import pytest
+from server.app import create_app
+from server.warmup import get_layout_values
+
+
+def get_page_load_callbacks(client):
+    """Server callbacks the renderer would request on page load: those without
+    ``prevent_initial_call`` (``"initial_duplicate"`` still fires) with an input in the layout."""
+    assert client.get("/").status_code == 200
+    values = get_layout_values(client.get("/_dash-layout").json)
+    component_ids = {prop_id.rsplit(".", 1)[0] for prop_id in values}
+    return [
+        callback["output"] for callback in client.get("/_dash-dependencies").json
+        if not callback.get("clientside_function") and callback.get("prevent_initial_call") is not True
+        and any(dependency["id"] in component_ids for dependency in callback["inputs"])
+    ]
+
+
+@pytest.mark.parametrize("lazy_sections", [True, False])
+def test_no_callback_fires_on_page_load(fixture_data, lazy_sections):
+    app = create_app(*fixture_data, initial_state=True, lazy_sections=lazy_sections)
+    assert get_page_load_callbacks(app.server.test_client()) == []
+
+
+def test_callbacks_fire_without_initial_state(fixture_data):
+    app = create_app(*fixture_data, initial_state=False)
+    assert len(get_page_load_callbacks(app.server.test_client())) > 10
+
+
+def test_layout_carries_the_default_figures(fixture_data):
+    app = create_app(*fixture_data, initial_state=True)
+    values = get_layout_values(app.server.test_client().get("/_dash-layout").json)
+    for graph_id in ["overview-section-aggregate-graph", "overview-section-evolution-graph",
+                     "types-section-aggregate-graph", "initiators-section-aggregate-graph"]:
+        assert values[f"{graph_id}.figure"]["data"], graph_id
@@ -0,0 +1,48 @@
+"""The ``/metrics`` route and the figure phase of the callback metrics."""
+import re
+import time
+import dash
+import plotly.graph_objects as go
+import pytest
+from dash import Input, Output, dcc, html
+from server.metrics import instrument_app, timed_phase, track_callbacks
+
+
+@timed_phase("figure")
+def generate_figure(value):
+    time.sleep(0.01)
+    return go.Figure(go.Bar(x=[value], y=[1]))
+
+
+@pytest.fixture
+def client():
+    app = dash.Dash(__name__)
+    track_callbacks(app)
+    app.layout = html.Div([dcc.Input(id="value", value="a"), dcc.Graph(id="graph")])
+
+    @app.callback(Output("graph", "figure"), Input("value", "value"))
+    def update_graph(value):
+        return generate_figure(value)
+
+    instrument_app(app)
+    return app.server.test_client()
+
+
+def test_metrics_require_the_admin_token(client, monkeypatch):
+    assert client.get("/metrics").status_code == 404
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    assert client.get("/metrics").status_code == 403
+    assert client.get("/metrics", headers={"Authorization": "Bearer secret"}).status_code == 200
+
+
+def test_figure_phase_is_reported(client, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    body = {"output": "graph.figure", "outputs": {"id": "graph", "property": "figure"},
+            "inputs": [{"id": "value", "property": "value", "value": "a"}], "changedPropIds": ["value.value"]}
+    assert client.post("/_dash-update-component", json=body).status_code == 200
+
+    metrics = client.get("/metrics", headers={"Authorization": "Bearer secret"}).text
+    labels = 'callback="graph.figure",phase="figure"'
+    assert f"dash_callback_duration_seconds_count{{{labels}}} 1" in metrics
+    seconds = float(re.search(rf"dash_callback_duration_seconds_sum{{{labels}}} (\S+)", metrics).group(1))
+    assert seconds >= 0.01
@@ -0,0 +1,61 @@
+"""Coalescing of identical concurrent callback requests by ``server.single_flight``."""
+import threading
+import time
+import dash
+import pytest
+from dash import Input, Output, dcc, html
+from server.http_caching import session_dependent
+from server.metrics import track_callbacks
+from server.single_flight import coalesce_callbacks
+
+
+concurrent_requests = 4
+
+
+def make_app(calls):
+    app = dash.Dash(__name__)
+    track_callbacks(app)
+    app.layout = html.Div([dcc.Input(id="value", value="a"), html.Div(id="shared"), html.Div(id="session")])
+
+    @app.callback(Output("shared", "children"), Input("value", "value"))
+    def update_shared(value):
+        calls.append("shared")
+        time.sleep(0.2)
+        return value
+
+    @app.callback(Output("session", "children"), Input("value", "value"))
+    @session_dependent
+    def update_session(value):
+        calls.append("session")
+        time.sleep(0.2)
+        return value
+
+    coalesce_callbacks(app, "data-version")
+    return app
+
+
+def post_concurrently(app, output):
+    body = {"output": f"{output}.children", "outputs": {"id": output, "property": "children"},
+            "inputs": [{"id": "value", "property": "value", "value": "a"}], "changedPropIds": ["value.value"]}
+    responses = []
+    barrier = threading.Barrier(concurrent_requests)
+
+    def post():
+        client = app.server.test_client()
+        barrier.wait()
+        responses.append(client.post("/_dash-update-component", json=body))
+
+    threads = [threading.Thread(target=post) for _ in range(concurrent_requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return responses
+
+
+@pytest.mark.parametrize("output, expected_calls", [("shared", 1), ("session", concurrent_requests)])
+def test_only_deterministic_callbacks_are_coalesced(output, expected_calls):
+    calls = []
+    responses = post_concurrently(make_app(calls), output)
+    assert [response.status_code for response in responses] == [200] * concurrent_requests
+    assert calls.count(output) == expected_calls
@@ -0,0 +1,31 @@
+"""Sampling of the slow callback profiler."""
+import os
+import threading
+from server.slow_callbacks import SlowCallbackProfiler, StackSampler
+
+
+class Dispatch:
+    def __init__(self):
+        self.__wrapped__ = self
+
+    def __call__(self):
+        return "response"
+
+
+def test_unsampled_requests_are_not_profiled(tmp_path):
+    profiler = SlowCallbackProfiler(str(tmp_path), threshold_ms=0, sample_rate=0.0, min_interval=0)
+    assert profiler.wrap(Dispatch(), "callback")() == "response"
+    assert profiler.sampler.thread is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_sampler_thread_is_restarted_after_fork():
+    sampler = StackSampler()
+    sampler.start(threading.get_ident())
+    sampler.stop(threading.get_ident())
+    first = sampler.thread
+    # As seen from a worker forked after the first start
+    sampler.pid = -1
+    sampler.start(threading.get_ident())
+    sampler.stop(threading.get_ident())
+    assert sampler.thread is not first and sampler.pid == os.getpid()